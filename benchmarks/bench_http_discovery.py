@@ -0,0 +1,88 @@
+"""Measure native content discovery throughput against a local HTTP server.
+
+Starts a keep-alive HTTP/1.1 server on the loopback interface, generates a
+wordlist and reports requests per second for several thread counts:
+
+    python benchmarks/bench_http_discovery.py [--words N] [--threads 1,10,50]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from enchante.core.http_discovery import HttpDiscovery
+from enchante.core.wordlist import Wordlist
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        # Every hundredth word exists
+        found = self.path.rstrip("/").endswith("00")
+        body = b"found" if found else b"not found"
+        self.send_response(200 if found else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections from many workers
+    request_queue_size = 128
+
+
+def measure(url: str, wordlist: str, extensions, threads: int) -> dict:
+    engine = HttpDiscovery(url, threads=threads)
+    start = time.perf_counter()
+    hits = engine.run(Wordlist(wordlist, extensions))
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "requests": engine.requests,
+        "hits": len(hits),
+        "rps": engine.requests / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--threads", default="1,10,50")
+    parser.add_argument("--extensions", default="php")
+    args = parser.parse_args()
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    fd, wordlist = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w") as f:
+        for i in range(args.words):
+            f.write(f"word{i}\n")
+
+    extensions = [e for e in args.extensions.split(",") if e]
+    try:
+        for threads in (int(t) for t in args.threads.split(",")):
+            result = measure(url, wordlist, extensions, threads)
+            print(
+                f"{threads:>3} threads: {result['requests']} requests in "
+                f"{result['seconds']:.2f} s ({result['rps']:.0f} req/s), "
+                f"{result['hits']} hits"
+            )
+    finally:
+        os.unlink(wordlist)
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compare eager and lazy module discovery.
+
+Each mode runs in a fresh interpreter so import caches do not carry over:
+
+    python benchmarks/bench_registry.py [--runs N]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+from enchante.core.module import ModuleManager
+before = set(sys.modules)
+start = time.perf_counter()
+manager = ModuleManager()
+manager.discover_modules(lazy={lazy})
+names = manager.get_available_modules()
+elapsed = time.perf_counter() - start
+imported = [m for m in set(sys.modules) - before if m.startswith("enchante.modules.")]
+print(json.dumps({{"seconds": elapsed, "modules": len(names), "imported": len(imported)}}))
+"""
+
+
+def measure(lazy: bool, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(lazy=lazy)],
+            stdout=subprocess.PIPE,
+            check=True,
+            text=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "median_ms": statistics.median(s["seconds"] for s in samples) * 1000,
+        "modules": samples[-1]["modules"],
+        "imported": samples[-1]["imported"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    eager = measure(False, args.runs)
+    lazy = measure(True, args.runs)
+
+    for label, result in (("eager", eager), ("lazy", lazy)):
+        print(
+            f"{label:>5}: {result['median_ms']:7.2f} ms, "
+            f"{result['modules']} modules listed, "
+            f"{result['imported']} scanner modules imported"
+        )
+    print(f"saving: {eager['median_ms'] - lazy['median_ms']:.2f} ms per discovery")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Benchmark scans end to end against stub tools, without network access.
+
+Fake nmap, gobuster, nikto, enum4linux and hydra executables (see
+stub_tools.py) are put first on PATH and write synthetic output of a set
+size after a set delay. These scenarios are measured:
+
+``scan``
+    ``enchante scan`` of every module over many targets, with small
+    outputs: wall time, jobs per second and peak memory.
+``batched`` and ``merged``
+    The same scan with ``--batch-size 8`` (port scanner runs shared by
+    several targets) and with ``--merge``. The SMB and SSH scanners run a
+    follow-up tool per target, so they are neither batched nor merged;
+    ``merged`` checks that ``--merge`` costs nothing when no module can
+    share a run.
+``large``
+    ``enchante scan`` of one target whose tools report huge outputs,
+    streamed to JSON lines: wall time and peak memory.
+``overhead``
+    Jobs whose tools return at once, run in-process under the profiler:
+    time spent outside the tools, per job.
+``parse``
+    One job per module with large outputs, run in-process under the
+    profiler: parsing time per output line.
+
+The run fails (exit code 1) if any figure exceeds ``scan_budget.json``:
+
+    python benchmarks/bench_scan.py [--targets N] [--jobs N] [--budget FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import stub_tools
+
+DEFAULT_BUDGET = os.path.join(os.path.dirname(__file__), "scan_budget.json")
+
+MODULES = (
+    "port_scanner.PortScanner",
+    "directory_scanner.DirectoryScanner",
+    "nikto_scanner.NiktoScanner",
+    "smb_scanner.SmbScanner",
+    "ssh_scanner.SSHScanner",
+)
+
+
+def run_cli(args, env) -> dict:
+    """Run ``enchante`` with ``args``; return its wall time and peak RSS."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "enchante.cli"] + args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=env,
+    )
+    stderr = process.stderr.read()
+    # wait4 reports the resource usage of this one child
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"enchante {' '.join(args)} failed:\n{stderr.decode()}")
+    # ru_maxrss is in KiB on Linux
+    return {"wall_s": elapsed, "maxrss_mb": usage.ru_maxrss / 1024}
+
+
+def check_ports(path: str, targets: int):
+    """Fail unless the port scanner found open ports on every target."""
+    found = 0
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if not record["module"].startswith("port_scanner."):
+                continue
+            result = record["result"]
+            if result.get("status") != "completed" or not result.get("open_ports"):
+                raise RuntimeError(f"No open ports on {record['target']}: {result}")
+            found += 1
+    if found != targets:
+        raise RuntimeError(f"Port scan results for {found} of {targets} targets")
+
+
+def bench_scan(workdir: str, stubs: str, targets: int, jobs: int, extra=()) -> dict:
+    """Scan ``targets`` hosts with every module; ``extra`` adds CLI flags."""
+    targets_file = os.path.join(workdir, "targets.txt")
+    with open(targets_file, "w") as f:
+        for i in range(targets):
+            f.write(f"10.0.{i // 250}.{i % 250 + 1}\n")
+
+    env = stub_tools.environment(stubs, records=20, delay=0.05)
+    output = os.path.join(workdir, "scan.jsonl")
+    args = ["scan", "-iL", targets_file, "--jobs", str(jobs), "--no-cache"]
+    measured = run_cli(args + list(extra) + ["-o", output], env)
+    check_ports(output, targets)
+    measured["jobs_per_s"] = targets * len(MODULES) / measured["wall_s"]
+    return measured
+
+
+def bench_large(workdir: str, stubs: str) -> dict:
+    env = stub_tools.environment(stubs, records=100000, nmap_records=65535)
+    measured = {}
+    for module, options in (
+        ("port_scanner.PortScanner", ["-O", "ports=1-65535"]),
+        ("directory_scanner.DirectoryScanner", []),
+        ("nikto_scanner.NiktoScanner", []),
+    ):
+        args = ["scan", "10.0.0.1", "-m", module, "--no-cache"] + options
+        args += ["-o", os.path.join(workdir, "large.jsonl.gz")]
+        result = run_cli(args, env)
+        measured["wall_s"] = measured.get("wall_s", 0.0) + result["wall_s"]
+        measured["maxrss_mb"] = max(measured.get("maxrss_mb", 0.0), result["maxrss_mb"])
+    return measured
+
+
+def profile_jobs(targets, options: dict, env: dict, jobs: int = 1) -> dict:
+    """Run every module in-process under the profiler; return its summary."""
+    from enchante.core.module import ModuleManager
+    from enchante.core.profiler import Profiler, set_profiler
+    from enchante.core.tools import ToolManager
+
+    saved = dict(os.environ)
+    os.environ.update(env)
+    ToolManager.clear_cache()
+    profiler = Profiler()
+    set_profiler(profiler)
+    try:
+        manager = ModuleManager()
+        manager.discover_modules()
+        manager.run_targets(targets, list(MODULES), options, jobs=jobs)
+    finally:
+        set_profiler(None)
+        os.environ.clear()
+        os.environ.update(saved)
+    return profiler.summary()
+
+
+def bench_overhead(stubs: str, targets: int, jobs: int) -> dict:
+    env = stub_tools.environment(stubs, records=0)
+    hosts = [f"10.1.0.{i + 1}" for i in range(targets)]
+    summary = profile_jobs(hosts, {}, env, jobs=jobs)
+    modules = [row for name, row in summary.items() if name != "setup"]
+    overhead = sum(row["overhead_s"] for row in modules)
+    count = sum(row["jobs"] for row in modules)
+    return {"ms_per_job": overhead * 1000 / count}
+
+
+def bench_parse(stubs: str) -> dict:
+    env = stub_tools.environment(stubs, records=50000, nmap_records=65535)
+    options = {"ports": "1-65535", "verbosity": 2}
+    summary = profile_jobs(["10.2.0.1"], options, env)
+
+    measured = {}
+    for module, row in summary.items():
+        if module == "setup" or not row.get("lines"):
+            continue
+        name = module.split(".")[0]
+        measured[f"{name}_us_per_line"] = row["parse_s"] * 1e6 / row["lines"]
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=40)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+
+    # In-process scans would otherwise print every module warning
+    from enchante.core.logger import ROOT_LOGGER, configure_logging
+
+    configure_logging(0)
+    logging.getLogger(ROOT_LOGGER).setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory(prefix="enchante-bench-") as workdir:
+        stubs = stub_tools.install(os.path.join(workdir, "bin"))
+        # Keep tool probes and cached results away from the user's cache
+        os.environ["ENCHANTE_CACHE_DIR"] = os.path.join(workdir, "cache")
+
+        scenarios = {
+            "scan": lambda: bench_scan(workdir, stubs, args.targets, args.jobs),
+            "batched": lambda: bench_scan(
+                workdir, stubs, args.targets, args.jobs, ["--batch-size", "8"]
+            ),
+            "merged": lambda: bench_scan(
+                workdir, stubs, args.targets, args.jobs, ["--merge"]
+            ),
+            "large": lambda: bench_large(workdir, stubs),
+            "overhead": lambda: bench_overhead(stubs, args.targets, args.jobs),
+            "parse": lambda: bench_parse(stubs),
+        }
+        failures = []
+        for name, run in scenarios.items():
+            limits = budget.get(name, {})
+            for metric, value in run().items():
+                limit = limits.get(metric)
+                over = limit is not None and value > limit
+                if over:
+                    failures.append(f"{name} {metric}")
+                line = f"{name:>8} {metric:>34}: {value:10.2f}"
+                if limit is not None:
+                    line += f" (budget {limit})"
+                if over:
+                    line += " OVER"
+                print(line, flush=True)
+
+    if failures:
+        print(f"Over budget: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
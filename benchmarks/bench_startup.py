@@ -0,0 +1,102 @@
+"""Track CLI cold-start time against a budget.
+
+For each command the median wall time of a fresh interpreter is measured,
+along with the total import time reported by ``-X importtime``. The run
+fails (exit code 1) if any figure exceeds ``startup_budget.json``:
+
+    python benchmarks/bench_startup.py [--runs N] [--budget FILE]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+COMMANDS = {
+    "help": ["--help"],
+    "list-modules": ["list-modules"],
+}
+
+DEFAULT_BUDGET = os.path.join(os.path.dirname(__file__), "startup_budget.json")
+
+
+def cli_command(args, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    return command + ["-m", "enchante.cli"] + args
+
+
+def wall_time_ms(args, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            cli_command(args),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def import_time_ms(args) -> float:
+    """Sum the cumulative time of every top-level import."""
+    stderr = subprocess.run(
+        cli_command(args, importtime=True),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    ).stderr
+
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Nested imports are indented below their parent
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+
+    failures = []
+    for name, command_args in COMMANDS.items():
+        measured = {
+            "wall_ms": wall_time_ms(command_args, args.runs),
+            "import_ms": import_time_ms(command_args),
+        }
+        limits = budget.get(name, {})
+        for metric, value in measured.items():
+            limit = limits.get(metric)
+            over = limit is not None and value > limit
+            if over:
+                failures.append(f"{name} {metric}")
+            line = f"{name:>14} {metric:>9}: {value:8.1f} ms"
+            if limit is not None:
+                line += f" (budget {limit} ms)"
+            if over:
+                line += " OVER"
+            print(line)
+
+    if failures:
+        print(f"Over budget: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""Fake nmap, gobuster, nikto, enum4linux and hydra for offline benchmarks.
+
+:func:`install` links every tool name in a directory to this script, which
+then answers version probes and writes synthetic output in each tool's
+format. The output is shaped by environment variables:
+
+``ENCHANTE_STUB_RECORDS``
+    Number of records (ports, paths, findings, shares, credentials) per
+    run; ``ENCHANTE_STUB_<TOOL>_RECORDS`` overrides it for one tool.
+``ENCHANTE_STUB_DELAY``
+    Seconds to wait before writing anything, standing in for probe time;
+    ``ENCHANTE_STUB_<TOOL>_DELAY`` overrides it for one tool.
+``ENCHANTE_STUB_RECORDINGS``
+    Directory of recorded outputs; ``<tool>.out`` is replayed verbatim
+    instead of generating output.
+"""
+
+import os
+import stat
+import sys
+import time
+
+TOOLS = ("nmap", "gobuster", "nikto", "enum4linux", "hydra")
+
+# Arguments of each tool's check_command (see ToolManager.COMMON_TOOLS)
+VERSION_ARGS = {"--version", "version", "-Version", "-h"}
+
+SERVICES = {
+    21: "ftp",
+    22: "ssh",
+    80: "http",
+    139: "netbios-ssn",
+    443: "https",
+    445: "microsoft-ds",
+    3306: "mysql",
+    8080: "http-proxy",
+}
+
+
+def install(directory: str) -> str:
+    """Put the stub tools in ``directory`` and return it.
+
+    The script is copied with a shebang for the running interpreter, so the
+    stubs work whichever ``python3`` comes first on PATH.
+    """
+    # Links are made to an absolute path, which stays valid from any cwd
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    script = os.path.join(directory, "stub_tools.py")
+    with open(__file__) as source:
+        body = source.read().split("\n", 1)[1]
+    with open(script, "w") as f:
+        f.write(f"#!{sys.executable} -S\n{body}")
+    os.chmod(script, os.stat(script).st_mode | stat.S_IXUSR)
+    for tool in TOOLS:
+        link = os.path.join(directory, tool)
+        if not os.path.lexists(link):
+            os.symlink(script, link)
+    return directory
+
+
+def environment(directory: str, records: int = 10, delay: float = 0.0, **tools):
+    """Return a copy of ``os.environ`` with the stubs first on PATH.
+
+    Keyword arguments such as ``nmap_records=5000`` or ``hydra_delay=1``
+    set the per-tool variables.
+    """
+    env = dict(os.environ)
+    env["PATH"] = os.pathsep.join([directory, env.get("PATH", "")])
+    env["ENCHANTE_STUB_RECORDS"] = str(records)
+    env["ENCHANTE_STUB_DELAY"] = str(delay)
+    for key, value in tools.items():
+        env[f"ENCHANTE_STUB_{key.upper()}"] = str(value)
+    return env
+
+
+def _setting(tool: str, name: str, default):
+    value = os.environ.get(f"ENCHANTE_STUB_{tool.upper()}_{name}")
+    if value is None:
+        value = os.environ.get(f"ENCHANTE_STUB_{name}", default)
+    return type(default)(value)
+
+
+def _ports(spec: str):
+    """Yield the ports of an nmap port spec such as ``T:22,80-90``."""
+    for part in spec.split(","):
+        part = part.split(":")[-1]
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        yield from range(int(first), int(last or first) + 1)
+
+
+def nmap(args, records: int, write):
+    ports, scripts, targets = "1-1000", [], []
+    takes_value = {"-oX", "-oN", "-oG", "-iL", "--max-rate", "--script"}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("-p") and len(arg) > 2:
+            ports = arg[2:]
+        elif arg == "--script":
+            scripts = args[i + 1].split(",")
+        elif arg == "-iL":
+            with open(args[i + 1]) as f:
+                targets.extend(line.strip() for line in f if line.strip())
+        elif not arg.startswith("-"):
+            targets.append(arg)
+        if arg in takes_value:
+            i += 1
+        i += 1
+
+    write('<?xml version="1.0"?>\n<nmaprun scanner="nmap" version="7.94">\n')
+    script_xml = "".join(
+        f'<script id="{name}" output="stub output of {name}"/>' for name in scripts
+    )
+    for target in targets:
+        write(
+            f'<host><status state="up"/><address addr="{target}" addrtype="ipv4"/>'
+            "<hostnames/><ports>\n"
+        )
+        for count, port in enumerate(_ports(ports)):
+            if count == records:
+                break
+            service = SERVICES.get(port, "unknown")
+            write(
+                f'<port protocol="tcp" portid="{port}"><state state="open"/>'
+                f'<service name="{service}" product="stub" version="1.0"/>'
+                f"{script_xml}</port>\n"
+            )
+        write("</ports></host>\n")
+    write('<runstats><finished exit="success"/></runstats>\n</nmaprun>\n')
+
+
+def gobuster(args, records: int, write):
+    for i in range(records):
+        status = 301 if i % 10 == 0 else 200
+        line = f"/path{i} (Status: {status}) [Size: {100 + i}]"
+        if status == 301:
+            line += f" [--> /path{i}/]"
+        write(line + "\n")
+
+
+def nikto(args, records: int, write):
+    host = args[args.index("-h") + 1] if "-h" in args else "127.0.0.1"
+    write(f"- Nikto v2.5.0\n+ Target IP:          {host}\n+ Start Time: now\n")
+    for i in range(records):
+        write(f"+ /item{i}/: Stub finding number {i}. See: OSVDB-{1000 + i}\n")
+    write("+ End Time: now\n+ 1 host(s) tested\n")
+
+
+def enum4linux(args, records: int, write):
+    host = args[-1] if args else "127.0.0.1"
+    write(f"Starting enum4linux against {host}\n")
+    for i in range(records):
+        write(f"//{host}/share{i}\tMapping: OK\tListing: OK\n")
+
+
+def hydra(args, records: int, write):
+    target = args[-1] if args else "ssh://127.0.0.1:22"
+    host = target.split("//")[-1].rsplit(":", 1)[0]
+    write("Hydra v9.5 starting\n")
+    for i in range(records):
+        write(f"[22][ssh] host: {host}   login: user{i}   password: pass{i}\n")
+    write("1 of 1 target successfully completed\n")
+
+
+def main():
+    tool = os.path.basename(sys.argv[0])
+    args = sys.argv[1:]
+    if tool not in TOOLS:
+        sys.exit(f"unknown stub tool {tool}")
+    if len(args) == 1 and args[0] in VERSION_ARGS:
+        print(f"{tool} stub 1.0")
+        return
+
+    time.sleep(_setting(tool, "DELAY", 0.0))
+    recordings = os.environ.get("ENCHANTE_STUB_RECORDINGS")
+    recorded = recordings and os.path.join(recordings, f"{tool}.out")
+    if recorded and os.path.isfile(recorded):
+        with open(recorded) as f:
+            sys.stdout.write(f.read())
+        return
+
+    globals()[tool](args, _setting(tool, "RECORDS", 10), sys.stdout.write)
+
+
+if __name__ == "__main__":
+    main()
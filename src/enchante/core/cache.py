@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from typing import Any
+
+
+def get_cache_dir(*parts: str) -> str:
+    """Return (and create) a directory under Enchante's cache directory.
+
+    The base directory is ``$ENCHANTE_CACHE_DIR`` if set, otherwise
+    ``$XDG_CACHE_HOME/enchante`` or ``~/.cache/enchante``.
+    """
+    base = os.environ.get("ENCHANTE_CACHE_DIR")
+    if not base:
+        xdg_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        base = os.path.join(xdg_cache, "enchante")
+
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Load a JSON file, returning ``default`` if it is missing or corrupt."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path: str, data: Any):
+    """Write JSON so that concurrent readers never see a partial file."""
+    write_bytes_atomic(path, json.dumps(data).encode(), suffix=".json")
+
+
+def write_bytes_atomic(path: str, data: bytes, suffix: str = ""):
+    """Write a file via a temporary file and rename it into place."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,164 @@
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ratelimit import RateLimiter
+
+# Largest network expanded into single hosts
+MAX_HOSTS = 65536
+
+
+def parse_ports(spec: str) -> List[int]:
+    """Expand an nmap-style port list such as ``22,80,8000-8100``."""
+    ports = set()
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if part.startswith(("T:", "U:")):
+            part = part[2:]
+        start, sep, end = part.partition("-")
+        first = int(start) if start else 1
+        last = (int(end) if end else 65535) if sep else first
+        if not 0 < first <= last <= 65535:
+            raise ValueError(f"Invalid port range: {part}")
+        ports.update(range(first, last + 1))
+    return sorted(ports)
+
+
+def expand_hosts(target: str) -> List[str]:
+    """Expand a CIDR network into its hosts; other targets are returned as is."""
+    if "/" not in target:
+        return [target]
+    try:
+        network = ipaddress.ip_network(target, strict=False)
+    except ValueError:
+        return [target]
+    if network.num_addresses > MAX_HOSTS:
+        raise ValueError(f"Network {target} has more than {MAX_HOSTS} addresses")
+    hosts = [str(host) for host in network.hosts()]
+    return hosts or [str(network.network_address)]
+
+
+def service_name(port: int, protocol: str = "tcp") -> str:
+    try:
+        return socket.getservbyport(port, protocol)
+    except OSError:
+        return "unknown"
+
+
+class ConnectScanner:
+    """Pure-Python TCP connect scan driven by asyncio.
+
+    A fixed pool of workers pulls (host, port) pairs from a shared
+    iterator, so memory does not grow with the number of probes. Probes
+    that time out are retried; refused connections are not. Once
+    ``deadline`` (a ``time.time()`` value) passes, no new probes start and
+    ``timed_out`` is set.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 500,
+        timeout: float = 1.0,
+        retries: int = 1,
+        rate: Optional[float] = None,
+        rate_per_target: Optional[float] = None,
+        limiter: Optional[RateLimiter] = None,
+        deadline: Optional[float] = None,
+        logger=None,
+    ):
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.limiter = limiter or RateLimiter(rate, rate_per_target)
+        self.deadline = deadline
+        self.timed_out = False
+        self.logger = logger or logging.getLogger(__name__)
+
+    async def probe(self, host: str, port: int, key: Optional[str] = None) -> str:
+        """Return "open", "closed" or "filtered" for one port.
+
+        ``key`` names the target in the per-target rate limit and defaults
+        to ``host``.
+        """
+        for attempt in range(self.retries + 1):
+            await self.limiter.aacquire(key or host)
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), self.timeout
+                )
+            except asyncio.TimeoutError:
+                continue
+            except ConnectionRefusedError:
+                return "closed"
+            except OSError as e:
+                # Unreachable networks and the like are not worth retrying
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"Probe of {host}:{port} failed: {str(e)}")
+                return "filtered"
+
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return "open"
+        return "filtered"
+
+    async def _resolve(self, hosts: Iterable[str]) -> Dict[str, str]:
+        """Resolve hostnames once up front instead of on every probe."""
+        loop = asyncio.get_running_loop()
+        addresses = {}
+        for host in hosts:
+            try:
+                info = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            except socket.gaierror as e:
+                self.logger.error(f"Could not resolve {host}: {str(e)}")
+                continue
+            addresses[host] = info[0][4][0]
+        return addresses
+
+    async def scan(
+        self, hosts: Iterable[str], ports: Iterable[int]
+    ) -> Dict[str, List[dict]]:
+        """Scan every port on every host and return open ports by host."""
+        hosts = list(hosts)
+        ports = list(ports)
+        addresses = await self._resolve(hosts)
+        results: Dict[str, List[dict]] = {host: [] for host in addresses}
+
+        def _pairs() -> Iterator[Tuple[str, int]]:
+            for port in ports:
+                for host in addresses:
+                    yield host, port
+
+        pairs = _pairs()
+
+        async def _worker():
+            for host, port in pairs:
+                if self.deadline is not None and time.time() >= self.deadline:
+                    self.timed_out = True
+                    return
+                state = await self.probe(addresses[host], port, key=host)
+                if state == "open":
+                    if self.logger.isEnabledFor(logging.INFO):
+                        self.logger.info(f"Open port found: {port}/tcp on {host}")
+                    results[host].append(
+                        {
+                            "port": str(port),
+                            "protocol": "tcp",
+                            "state": "open",
+                            "service": service_name(port),
+                        }
+                    )
+
+        workers = min(self.concurrency, len(addresses) * len(ports))
+        await asyncio.gather(*(_worker() for _ in range(workers)))
+
+        for open_ports in results.values():
+            open_ports.sort(key=lambda p: int(p["port"]))
+        return results
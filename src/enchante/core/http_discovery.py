@@ -0,0 +1,171 @@
+import http.client
+import logging
+import queue
+import ssl
+import threading
+import time
+import uuid
+from typing import Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote, urlsplit
+
+# Status codes reported as hits by default, as in gobuster
+DEFAULT_STATUS_CODES = {200, 204, 301, 302, 307, 308, 401, 403}
+
+USER_AGENT = "enchante"
+
+_STOP = object()
+
+
+class HttpDiscovery:
+    """Threaded content discovery over keep-alive HTTP connections.
+
+    Each worker thread owns one persistent connection to the target and
+    pulls paths from a bounded queue fed from a streamed wordlist (see
+    :class:`enchante.core.wordlist.Wordlist`), so memory stays flat however
+    long the list is. Before the run, a random path is requested to learn
+    what the server returns for missing pages; responses that look the
+    same are not reported. Once ``deadline`` (a ``time.time()`` value)
+    passes, no new paths are queued and ``timed_out`` is set.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        threads: int = 10,
+        timeout: float = 10.0,
+        status_codes: Optional[Set[int]] = None,
+        limiter=None,
+        deadline: Optional[float] = None,
+        logger=None,
+    ):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid URL: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.threads = max(1, int(threads))
+        self.timeout = float(timeout)
+        self.status_codes = set(status_codes or DEFAULT_STATUS_CODES)
+        self.limiter = limiter
+        self.deadline = deadline
+        self.timed_out = False
+        self.logger = logger or logging.getLogger(__name__)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._not_found: Optional[Tuple[int, int]] = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            # Targets are often self-signed; discovery does not need trust
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(
+        self, conn: http.client.HTTPConnection, path: str
+    ) -> Tuple[http.client.HTTPConnection, Optional[dict]]:
+        """Request ``path`` and return the (possibly new) connection and a hit.
+
+        The hit is None when the request failed. A connection dropped by
+        the server is reopened and the request retried once.
+        """
+        url = f"{self.base_path}/{quote(path, safe='/.-_~%')}"
+        for attempt in range(2):
+            if self.limiter is not None:
+                self.limiter.acquire(self.host)
+            try:
+                conn.request("GET", url, headers={"User-Agent": USER_AGENT})
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                conn = self._connect()
+                if attempt:
+                    self.logger.debug(f"Request for {url} failed: {str(e)}")
+                    with self._lock:
+                        self.errors += 1
+                continue
+
+            with self._lock:
+                self.requests += 1
+            hit = {"path": url, "status": response.status, "size": len(body)}
+            location = response.getheader("Location")
+            if location:
+                hit["redirect"] = location
+            if response.will_close:
+                conn.close()
+                conn = self._connect()
+            return conn, hit
+        return conn, None
+
+    def calibrate(self):
+        """Learn how the server answers a path that cannot exist."""
+        conn = self._connect()
+        try:
+            _, hit = self.request(conn, uuid.uuid4().hex)
+        finally:
+            conn.close()
+        if hit and hit["status"] in self.status_codes:
+            self._not_found = (hit["status"], hit["size"])
+            self.logger.info(
+                f"Server answers missing paths with status {hit['status']}; "
+                "filtering identical responses"
+            )
+
+    def is_hit(self, hit: dict) -> bool:
+        if hit["status"] not in self.status_codes:
+            return False
+        return (hit["status"], hit["size"]) != self._not_found
+
+    def run(self, paths: Iterable[str], on_hit=None) -> List[dict]:
+        """Request every path and return the hits in discovery order."""
+        self.calibrate()
+        hits: List[dict] = []
+        work: "queue.Queue" = queue.Queue(maxsize=self.threads * 4)
+
+        def _worker():
+            conn = self._connect()
+            try:
+                while True:
+                    path = work.get()
+                    if path is _STOP:
+                        return
+                    try:
+                        conn, hit = self.request(conn, path)
+                        if hit is None or not self.is_hit(hit):
+                            continue
+                        with self._lock:
+                            hits.append(hit)
+                        if on_hit:
+                            on_hit(hit)
+                    except Exception as e:
+                        # Keep consuming so the producer never blocks
+                        self.logger.error(f"Error requesting {path}: {str(e)}")
+            finally:
+                conn.close()
+
+        workers = [
+            threading.Thread(target=_worker, daemon=True) for _ in range(self.threads)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for path in paths:
+                if self.deadline is not None and time.time() >= self.deadline:
+                    self.timed_out = True
+                    self.logger.warning("Deadline reached; stopping discovery")
+                    break
+                work.put(path)
+        finally:
+            for _ in workers:
+                work.put(_STOP)
+            for worker in workers:
+                worker.join()
+        return hits
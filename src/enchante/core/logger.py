@@ -1,72 +1,185 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
 # Custom log levels
 VERBOSE = 15  # Between INFO and DEBUG
 SPAM = 5  # More detailed than DEBUG
 
+# Every Enchante logger (including scanner modules) lives under this name
+ROOT_LOGGER = "enchante"
+
+CONSOLE_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+logging.addLevelName(VERBOSE, "VERBOSE")
+logging.addLevelName(SPAM, "SPAM")
+
+
+def _verbose(self, message, *args, **kwargs):
+    if self.isEnabledFor(VERBOSE):
+        self._log(VERBOSE, message, args, **kwargs)
+
+
+def _spam(self, message, *args, **kwargs):
+    if self.isEnabledFor(SPAM):
+        self._log(SPAM, message, args, **kwargs)
+
+
+logging.Logger.verbose = _verbose
+logging.Logger.spam = _spam
+
+
+def level_for(verbosity: int) -> int:
+    """Return the log level of a verbosity value.
+
+    0: WARNING (default)
+    1: INFO (-v)
+    2: VERBOSE (-vv)
+    3+: DEBUG and above (-vvv)
+    """
+    if verbosity >= 3:
+        return logging.DEBUG
+    if verbosity == 2:
+        return VERBOSE
+    if verbosity == 1:
+        return logging.INFO
+    return logging.WARNING
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Write to whatever ``sys.stdout`` is when a record is emitted."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
 
 class LoggerManager:
-    """Custom logger with support for different verbosity levels."""
-
-    def __init__(self, name: str, verbosity: int = 0):
-        self.logger = logging.getLogger(name)
-
-        # Add custom log levels
-        logging.addLevelName(VERBOSE, "VERBOSE")
-        logging.addLevelName(SPAM, "SPAM")
-
-        # Add methods for custom levels
-        setattr(
-            logging.Logger,
-            "verbose",
-            lambda self, message, *args, **kwargs: self.log(
-                VERBOSE, message, *args, **kwargs
-            ),
-        )
-        setattr(
-            logging.Logger,
-            "spam",
-            lambda self, message, *args, **kwargs: self.log(
-                SPAM, message, *args, **kwargs
-            ),
-        )
-
-        # Set up handler
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
-
-        # Set verbosity level
-        self.set_verbosity(verbosity)
+    """Owns the handlers of the ``enchante`` logger.
+
+    Loggers only put records on a queue; a single listener thread formats
+    them and writes them to stdout (and, optionally, a JSON-lines file), so
+    scanner threads never wait on output. There is one manager per process,
+    configured through :func:`configure_logging`.
+    """
+
+    def __init__(self):
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+        self.console = _StdoutHandler()
+        self.console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        self.json_handler: Optional[logging.Handler] = None
+        self.listener: Optional[QueueListener] = None
+        self.logger = logging.getLogger(ROOT_LOGGER)
+        self.logger.addHandler(QueueHandler(self.queue))
+        self._start()
+
+    def _start(self):
+        handlers = [self.console]
+        if self.json_handler is not None:
+            handlers.append(self.json_handler)
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def _stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
 
     def set_verbosity(self, verbosity: int):
-        """Set logger level based on verbosity value.
-
-        0: WARNING (default)
-        1: INFO (-v)
-        2: VERBOSE (-vv)
-        3+: DEBUG and above (-vvv)
-        """
-        if verbosity >= 3:
-            self.logger.setLevel(logging.DEBUG)
-        elif verbosity == 2:
-            self.logger.setLevel(VERBOSE)
-        elif verbosity == 1:
-            self.logger.setLevel(logging.INFO)
-        else:
-            self.logger.setLevel(logging.WARNING)
-
-    def get_logger(self):
-        """Return the configured logger."""
-        return self.logger
+        """Set the console level; the JSON sink also keeps INFO records."""
+        level = level_for(verbosity)
+        self.console.setLevel(level)
+        if self.json_handler is not None:
+            level = min(level, self.json_handler.level)
+        self.logger.setLevel(level)
+
+    def set_json_path(self, path: Optional[str]):
+        """Also write every record at INFO or above to ``path`` as JSON lines."""
+        self._stop()
+        if self.json_handler is not None:
+            self.json_handler.close()
+            self.json_handler = None
+        if path:
+            self.json_handler = logging.FileHandler(path, encoding="utf-8")
+            self.json_handler.setFormatter(JsonFormatter())
+            self.json_handler.setLevel(logging.INFO)
+        self._start()
+
+    def flush(self):
+        """Wait until every queued record has been written."""
+        if self.listener is not None:
+            self.queue.join()
+
+    def shutdown(self):
+        self._stop()
+        if self.json_handler is not None:
+            self.json_handler.close()
+
+
+_manager: Optional[LoggerManager] = None
+_manager_lock = threading.Lock()
+
+
+def configure_logging(verbosity: int = 0, json_path: Optional[str] = None):
+    """Set up Enchante's logging, or change its verbosity and JSON sink.
+
+    Handlers are only created the first time; later calls adjust them, so
+    no record is ever written twice. ``json_path`` adds a JSON-lines sink;
+    None keeps the current one and an empty string removes it.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = LoggerManager()
+            atexit.register(_manager.shutdown)
+        if json_path is not None:
+            _manager.set_json_path(json_path)
+        _manager.set_verbosity(verbosity)
+        return _manager
+
+
+def flush_logging():
+    """Write out queued log records, e.g. before printing results."""
+    if _manager is not None:
+        _manager.flush()
 
 
 def get_logger(name: str, verbosity: int = 0):
-    """Helper function to get a configured logger."""
-    custom_logger = LoggerManager(name, verbosity)
-    return custom_logger.get_logger()
+    """Return a logger under ``enchante``, configuring logging on first use.
+
+    ``verbosity`` only applies if logging was not configured yet; the
+    level is otherwise set once by :func:`configure_logging`.
+    """
+    if _manager is None:
+        configure_logging(verbosity)
+    if name != ROOT_LOGGER and not name.startswith(f"{ROOT_LOGGER}."):
+        name = f"{ROOT_LOGGER}.{name}"
+    return logging.getLogger(name)
@@ -0,0 +1,65 @@
+import gzip
+import json
+import threading
+import time
+from typing import Optional
+
+# Result fields holding raw tool output, left out of results kept in memory
+# once they have been streamed to disk
+RAW_FIELDS = ("raw_output", "enum4linux_scan", "hydra_scan")
+
+
+def is_jsonl(path: str) -> bool:
+    """Tell whether an output path asks for streamed JSON lines."""
+    name = path[:-3] if path.endswith(".gz") else path
+    return name.endswith((".jsonl", ".ndjson"))
+
+
+def compact_result(result: dict) -> dict:
+    """Return a result without its raw tool output.
+
+    Statuses, errors and parsed findings such as ``open_ports`` and the
+    ``nmap_scan`` host record are kept, so summaries and the pipeline
+    still work from the compact result.
+    """
+    return {key: value for key, value in result.items() if key not in RAW_FIELDS}
+
+
+class JsonlWriter:
+    """Writes one JSON record per finished job as soon as it completes.
+
+    Each line is flushed, so the file can be followed while the scan runs.
+    Paths ending in ``.gz`` are gzip-compressed; every record is flushed
+    as a complete deflate block so partial files still decompress.
+    """
+
+    def __init__(self, path: str, compress: Optional[bool] = None):
+        self.path = path
+        if compress is None:
+            compress = path.endswith(".gz")
+        if compress:
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8")
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def write(self, target: str, module: str, result: dict):
+        line = json.dumps(
+            {"time": time.time(), "target": target, "module": module, "result": result},
+            default=str,
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,173 @@
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .scheduler import Job, Scheduler
+
+
+def _normalize_service(service: str) -> str:
+    # nmap reports TLS-wrapped services as e.g. "ssl/http"
+    return service.lower().split("/")[-1]
+
+
+def requirement_matches(requirement: str, port: dict) -> bool:
+    """Check one requirement against one discovered port.
+
+    Requirements are either ``<protocol>/<port>`` (e.g. ``tcp/22``) or
+    ``service:<name>`` (e.g. ``service:http``, which also matches
+    ``ssl/http`` and ``http-alt``).
+    """
+    if requirement.startswith("service:"):
+        wanted = requirement.split(":", 1)[1].lower()
+        service = _normalize_service(str(port.get("service", "")))
+        return service == wanted or service.startswith(f"{wanted}-")
+
+    protocol, _, number = requirement.partition("/")
+    return (
+        str(port.get("port")) == number
+        and port.get("protocol", "tcp").lower() == protocol.lower()
+    )
+
+
+def matching_ports(requires, open_ports: List[dict]) -> List[dict]:
+    """Return the open ports that satisfy any of a module's requirements."""
+    return [
+        port
+        for port in open_ports
+        if any(requirement_matches(req, port) for req in requires)
+    ]
+
+
+class Pipeline:
+    """Runs discovery modules first and dependent modules only where they apply.
+
+    Modules with a ``provides`` attribute (such as PortScanner) run in the
+    first stage. A module with ``requires`` then only runs against targets
+    where one of its requirements matched an open port, with that port
+    passed in as its ``port`` option. Modules without requirements always
+    run, and dependents also run when discovery failed for a target.
+    """
+
+    def __init__(self, module_manager, scheduler: Scheduler, logger=None):
+        self.module_manager = module_manager
+        self.scheduler = scheduler
+        self.logger = logger or logging.getLogger(__name__)
+
+    def split_modules(self, module_names: List[str]) -> Tuple[List[str], List[str]]:
+        """Split modules into (providers, dependents)."""
+        providers, dependents = [], []
+        for name in module_names:
+            module_class = self.module_manager.get_module(name)
+            if getattr(module_class, "provides", ()):
+                providers.append(name)
+            else:
+                dependents.append(name)
+        return providers, dependents
+
+    def plan_dependents(
+        self,
+        targets: List[str],
+        dependents: List[str],
+        discovery: Dict[str, Dict[str, dict]],
+    ) -> Tuple[List[Job], List[Tuple[Job, dict]]]:
+        """Return the dependent jobs to run and the ones skipped, with reasons."""
+        jobs: List[Job] = []
+        skipped: List[Tuple[Job, dict]] = []
+
+        for target in targets:
+            open_ports, known = self._open_ports(discovery.get(target, {}))
+            for name in dependents:
+                requires = getattr(self.module_manager.get_module(name), "requires", ())
+                if not requires or not known:
+                    jobs.append(Job(target, name))
+                    continue
+
+                matches = matching_ports(requires, open_ports)
+                if not matches:
+                    reason = f"no open port matching {', '.join(requires)}"
+                    self.logger.info(f"Skipping {name} on {target}: {reason}")
+                    skipped.append(
+                        (Job(target, name), {"status": "skipped", "reason": reason})
+                    )
+                    continue
+
+                jobs.append(
+                    Job(
+                        target,
+                        name,
+                        {"port": int(matches[0]["port"]), "open_ports": matches},
+                    )
+                )
+
+        return jobs, skipped
+
+    @staticmethod
+    def _open_ports(provider_results: Dict[str, dict]) -> Tuple[List[dict], bool]:
+        """Collect open ports from discovery results.
+
+        The flag is False when no discovery module completed, in which case
+        nothing is known about the target.
+        """
+        open_ports: List[dict] = []
+        known = False
+        for result in provider_results.values():
+            if result.get("status") == "completed":
+                known = True
+                open_ports.extend(result.get("open_ports") or [])
+        return open_ports, known
+
+    def run(
+        self,
+        targets: List[str],
+        module_names: List[str],
+        options: Optional[dict] = None,
+        on_result: Optional[Callable[[Job, dict], None]] = None,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Run the pipeline and return results by target, then module."""
+        providers, dependents = self.split_modules(module_names)
+        discovery = self.scheduler.run_jobs(
+            self.scheduler.build_jobs(targets, providers), options, on_result
+        )
+        jobs, skipped = self.plan_dependents(targets, dependents, discovery)
+        for job, result in skipped:
+            if on_result:
+                on_result(job, result)
+        results = self.scheduler.run_jobs(jobs, options, on_result)
+        return self._merge(targets, module_names, discovery, results, skipped)
+
+    async def arun(
+        self,
+        targets: List[str],
+        module_names: List[str],
+        options: Optional[dict] = None,
+        on_result: Optional[Callable[[Job, dict], None]] = None,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Async counterpart of :meth:`run`."""
+        providers, dependents = self.split_modules(module_names)
+        discovery = await self.scheduler.arun_jobs(
+            self.scheduler.build_jobs(targets, providers), options, on_result
+        )
+        jobs, skipped = self.plan_dependents(targets, dependents, discovery)
+        for job, result in skipped:
+            if on_result:
+                on_result(job, result)
+        results = await self.scheduler.arun_jobs(jobs, options, on_result)
+        return self._merge(targets, module_names, discovery, results, skipped)
+
+    @staticmethod
+    def _merge(targets, module_names, discovery, results, skipped):
+        merged: Dict[str, Dict[str, dict]] = {target: {} for target in targets}
+        for stage in (discovery, results):
+            for target, target_results in stage.items():
+                merged[target].update(target_results)
+        for job, result in skipped:
+            merged[job.target][job.module] = result
+
+        # Report modules in the order they were asked for
+        return {
+            target: {
+                name: merged[target][name]
+                for name in module_names
+                if name in merged[target]
+            }
+            for target in targets
+        }
@@ -0,0 +1,271 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# The profiler spans are recorded to, or None when profiling is off
+_active: Optional["Profiler"] = None
+
+# (module, target) of the job being run, so tool runs inside merged or
+# batched runs are attributed to the unit that started them
+_current_job: ContextVar[Optional[Tuple[str, str]]] = ContextVar(
+    "enchante_profiled_job", default=None
+)
+
+
+def get_profiler() -> Optional["Profiler"]:
+    return _active
+
+
+def set_profiler(profiler: Optional["Profiler"]):
+    """Start recording spans to ``profiler`` (or stop, with None)."""
+    global _active
+    _active = profiler
+
+
+def _children_usage():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+class ToolRun:
+    """Measures one external tool run for :meth:`Profiler.tool_run`.
+
+    Tracks the time to the first output line and the time spent in the
+    module's line parser, and takes the CPU time of the run from the
+    difference in ``getrusage(RUSAGE_CHILDREN)``. That difference only
+    belongs to this tool when no other tool exited meanwhile, which the
+    span records as ``cpu_exact``.
+    """
+
+    def __init__(self, profiler: "Profiler", tool: str, args: dict):
+        self.profiler = profiler
+        self.tool = tool
+        self.args = args
+        self.start = time.perf_counter()
+        self.first_output: Optional[float] = None
+        self.parse_time = 0.0
+        self.lines = 0
+        self._usage = _children_usage()
+        self._exits = profiler.tool_exits
+
+    def parse(self, parser, tool_name: str, line: str):
+        """Call ``parser`` on one output line and time it."""
+        now = time.perf_counter()
+        if self.first_output is None:
+            self.first_output = now
+        parser(tool_name, line)
+        self.parse_time += time.perf_counter() - now
+        self.lines += 1
+
+    def finish(self, result: dict):
+        end = time.perf_counter()
+        args = dict(self.args)
+        args.update(
+            success=result.get("success"),
+            lines=self.lines,
+            parse_s=round(self.parse_time, 6),
+        )
+        if result.get("timed_out"):
+            args["timed_out"] = True
+        if self.first_output is not None:
+            args["first_output_s"] = round(self.first_output - self.start, 6)
+
+        usage = _children_usage()
+        with self.profiler.lock:
+            exact = self.profiler.tool_exits == self._exits
+            self.profiler.tool_exits += 1
+        if usage is not None and self._usage is not None:
+            args["user_s"] = round(usage.ru_utime - self._usage.ru_utime, 6)
+            args["sys_s"] = round(usage.ru_stime - self._usage.ru_stime, 6)
+            args["cpu_exact"] = exact
+            # The largest resident set of any tool so far, in KiB on Linux
+            args["children_maxrss_kb"] = usage.ru_maxrss
+
+        self.profiler.record(self.tool, "tool", self.start, end - self.start, **args)
+
+
+class Profiler:
+    """Collects timing spans of a scan.
+
+    Spans come from module discovery and imports, module runs (with
+    their setup and scan phases) and every external tool run. They can be
+    summarised per module (:meth:`summary`) or exported as a Chrome trace
+    (:meth:`export_chrome_trace`, viewable in chrome://tracing or
+    Perfetto) with one track per job.
+    """
+
+    def __init__(self):
+        self.spans: List[dict] = []
+        self.lock = threading.Lock()
+        self.tool_exits = 0
+        self._origin = time.perf_counter()
+
+    def record(self, name: str, category: str, start: float, duration: float, **args):
+        """Add a finished span; ``start`` is a ``time.perf_counter()`` value."""
+        span = {
+            "name": name,
+            "cat": category,
+            "start": start - self._origin,
+            "dur": duration,
+            "thread": threading.get_ident(),
+            "args": args,
+        }
+        with self.lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[dict]:
+        """Record the time spent in a ``with`` block.
+
+        The yielded dictionary is added to the span's arguments, so the
+        block can attach what it learns (e.g. a result status).
+        """
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.record(name, category, start, time.perf_counter() - start, **args)
+
+    @contextmanager
+    def job(self, module: str, target: str, **args) -> Iterator[dict]:
+        """Record a module run; tool runs inside it are attributed to it."""
+        token = _current_job.set((module, target))
+        try:
+            with self.span(module, "module", module=module, target=target, **args) as a:
+                yield a
+        finally:
+            _current_job.reset(token)
+
+    def tool_run(self, tool: str, module: str, target: str, **args) -> ToolRun:
+        """Start measuring a tool run of a module against a target."""
+        job = _current_job.get()
+        if job is not None:
+            module, target = job
+        return ToolRun(self, tool, dict(args, module=module, target=target))
+
+    def summary(self) -> Dict[str, dict]:
+        """Return totals per module, plus a ``setup`` entry.
+
+        Overhead is a module's wall time minus the wall time of its tools
+        and its parsing: Python orchestration, result building, caching.
+        """
+        rows: Dict[str, dict] = OrderedDict()
+        setup = {"wall_s": 0.0}
+        for span in self.spans:
+            if span["cat"] == "setup":
+                setup["wall_s"] += span["dur"]
+                continue
+            module = span["args"].get("module")
+            if module is None:
+                continue
+            row = rows.setdefault(
+                module,
+                {
+                    "jobs": 0,
+                    "wall_s": 0.0,
+                    "tool_s": 0.0,
+                    "tool_cpu_s": 0.0,
+                    "parse_s": 0.0,
+                    "tools": 0,
+                    "lines": 0,
+                    "maxrss_kb": 0,
+                },
+            )
+            args = span["args"]
+            if span["cat"] == "module":
+                row["jobs"] += args.get("jobs", 1)
+                row["wall_s"] += span["dur"]
+            elif span["cat"] == "parse":
+                row["parse_s"] += span["dur"]
+            elif span["cat"] == "tool":
+                # Lines are parsed while the tool runs; count that as parsing
+                parse_time = args.get("parse_s", 0.0)
+                row["tools"] += 1
+                row["lines"] += args.get("lines", 0)
+                row["tool_s"] += span["dur"] - parse_time
+                row["parse_s"] += parse_time
+                row["tool_cpu_s"] += args.get("user_s", 0.0) + args.get("sys_s", 0.0)
+                row["maxrss_kb"] = max(
+                    row["maxrss_kb"], args.get("children_maxrss_kb", 0)
+                )
+
+        for row in rows.values():
+            row["overhead_s"] = max(0.0, row["wall_s"] - row["tool_s"] - row["parse_s"])
+        if self.spans:
+            rows["setup"] = setup
+        return rows
+
+    def chrome_trace(self) -> dict:
+        """Return the spans in Chrome's trace event format.
+
+        Each job (module and target) gets a track of its own; setup spans
+        go on a separate ``enchante`` track.
+        """
+        pid = os.getpid()
+        lanes: Dict[str, int] = {"enchante": 0}
+        events = []
+        for span in sorted(self.spans, key=lambda s: (s["start"], -s["dur"])):
+            args = span["args"]
+            lane = "enchante"
+            if args.get("module"):
+                lane = f"{args['module']} {args.get('target', '')}".strip()
+            tid = lanes.setdefault(lane, len(lanes))
+            events.append(
+                {
+                    "name": span["name"],
+                    "cat": span["cat"],
+                    "ph": "X",
+                    "ts": round(span["start"] * 1e6, 3),
+                    "dur": round(span["dur"] * 1e6, 3),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+        for lane, tid in lanes.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": lane},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+
+@contextmanager
+def _no_span() -> Iterator[dict]:
+    yield {}
+
+
+def profile_span(name: str, category: str, **args):
+    """Return a span context manager, or a no-op one when profiling is off."""
+    profiler = _active
+    if profiler is None:
+        return _no_span()
+    return profiler.span(name, category, **args)
+
+
+def profile_job(module: str, target: str, **args):
+    """Return :meth:`Profiler.job`, or a no-op when profiling is off."""
+    profiler = _active
+    if profiler is None:
+        return _no_span()
+    return profiler.job(module, target, **args)
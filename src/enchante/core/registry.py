@@ -0,0 +1,217 @@
+import ast
+import hashlib
+import importlib
+import importlib.util
+import logging
+import os
+import pkgutil
+import sys
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from .cache import get_cache_dir, read_json, write_json_atomic
+
+ENTRY_POINT_GROUP = "enchante.modules"
+
+# Base classes that mark a class as a scanner. Classes found in the scanned
+# package are added as they are discovered, so subclasses of subclasses
+# are picked up too.
+SCANNER_BASES = {"Scanner", "NmapScanner"}
+
+MANIFEST_VERSION = 2
+
+logger = logging.getLogger(__name__)
+
+
+class ModuleSpec(NamedTuple):
+    """Where to find a scanner class, without having imported it."""
+
+    name: str
+    module: str
+    class_name: str
+    description: str = ""
+
+
+def _base_name(node: ast.expr) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _iter_source_files(package_name: str) -> List[tuple]:
+    """Return (module name, file path) for every module in a package tree."""
+    spec = importlib.util.find_spec(package_name)
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError(f"No package named {package_name}")
+
+    files = []
+    pending = [(package_name, list(spec.submodule_search_locations))]
+    while pending:
+        prefix, paths = pending.pop()
+        for finder, name, is_pkg in pkgutil.iter_modules(paths):
+            full_name = f"{prefix}.{name}"
+            base = os.path.join(finder.path, name)
+            if is_pkg:
+                pending.append((full_name, [base]))
+            elif os.path.exists(base + ".py"):
+                files.append((full_name, base + ".py"))
+    return sorted(files)
+
+
+def _fingerprint(files: List[tuple]) -> str:
+    digest = hashlib.sha1(str(MANIFEST_VERSION).encode())
+    for module_name, path in files:
+        st = os.stat(path)
+        digest.update(f"{module_name}:{st.st_mtime_ns}:{st.st_size};".encode())
+    return digest.hexdigest()
+
+
+def scan_sources(files: List[tuple]) -> List[ModuleSpec]:
+    """Find scanner classes in the given source files without importing them."""
+    classes = []
+    for module_name, path in files:
+        try:
+            with open(path, "rb") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError) as e:
+            logger.error(f"Error reading module {module_name}: {str(e)}")
+            continue
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                bases = {_base_name(base) for base in node.bases}
+                classes.append((module_name, node, bases))
+
+    # Resolve scanner subclasses until no new ones are found
+    scanner_names: Set[str] = set(SCANNER_BASES)
+    found: Dict[tuple, ModuleSpec] = {}
+    changed = True
+    while changed:
+        changed = False
+        for module_name, node, bases in classes:
+            key = (module_name, node.name)
+            if key in found or not bases & scanner_names:
+                continue
+            docstring = ast.get_docstring(node) or ""
+            found[key] = ModuleSpec(
+                name=f"{module_name.split('.')[-1]}.{node.name}",
+                module=module_name,
+                class_name=node.name,
+                description=docstring.strip().splitlines()[0] if docstring else "",
+            )
+            scanner_names.add(node.name)
+            changed = True
+
+    return [found[key] for key in sorted(found)]
+
+
+def build_manifest(package_name: str, use_cache: bool = True) -> List[ModuleSpec]:
+    """Return the scanners in a package, using the cached manifest if valid.
+
+    The manifest is rebuilt from the module sources only when a file in the
+    package has changed, so listing modules imports none of them.
+    """
+    files = _iter_source_files(package_name)
+    fingerprint = _fingerprint(files)
+    cache_path = None
+
+    if use_cache:
+        try:
+            cache_path = os.path.join(get_cache_dir("registry"), f"{package_name}.json")
+        except OSError:
+            cache_path = None
+
+    if cache_path:
+        manifest = read_json(cache_path, {}) or {}
+        if manifest.get("fingerprint") == fingerprint:
+            return [ModuleSpec(**entry) for entry in manifest.get("modules", [])]
+
+    specs = scan_sources(files)
+
+    if cache_path:
+        try:
+            write_json_atomic(
+                cache_path,
+                {
+                    "fingerprint": fingerprint,
+                    "modules": [spec._asdict() for spec in specs],
+                },
+            )
+        except OSError as e:
+            logger.debug(f"Could not write module manifest {cache_path}: {str(e)}")
+
+    return specs
+
+
+def _sys_path_fingerprint() -> str:
+    # Installing or removing a distribution touches its site directory
+    digest = hashlib.sha1(str(MANIFEST_VERSION).encode())
+    for path in sys.path:
+        try:
+            digest.update(f"{path}:{os.stat(path or '.').st_mtime_ns};".encode())
+        except OSError:
+            continue
+    return digest.hexdigest()
+
+
+def entry_point_specs(use_cache: bool = True) -> List[ModuleSpec]:
+    """Return scanners registered by installed packages via entry points.
+
+    Reading entry points means scanning every installed distribution, so
+    the result is cached until a directory on ``sys.path`` changes.
+    """
+    fingerprint = _sys_path_fingerprint()
+    cache_path = None
+
+    if use_cache:
+        try:
+            cache_path = os.path.join(get_cache_dir("registry"), "entry_points.json")
+        except OSError:
+            cache_path = None
+
+    if cache_path:
+        cached = read_json(cache_path, {}) or {}
+        if cached.get("fingerprint") == fingerprint:
+            return [ModuleSpec(**entry) for entry in cached.get("modules", [])]
+
+    specs = _load_entry_points()
+
+    if cache_path:
+        try:
+            write_json_atomic(
+                cache_path,
+                {
+                    "fingerprint": fingerprint,
+                    "modules": [spec._asdict() for spec in specs],
+                },
+            )
+        except OSError as e:
+            logger.debug(f"Could not write entry point cache {cache_path}: {str(e)}")
+
+    return specs
+
+
+def _load_entry_points() -> List[ModuleSpec]:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python 3.7
+        return []
+
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        group = eps.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = eps.get(ENTRY_POINT_GROUP, [])
+
+    specs = []
+    for ep in group:
+        module, _, class_name = ep.value.partition(":")
+        specs.append(ModuleSpec(ep.name, module.strip(), class_name.strip()))
+    return specs
+
+
+def load_class(spec: ModuleSpec):
+    """Import the module named by a spec and return its scanner class."""
+    module = importlib.import_module(spec.module)
+    return getattr(module, spec.class_name)
@@ -1,66 +1,541 @@
+import asyncio
+import codecs
 import logging
 import subprocess
-from abc import ABC, abstractmethod
-from typing import Any, Dict
+import threading
+import time
+from abc import ABC
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
+from .capture import MEMORY_LIMIT, OutputCapture
+from .logger import ROOT_LOGGER, VERBOSE
+from .process import (
+    SESSION_KWARGS,
+    aterminate_group,
+    signal_group,
+    terminate_group,
+    track,
+    untrack,
+)
+from .profiler import get_profiler, profile_span
+from .ratelimit import limiter_from_options, tool_rate
 from .tools import ToolManager
 
+T = TypeVar("T")
+
+# Longest stdout line accepted from a tool run through asyncio
+STREAM_LIMIT = 1024 * 1024
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion from synchronous code.
+
+    When the calling thread already runs an event loop, the coroutine is
+    run on a fresh loop in a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    outcome: Dict[str, Any] = {}
+
+    def _target():
+        try:
+            outcome["value"] = asyncio.run(coro)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=_target)
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["value"]
+
+
+def module_deadline(options: dict) -> Optional[float]:
+    """Return the time (as ``time.time()``) by which a module must finish.
+
+    That is the earlier of the scan-wide ``deadline`` option and
+    ``max_time`` seconds from now, or None when neither is set.
+    """
+    deadlines = []
+    if options.get("deadline"):
+        deadlines.append(float(options["deadline"]))
+    if options.get("max_time"):
+        deadlines.append(time.time() + float(options["max_time"]))
+    return min(deadlines) if deadlines else None
+
 
 class Scanner(ABC):
     """Base scanner class that all scanning modules will inherit from."""
 
+    # Keep the full stdout of tools in run_tool results. Modules that parse
+    # output as it streams through parse_output_line can turn this off.
+    retain_output = True
+
+    # External tools the module runs; their versions key the result cache
+    tools: Tuple[str, ...] = ()
+
+    # Pipeline metadata. "provides" names what a discovery module reports
+    # (e.g. "ports"); "requires" lists alternative conditions such as
+    # "tcp/22" or "service:ssh", at least one of which must hold for the
+    # module to run in pipeline mode.
+    provides: Tuple[str, ...] = ()
+    requires: Tuple[str, ...] = ()
+
+    # Whether scan_batch can cover many targets more cheaply than one run
+    # per target. Jobs are only batched when their options match, ignoring
+    # those listed in batch_ignored_options.
+    batchable = False
+    batch_ignored_options: Tuple[str, ...] = ()
+    # Whether the module's tool run can be merged with other modules' runs
+    # against the same target (see enchante.core.nmap.run_shared_nmap)
+    mergeable = False
+
     def __init__(self, target, options=None):
         self.target = target
         self.options = options or {}
         self.results = {}
         self.verbosity = self.options.get("verbosity", 0)
-        self.logger = logging.getLogger(self.__class__.__name__)
+        self.logger = logging.getLogger(
+            f"{ROOT_LOGGER}.modules.{self.__class__.__name__}"
+        )
         self.tool_manager = ToolManager(self.logger)
+        # Requests per second: native engines draw from rate_limiter, and
+        # external tools are given tool_rate through their own flags
+        self.rate_limiter = limiter_from_options(self.options)
+        self.tool_rate = tool_rate(self.options)
+        # Tools still running at the deadline are stopped, and the module
+        # reports what it found so far with status "timeout"
+        self.deadline = module_deadline(self.options)
+        self.timed_out = False
+        # Tool output beyond output_limit characters is spooled to files in
+        # artifact_dir instead of being held in memory (0: always spool)
+        self.artifact_dir = self.options.get("artifact_dir")
+        self.output_limit = int(self.options.get("output_limit", MEMORY_LIMIT))
+        if self.output_limit < 0:
+            raise ValueError(f"output_limit must be 0 or more, not {self.output_limit}")
+
+    def time_left(self) -> Optional[float]:
+        """Return the seconds left before the module's deadline, or None."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
 
-    @abstractmethod
     def scan(self):
-        """Execute the scan. Must be implemented by subclasses."""
-        pass
+        """Execute the scan.
+
+        Subclasses implement either this method or :meth:`ascan`; the
+        default runs :meth:`ascan` to completion.
+        """
+        if type(self).ascan is Scanner.ascan:
+            raise NotImplementedError(
+                f"{self.__class__.__name__} must implement scan() or ascan()"
+            )
+        return run_sync(self.ascan())
+
+    async def ascan(self):
+        """Execute the scan from an event loop.
+
+        The default runs the synchronous :meth:`scan` in the loop's executor,
+        so existing modules can be driven by the async scheduler unchanged.
+        """
+        if type(self).scan is Scanner.scan:
+            raise NotImplementedError(
+                f"{self.__class__.__name__} must implement scan() or ascan()"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.scan)
+
+    @classmethod
+    def scan_batch(cls, target_options: Dict[str, dict]) -> Dict[str, dict]:
+        """Scan several targets, each with its own options.
+
+        Returns results by target. The default scans them one by one;
+        batchable modules override this to share a single tool run.
+        """
+        results = {}
+        for target, options in target_options.items():
+            scanner = cls(target, options)
+            scanner.scan()
+            results[target] = scanner.get_results()
+        return results
 
     def get_results(self):
-        """Return the scan results."""
+        """Return the scan results.
+
+        A module that ran out of time reports ``status: timeout`` along with
+        whatever it found before its tools were stopped.
+        """
+        if self.timed_out and self.results.get("status") in ("completed", "failed"):
+            results = dict(self.results)
+            results["status"] = "timeout"
+            return results
         return self.results
 
+    def tool_failed(self, result: Dict[str, Any]) -> bool:
+        """Return whether a tool run failed outright.
+
+        A run stopped at the deadline is not a failure: its partial output
+        is still worth reporting.
+        """
+        return not result["success"] and not result.get("timed_out")
+
+    def retains_output(self, tool_name: str) -> bool:
+        """Return whether run_tool should keep the full stdout of a tool."""
+        return self.retain_output
+
+    def tool_output(self, result: Dict[str, Any], stream: str = "stdout"):
+        """Return a tool's output as it should appear in the results.
+
+        That is the text itself, or for output that was spooled to disk a
+        reference to the artifact (path, size, sha256, lines, excerpt).
+        """
+        return result.get(f"{stream}_artifact") or result[stream]
+
+    def _capture(self) -> OutputCapture:
+        return OutputCapture(self.artifact_dir, self.output_limit)
+
+    def parse_output_line(self, tool_name: str, line: str):
+        """Handle one line of tool output as soon as it is produced.
+
+        Called by :meth:`run_tool` and :meth:`arun_tool` for every stdout
+        line. Modules override this to parse results incrementally instead
+        of re-splitting the whole output afterwards.
+        """
+
+    def feed_output(self, tool_name: str, output: str):
+        """Pass already-captured output through :meth:`parse_output_line`."""
+        with profile_span("parse", "parse", tool=tool_name, **self._profile_job()):
+            for line in output.splitlines():
+                self.parse_output_line(tool_name, line)
+
+    def _profile_job(self) -> Dict[str, str]:
+        """Return the module and target that profiling spans are filed under."""
+        module = self.__class__.__module__.rsplit(".", 1)[-1]
+        return {"module": f"{module}.{self.__class__.__name__}", "target": self.target}
+
+    def _unavailable_result(self, tool_name: str, command: str) -> Dict[str, Any]:
+        self.logger.error(
+            f"Tool {tool_name} is not available and could not be installed."
+        )
+        return {
+            "success": False,
+            "stdout": "",
+            "stderr": f"Tool {tool_name} is not available",
+            "command": command,
+        }
+
+    def _timeout_result(self, tool_name: str, command: str) -> Dict[str, Any]:
+        self.timed_out = True
+        self.logger.warning(f"Not running {tool_name}: the deadline has passed")
+        return {
+            "success": False,
+            "stdout": "",
+            "stderr": f"Deadline passed before {tool_name} could run",
+            "command": command,
+            "timed_out": True,
+        }
+
+    def _iter_process(
+        self, command: str, status: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        """Start ``command`` and yield its stdout lines as they arrive.
+
+        Stderr is drained on a helper thread so a chatty tool cannot block.
+        The tool runs in its own process group, which is terminated when
+        the module's deadline passes and killed if the consumer stops
+        early. Once the process has exited, ``status`` receives its
+        ``returncode``, ``stderr`` and ``timed_out``.
+        """
+        timeout = self.time_left()
+        process = subprocess.Popen(
+            command.split(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            bufsize=1,
+            **SESSION_KWARGS,
+        )
+        track(process)
+        stderr = self._capture()
+
+        def _drain():
+            for line in process.stderr:
+                stderr.write(line)
+
+        drain = threading.Thread(target=_drain, daemon=True)
+        drain.start()
+
+        expired = threading.Event()
+        watchdog = None
+        if timeout is not None:
+
+            def _expire():
+                expired.set()
+                terminate_group(process)
+
+            watchdog = threading.Timer(timeout, _expire)
+            watchdog.daemon = True
+            watchdog.start()
+
+        finished = False
+        try:
+            for line in process.stdout:
+                yield line.rstrip("\n")
+            finished = True
+        finally:
+            # The consumer may stop early; do not leave the tool running
+            if not finished and process.poll() is None:
+                signal_group(process)
+            # A tool that closed stdout is still held to the deadline
+            process.wait()
+            if watchdog is not None:
+                # Let a watchdog that already fired finish off the group
+                watchdog.cancel()
+                watchdog.join()
+            untrack(process)
+            drain.join()
+            process.stdout.close()
+            process.stderr.close()
+            self._set_status(status, process.returncode, stderr, expired.is_set())
+
+    def _set_status(
+        self,
+        status: Optional[Dict[str, Any]],
+        returncode: int,
+        stderr: OutputCapture,
+        timed_out: bool,
+    ):
+        text = stderr.close()
+        if status is None:
+            stderr.discard()
+            return
+        status["returncode"] = returncode
+        status["stderr"] = text
+        status["timed_out"] = timed_out
+        if stderr.artifact:
+            status["stderr_artifact"] = stderr.artifact
+
+    def iter_tool(
+        self, tool_name: str, command: str, status: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        """Run an external tool and yield its stdout line by line.
+
+        Nothing is kept in memory. Pass a ``status`` dictionary to receive
+        the return code and stderr once the tool has exited.
+        """
+        if not self.tool_manager.ensure_tool_available(tool_name):
+            raise RuntimeError(f"Tool {tool_name} is not available")
+
+        self.logger.info(f"Running command: {command}")
+        return self._iter_process(command, status)
+
     def run_tool(self, tool_name: str, command: str) -> Dict[str, Any]:
-        """Run an external tool and capture its output."""
+        """Run an external tool and capture its output.
+
+        Every stdout line is passed to :meth:`parse_output_line` as it
+        arrives. The full output is only kept in ``stdout`` when
+        :meth:`retains_output` allows it; the result carries ``parsed: True``
+        so callers know the hook has already seen every line.
+        """
         if not self.tool_manager.ensure_tool_available(tool_name):
-            self.logger.error(
-                f"Tool {tool_name} is not available and could not be installed."
-            )
+            return self._unavailable_result(tool_name, command)
+        if self.time_left() == 0:
+            return self._timeout_result(tool_name, command)
+
+        output = self._capture() if self.retains_output(tool_name) else None
+        try:
+            self.logger.info(f"Running command: {command}")
+            status: Dict[str, Any] = {}
+            run = self._profile_tool(tool_name, command)
+            for line in self._iter_process(command, status):
+                if run is None:
+                    self.parse_output_line(tool_name, line)
+                else:
+                    run.parse(self.parse_output_line, tool_name, line)
+                if output is not None:
+                    output.write(line + "\n")
+
+            result = self._tool_result(command, output, status)
+            if run is not None:
+                run.finish(result)
+            return result
+        except Exception as e:
+            self.logger.error(f"Error running {tool_name}: {str(e)}")
+            if output is not None:
+                output.discard()
             return {
                 "success": False,
                 "stdout": "",
-                "stderr": f"Tool {tool_name} is not available",
+                "stderr": str(e),
                 "command": command,
             }
 
+    def _profile_tool(self, tool_name: str, command: str):
+        """Start measuring a tool run when profiling is on (see --profile)."""
+        profiler = get_profiler()
+        if profiler is None:
+            return None
+        return profiler.tool_run(tool_name, command=command, **self._profile_job())
+
+    def _tool_result(
+        self,
+        command: str,
+        output: Optional[OutputCapture],
+        status: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        stdout = output.close() if output is not None else ""
+        stderr = status["stderr"]
+        timed_out = status.get("timed_out", False)
+
+        # Show detailed output for -vv and above
+        if self.verbosity >= 2 and self.logger.isEnabledFor(VERBOSE):
+            if output is not None and output.artifact:
+                path = output.artifact["path"]
+                self.logger.verbose(f"Command output (end, full in {path}):\n{stdout}")
+            elif output is not None:
+                self.logger.verbose(f"Command output:\n{stdout}")
+            if stderr:
+                self.logger.verbose(f"Command errors:\n{stderr}")
+
+        result = {
+            "success": status["returncode"] == 0 and not timed_out,
+            "stdout": stdout,
+            "stderr": stderr,
+            "command": command,
+            "parsed": True,
+        }
+        if output is not None and output.artifact:
+            result["stdout_artifact"] = output.artifact
+        if status.get("stderr_artifact"):
+            result["stderr_artifact"] = status["stderr_artifact"]
+        if timed_out:
+            self.timed_out = True
+            self.logger.warning(f"Stopped {command.split()[0]} at the deadline")
+            result["timed_out"] = True
+        return result
+
+    async def _aiter_process(
+        self, command: str, status: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Async version of :meth:`_iter_process`."""
+        loop = asyncio.get_running_loop()
+        timeout = self.time_left()
+        expires = None if timeout is None else loop.time() + timeout
+        process = await asyncio.create_subprocess_exec(
+            *command.split(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+            **SESSION_KWARGS,
+        )
+        track(process)
+        stderr = self._capture()
+
+        async def _drain():
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while True:
+                chunk = await process.stderr.read(64 * 1024)
+                stderr.write(decoder.decode(chunk, final=not chunk))
+                if not chunk:
+                    break
+
+        stderr_task = asyncio.ensure_future(_drain())
+
+        finished = timed_out = False
         try:
-            self.logger.info(f"Running command: {command}")
-            process = subprocess.run(
-                command.split(),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
+            while True:
+                remaining = None if expires is None else max(0, expires - loop.time())
+                try:
+                    line = await asyncio.wait_for(process.stdout.readline(), remaining)
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    break
+                if not line:
+                    break
+                yield line.decode(errors="replace").rstrip("\n")
+            finished = True
+        finally:
+            if finished and expires is not None and process.returncode is None:
+                # A tool that closed stdout is still held to the deadline
+                try:
+                    await asyncio.wait_for(
+                        process.wait(), max(0, expires - loop.time())
+                    )
+                except asyncio.TimeoutError:
+                    timed_out = True
+            if timed_out:
+                await aterminate_group(process)
+            elif not finished and process.returncode is None:
+                signal_group(process)
+            await stderr_task
+            await process.wait()
+            untrack(process)
+            self._set_status(status, process.returncode, stderr, timed_out)
 
-            if self.verbosity >= 2:  # Show detailed output for -vv and above
-                self.logger.verbose(f"Command output:\n{process.stdout}")
-                if process.stderr:
-                    self.logger.verbose(f"Command errors:\n{process.stderr}")
+    async def aiter_tool(
+        self, tool_name: str, command: str, status: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Async version of :meth:`iter_tool`."""
+        loop = asyncio.get_running_loop()
+        available = await loop.run_in_executor(
+            None, self.tool_manager.ensure_tool_available, tool_name
+        )
+        if not available:
+            raise RuntimeError(f"Tool {tool_name} is not available")
 
-            return {
-                "success": process.returncode == 0,
-                "stdout": process.stdout,
-                "stderr": process.stderr,
-                "command": command,
-            }
+        self.logger.info(f"Running command: {command}")
+        async for line in self._aiter_process(command, status):
+            yield line
+
+    async def arun_tool(self, tool_name: str, command: str) -> Dict[str, Any]:
+        """Run an external tool without blocking the event loop.
+
+        Returns the same result dictionary as :meth:`run_tool`.
+        """
+        loop = asyncio.get_running_loop()
+        available = await loop.run_in_executor(
+            None, self.tool_manager.ensure_tool_available, tool_name
+        )
+        if not available:
+            return self._unavailable_result(tool_name, command)
+        if self.time_left() == 0:
+            return self._timeout_result(tool_name, command)
+
+        output = self._capture() if self.retains_output(tool_name) else None
+        try:
+            self.logger.info(f"Running command: {command}")
+            status: Dict[str, Any] = {}
+            run = self._profile_tool(tool_name, command)
+            async for line in self._aiter_process(command, status):
+                if run is None:
+                    self.parse_output_line(tool_name, line)
+                else:
+                    run.parse(self.parse_output_line, tool_name, line)
+                if output is not None:
+                    output.write(line + "\n")
+
+            result = self._tool_result(command, output, status)
+            if run is not None:
+                run.finish(result)
+            return result
         except Exception as e:
             self.logger.error(f"Error running {tool_name}: {str(e)}")
+            if output is not None:
+                output.discard()
             return {
                 "success": False,
                 "stdout": "",
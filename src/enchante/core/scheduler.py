@@ -0,0 +1,483 @@
+import json
+import logging
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from .output import compact_result
+from .process import kill_running_tools
+from .result_cache import normalize_options
+
+
+class Job(NamedTuple):
+    """A single module run against a single target."""
+
+    target: str
+    module: str
+    # Extra options for this job only, applied over the shared options
+    options: Optional[dict] = None
+
+
+def load_targets(
+    targets: Optional[Iterable[str]] = None, targets_file: Optional[str] = None
+) -> List[str]:
+    """Collect targets from arguments and/or a file, dropping duplicates.
+
+    A target or file name of ``-`` reads targets from stdin, one per line.
+    Blank lines and lines starting with ``#`` are ignored.
+    """
+    collected: List[str] = []
+    lines: List[str] = []
+
+    for target in targets or []:
+        if target == "-":
+            lines.extend(sys.stdin.read().splitlines())
+        else:
+            lines.append(target)
+
+    if targets_file == "-":
+        lines.extend(sys.stdin.read().splitlines())
+    elif targets_file:
+        with open(targets_file) as f:
+            lines.extend(f.read().splitlines())
+
+    seen = set()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or line in seen:
+            continue
+        seen.add(line)
+        collected.append(line)
+
+    return collected
+
+
+class Scheduler:
+    """Runs (target x module) jobs with global and per-target concurrency caps.
+
+    With ``batch_size`` above 1, jobs of a batchable module that share the
+    same options are grouped into batches of up to that many targets, each
+    run as a single unit through the module's ``scan_batch``. With
+    ``merge`` set, jobs of mergeable modules against the same target form
+    one unit that shares a single tool run. Merging is planned first;
+    batching applies to the jobs left on their own.
+
+    A ``rate_limiter`` is shared by every job: native engines draw their
+    requests from it directly, and external tools are given an equal share
+    of its limits (see :meth:`tool_rate_share`) to turn into their own flags.
+
+    With a ``journal`` every finished job is recorded as it completes, and
+    jobs the journal already holds a completed result for are not run again.
+    With ``compact`` set, results are handed to ``on_result`` in full but
+    kept without their raw tool output, so a scan whose results are
+    streamed to disk does not hold every tool's output in memory.
+    """
+
+    def __init__(
+        self,
+        module_manager,
+        jobs: int = 1,
+        per_target: Optional[int] = None,
+        batch_size: int = 0,
+        merge: bool = False,
+        rate_limiter=None,
+        journal=None,
+        compact: bool = False,
+        logger=None,
+    ):
+        self.module_manager = module_manager
+        self.jobs = max(1, jobs)
+        self.per_target = per_target
+        self.batch_size = batch_size
+        self.merge = merge
+        self.rate_limiter = rate_limiter
+        self.journal = journal
+        self.compact = compact
+        self.logger = logger or logging.getLogger(__name__)
+
+    def build_jobs(self, targets: List[str], module_names: List[str]) -> List[Job]:
+        """Return the job list, one entry per target and module."""
+        return [Job(target, module) for target in targets for module in module_names]
+
+    def run(
+        self,
+        targets: List[str],
+        module_names: List[str],
+        options: Optional[dict] = None,
+        on_result: Optional[Callable[[Job, dict], None]] = None,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Run every module against every target and return results by target.
+
+        ``on_result`` is called from the scheduling thread as each job
+        finishes, in completion order.
+        """
+        jobs = self.build_jobs(targets, module_names)
+        results = self.run_jobs(jobs, options, on_result)
+        return {target: results.get(target, {}) for target in targets}
+
+    def run_jobs(
+        self,
+        jobs: List[Job],
+        options: Optional[dict] = None,
+        on_result: Optional[Callable[[Job, dict], None]] = None,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Run an explicit list of jobs and return results by target.
+
+        Results keep the order of ``jobs`` regardless of completion order.
+        """
+        options = self._rate_options(jobs, options or {})
+        # Results are indexed by job position: per-job options make jobs
+        # unhashable
+        results: Dict[int, dict] = {}
+
+        def _finish(unit_results: Dict[int, dict], record: bool = True):
+            for index, result in unit_results.items():
+                results[index] = compact_result(result) if self.compact else result
+                if record:
+                    self._record(jobs[index], options, result)
+                if on_result:
+                    on_result(jobs[index], result)
+
+        resumed = self._resumed(jobs, options)
+        _finish(resumed, record=False)
+        pending = deque(self._plan_pending(jobs, options, resumed))
+
+        if self.jobs == 1:
+            for unit in pending:
+                _finish(self._run_unit(jobs, unit, options))
+            return self._by_target(jobs, results)
+
+        running = {}
+        active: Counter = Counter()
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            try:
+                while pending or running:
+                    deferred = deque()
+                    while pending and len(running) < self.jobs:
+                        unit = pending.popleft()
+                        targets = {jobs[index].target for index in unit}
+                        if self.per_target and any(
+                            active[target] >= self.per_target for target in targets
+                        ):
+                            deferred.append(unit)
+                            continue
+                        active.update(targets)
+                        future = executor.submit(self._run_unit, jobs, unit, options)
+                        running[future] = targets
+                    deferred.extend(pending)
+                    pending = deferred
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        active.subtract(running.pop(future))
+                        _finish(future.result())
+            except BaseException:
+                # Interrupted (e.g. by Ctrl-C): tools run in process groups
+                # of their own and do not see the signal, so stop them here
+                # or the executor would wait for them to finish
+                for future in running:
+                    future.cancel()
+                kill_running_tools()
+                raise
+
+        return self._by_target(jobs, results)
+
+    async def arun(
+        self,
+        targets: List[str],
+        module_names: List[str],
+        options: Optional[dict] = None,
+        on_result: Optional[Callable[[Job, dict], None]] = None,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Run every job as a task on the current event loop.
+
+        Same caps and result layout as :meth:`run`, but a job waiting on a
+        tool holds no thread, so ``jobs`` can be set far higher.
+        """
+        jobs = self.build_jobs(targets, module_names)
+        results = await self.arun_jobs(jobs, options, on_result)
+        return {target: results.get(target, {}) for target in targets}
+
+    async def arun_jobs(
+        self,
+        jobs: List[Job],
+        options: Optional[dict] = None,
+        on_result: Optional[Callable[[Job, dict], None]] = None,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Async counterpart of :meth:`run_jobs`."""
+        import asyncio
+
+        options = self._rate_options(jobs, options or {})
+        results: Dict[int, dict] = {}
+        global_slots = asyncio.Semaphore(self.jobs)
+        target_slots = {
+            job.target: asyncio.Semaphore(self.per_target or self.jobs) for job in jobs
+        }
+
+        def _finish(unit_results: Dict[int, dict], record: bool = True):
+            for index, result in unit_results.items():
+                results[index] = compact_result(result) if self.compact else result
+                if record:
+                    self._record(jobs[index], options, result)
+                if on_result:
+                    on_result(jobs[index], result)
+
+        async def _run(unit: List[int]):
+            # Take the target slots first so a capped target does not hold
+            # one of the global slots while it waits. Batches take several,
+            # always in sorted order so two units never wait on each other.
+            targets = sorted({jobs[index].target for index in unit})
+            for target in targets:
+                await target_slots[target].acquire()
+            try:
+                async with global_slots:
+                    unit_results = await self._arun_unit(jobs, unit, options)
+            finally:
+                for target in targets:
+                    target_slots[target].release()
+            _finish(unit_results)
+
+        resumed = self._resumed(jobs, options)
+        _finish(resumed, record=False)
+        units = self._plan_pending(jobs, options, resumed)
+        try:
+            await asyncio.gather(*(_run(unit) for unit in units))
+        except BaseException:
+            # Cancelled or interrupted: tools running in the executor would
+            # otherwise keep its threads (and the loop's shutdown) waiting
+            kill_running_tools()
+            raise
+        return self._by_target(jobs, results)
+
+    def tool_rate_share(self, jobs: List[Job]) -> Optional[float]:
+        """Return the rate each external tool run may use.
+
+        The global limit is split between the jobs that can run at once,
+        and the per-target limit between the jobs that can run at once
+        against one target, so the tools together stay within both.
+        """
+        limiter = self.rate_limiter
+        if limiter is None:
+            return None
+
+        shares = []
+        if limiter.rate:
+            shares.append(limiter.rate / max(1, min(self.jobs, len(jobs))))
+        if limiter.per_target:
+            per_target = Counter(job.target for job in jobs)
+            busiest = max(per_target.values(), default=1)
+            slots = min(self.per_target or self.jobs, self.jobs, busiest)
+            shares.append(limiter.per_target / max(1, slots))
+        return min(shares) if shares else None
+
+    def _rate_options(self, jobs: List[Job], options: dict) -> dict:
+        if self.rate_limiter is None:
+            return options
+        options = dict(options)
+        options["_rate_limiter"] = self.rate_limiter
+        share = self.tool_rate_share(jobs)
+        if share:
+            options["_tool_rate"] = share
+        return options
+
+    def plan_units(self, jobs: List[Job], options: dict) -> List[List[int]]:
+        """Group job positions into units that run as one.
+
+        Without batching or merging every job is its own unit. Merged units
+        hold the mergeable jobs of one target; batched units hold jobs of
+        one batchable module with matching options, up to ``batch_size``
+        targets each.
+        """
+        classes = {}
+        for job in jobs:
+            if job.module not in classes:
+                try:
+                    classes[job.module] = self.module_manager.get_module(job.module)
+                except (AttributeError, ValueError):
+                    classes[job.module] = None
+
+        units: List[List[int]] = []
+        merged: Dict[str, List[int]] = {}
+        open_batches: Dict[tuple, List[int]] = {}
+        for index, job in enumerate(jobs):
+            module_class = classes[job.module]
+            if self.merge and getattr(module_class, "mergeable", False):
+                unit = merged.get(job.target)
+                if unit is None:
+                    unit = merged[job.target] = []
+                    units.append(unit)
+                unit.append(index)
+                continue
+            units.append([index])
+
+        if self.batch_size <= 1:
+            return units
+
+        batched: List[List[int]] = []
+        for unit in units:
+            job = jobs[unit[0]]
+            module_class = classes[job.module]
+            if len(unit) > 1 or not getattr(module_class, "batchable", False):
+                batched.append(unit)
+                continue
+
+            ignored = set(getattr(module_class, "batch_ignored_options", ()))
+            job_options = self._job_options(job, options)
+            key = (
+                job.module,
+                json.dumps(
+                    normalize_options(
+                        {k: v for k, v in job_options.items() if k not in ignored}
+                    ),
+                    sort_keys=True,
+                ),
+            )
+            batch = open_batches.get(key)
+            if batch is None or len(batch) >= self.batch_size:
+                batch = open_batches[key] = []
+                batched.append(batch)
+            batch.append(unit[0])
+        return batched
+
+    def _resumed(self, jobs: List[Job], options: dict) -> Dict[int, dict]:
+        """Return the journalled results of jobs that need not run again."""
+        if self.journal is None:
+            return {}
+        resumed = {}
+        for index, job in enumerate(jobs):
+            result = self.journal.get(
+                job.target, job.module, self._job_options(job, options)
+            )
+            if result is not None:
+                resumed[index] = result
+        if resumed:
+            self.logger.info(f"Resuming: {len(resumed)} of {len(jobs)} jobs done")
+        return resumed
+
+    def _plan_pending(
+        self, jobs: List[Job], options: dict, done: Dict[int, dict]
+    ) -> List[List[int]]:
+        """Plan the units of the jobs not in ``done``."""
+        units = self.plan_units(jobs, options)
+        if not done:
+            return units
+        units = [[index for index in unit if index not in done] for unit in units]
+        return [unit for unit in units if unit]
+
+    def _record(self, job: Job, options: dict, result: dict):
+        if self.journal is None:
+            return
+        try:
+            self.journal.record(
+                job.target, job.module, self._job_options(job, options), result
+            )
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Could not write to the journal: {str(e)}")
+
+    @staticmethod
+    def _by_target(
+        jobs: List[Job], results: Dict[int, dict]
+    ) -> Dict[str, Dict[str, dict]]:
+        by_target: Dict[str, Dict[str, dict]] = {}
+        for index, job in enumerate(jobs):
+            if index in results:
+                by_target.setdefault(job.target, {})[job.module] = results[index]
+        return by_target
+
+    @staticmethod
+    def _job_options(job: Job, options: dict) -> dict:
+        job_options = dict(options)
+        job_options.update(job.options or {})
+        return job_options
+
+    def _unit_call(self, jobs: List[Job], unit: List[int], options: dict):
+        """Return how to run a unit of several jobs.
+
+        Gives the ModuleManager method name, its arguments and the function
+        mapping a job to its key in the method's results.
+        """
+        first = jobs[unit[0]]
+        if len({jobs[index].module for index in unit}) > 1:
+            module_options = {
+                jobs[index].module: self._job_options(jobs[index], options)
+                for index in unit
+            }
+            return "run_merged", (first.target, module_options), lambda j: j.module
+
+        target_options = {
+            jobs[index].target: self._job_options(jobs[index], options)
+            for index in unit
+        }
+        return "run_batch", (first.module, target_options), lambda j: j.target
+
+    def _unit_results(self, jobs, unit, results: dict, key) -> Dict[int, dict]:
+        failed = {"status": "error", "error": "Shared run failed"}
+        return {index: results.get(key(jobs[index]), dict(failed)) for index in unit}
+
+    @staticmethod
+    def _expired(unit: List[int], options: dict) -> Optional[Dict[int, dict]]:
+        """Return timeout results for a unit that starts after the deadline."""
+        deadline = options.get("deadline")
+        if not deadline or time.time() < deadline:
+            return None
+        result = {"status": "timeout", "error": "Scan deadline passed before start"}
+        return {index: dict(result) for index in unit}
+
+    def _run_unit(self, jobs: List[Job], unit: List[int], options: dict):
+        """Run a unit and return its results by job position."""
+        expired = self._expired(unit, options)
+        if expired is not None:
+            return expired
+        if len(unit) == 1:
+            return {unit[0]: self._run_job(jobs[unit[0]], options)}
+
+        method, args, key = self._unit_call(jobs, unit, options)
+        try:
+            results = getattr(self.module_manager, method)(*args)
+        except Exception as e:
+            self.logger.error(f"Error in {method} of {args[0]}: {str(e)}")
+            results = {}
+        return self._unit_results(jobs, unit, results, key)
+
+    async def _arun_unit(self, jobs: List[Job], unit: List[int], options: dict):
+        """Async version of :meth:`_run_unit`."""
+        expired = self._expired(unit, options)
+        if expired is not None:
+            return expired
+        if len(unit) == 1:
+            return {unit[0]: await self._arun_job(jobs[unit[0]], options)}
+
+        method, args, key = self._unit_call(jobs, unit, options)
+        try:
+            results = await getattr(self.module_manager, f"a{method}")(*args)
+        except Exception as e:
+            self.logger.error(f"Error in {method} of {args[0]}: {str(e)}")
+            results = {}
+        return self._unit_results(jobs, unit, results, key)
+
+    async def _arun_job(self, job: Job, options: dict) -> dict:
+        """Async version of :meth:`_run_job`."""
+        try:
+            return await self.module_manager.arun_module(
+                job.module, job.target, self._job_options(job, options)
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Error running module {job.module} on {job.target}: {str(e)}"
+            )
+            return {"status": "error", "error": str(e)}
+
+    def _run_job(self, job: Job, options: dict) -> dict:
+        """Run a single job, turning any exception into an error result."""
+        try:
+            return self.module_manager.run_module(
+                job.module, job.target, self._job_options(job, options)
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Error running module {job.module} on {job.target}: {str(e)}"
+            )
+            return {"status": "error", "error": str(e)}
@@ -0,0 +1,402 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    description TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans(id),
+    target TEXT NOT NULL,
+    module TEXT NOT NULL,
+    status TEXT,
+    error TEXT,
+    finished REAL NOT NULL,
+    result TEXT
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans(id),
+    target TEXT NOT NULL,
+    address TEXT NOT NULL,
+    UNIQUE (scan_id, target, address)
+);
+CREATE TABLE IF NOT EXISTS ports (
+    id INTEGER PRIMARY KEY,
+    host_id INTEGER NOT NULL REFERENCES hosts(id),
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    port INTEGER NOT NULL,
+    protocol TEXT NOT NULL,
+    state TEXT
+);
+CREATE TABLE IF NOT EXISTS services (
+    port_id INTEGER PRIMARY KEY REFERENCES ports(id),
+    name TEXT,
+    product TEXT,
+    version TEXT,
+    extrainfo TEXT
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    host_id INTEGER NOT NULL REFERENCES hosts(id),
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    kind TEXT NOT NULL,
+    port INTEGER,
+    name TEXT,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_target ON jobs (target, module);
+CREATE INDEX IF NOT EXISTS hosts_address ON hosts (address);
+CREATE INDEX IF NOT EXISTS ports_port ON ports (port, protocol, state);
+CREATE INDEX IF NOT EXISTS ports_host ON ports (host_id);
+CREATE INDEX IF NOT EXISTS services_name ON services (name);
+CREATE INDEX IF NOT EXISTS findings_kind ON findings (kind, name);
+CREATE INDEX IF NOT EXISTS findings_host ON findings (host_id);
+"""
+
+# Columns exposed by the port query, as (column, SQL expression)
+PORT_COLUMNS = [
+    ("scan", "h.scan_id"),
+    ("target", "h.target"),
+    ("address", "h.address"),
+    ("port", "p.port"),
+    ("protocol", "p.protocol"),
+    ("state", "p.state"),
+    ("service", "s.name"),
+    ("product", "s.product"),
+    ("version", "s.version"),
+]
+
+FINDING_COLUMNS = [
+    ("scan", "h.scan_id"),
+    ("target", "h.target"),
+    ("address", "h.address"),
+    ("module", "j.module"),
+    ("kind", "f.kind"),
+    ("port", "f.port"),
+    ("name", "f.name"),
+    ("detail", "f.detail"),
+]
+
+GROUP_COLUMNS = {
+    "address": "h.address",
+    "target": "h.target",
+    "port": "p.port",
+    "service": "s.name",
+    "product": "s.product",
+}
+
+
+def _service_name(service: Optional[str]) -> Optional[str]:
+    # nmap reports TLS-wrapped services as e.g. "ssl/http"
+    return service.lower().split("/")[-1] if service else service
+
+
+def _port_number(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_records(target: str, result: dict) -> Iterator[Tuple[str, str, dict]]:
+    """Split a module result into (address, kind, record) rows.
+
+    ``kind`` is ``port`` for port records and a finding kind otherwise:
+    ``script`` for nmap script output, ``path`` for discovered web
+    content, ``credential``, ``share`` and ``finding`` for free text.
+    """
+    for port in result.get("open_ports") or []:
+        yield port.get("host") or target, "port", port
+
+    # Findings of a module that scanned with nmap belong to the address found
+    address = target
+    host = result.get("nmap_scan")
+    if isinstance(host, dict):
+        address = host.get("address") or target
+        for port in host.get("ports") or []:
+            yield address, "port", port
+            for script_id, script in (port.get("scripts") or {}).items():
+                yield (
+                    address,
+                    "script",
+                    {
+                        "port": port.get("port"),
+                        "name": script_id,
+                        "detail": script.get("output"),
+                    },
+                )
+        for script_id, script in (host.get("scripts") or {}).items():
+            yield address, "script", {"name": script_id, "detail": script.get("output")}
+
+    for finding in result.get("findings") or []:
+        if isinstance(finding, dict) and "path" in finding:
+            yield address, "path", {"name": finding["path"], "detail": finding}
+        else:
+            yield address, "finding", {"name": None, "detail": finding}
+    for credential in result.get("credentials") or []:
+        yield (
+            address,
+            "credential",
+            {
+                "name": credential.get("login"),
+                "detail": credential,
+            },
+        )
+    for share in result.get("shares") or []:
+        yield address, "share", {"name": share.get("share"), "detail": share}
+
+
+class ResultStore:
+    """SQLite database of scan results, normalised for querying.
+
+    Each finished job is stored with its full result, and its hosts,
+    ports, services and findings go into indexed tables, so a question
+    such as "which hosts have 445 open" is answered without reading any
+    result back. Jobs are buffered and written ``batch_size`` at a time in
+    one transaction; :meth:`flush` or :meth:`close` writes the rest.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        readonly: bool = False,
+        batch_size: int = 50,
+        logger=None,
+    ):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.logger = logger or logging.getLogger(__name__)
+        self.scan_id: Optional[int] = None
+        self._pending: List[Tuple[str, str, float, dict]] = []
+        self._lock = threading.Lock()
+
+        if readonly:
+            self.db = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self._migrate()
+
+    def _migrate(self):
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{self.path} was written by a newer version of Enchante")
+        with self.db:
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def begin_scan(self, description: Optional[str] = None) -> int:
+        """Start a new scan that subsequent jobs are stored under."""
+        with self._lock:
+            return self._begin_scan(description)
+
+    def _begin_scan(self, description: Optional[str] = None) -> int:
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO scans (started, description) VALUES (?, ?)",
+                (time.time(), description),
+            )
+        self.scan_id = cursor.lastrowid
+        return self.scan_id
+
+    def add(self, target: str, module: str, result: dict):
+        """Queue the result of a finished job, writing a batch when full."""
+        with self._lock:
+            self._pending.append((target, module, time.time(), result))
+            if len(self._pending) < self.batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        """Write every queued job in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if not pending:
+                return
+            if self.scan_id is None:
+                self._begin_scan()
+            with self.db:
+                for target, module, finished, result in pending:
+                    self._insert_job(target, module, finished, result)
+        self.logger.debug(f"Stored {len(pending)} results in {self.path}")
+
+    def _insert_job(self, target: str, module: str, finished: float, result: dict):
+        job_id = self.db.execute(
+            "INSERT INTO jobs (scan_id, target, module, status, error, finished,"
+            " result) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.scan_id,
+                target,
+                module,
+                result.get("status"),
+                result.get("error"),
+                finished,
+                json.dumps(result, default=str),
+            ),
+        ).lastrowid
+
+        hosts = {}
+        for address, kind, record in extract_records(target, result):
+            host_id = hosts.get(address)
+            if host_id is None:
+                host_id = hosts[address] = self._host_id(target, address)
+
+            if kind == "port":
+                port = _port_number(record.get("port"))
+                if port is None:
+                    continue
+                port_id = self.db.execute(
+                    "INSERT INTO ports (host_id, job_id, port, protocol, state)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (
+                        host_id,
+                        job_id,
+                        port,
+                        record.get("protocol") or "tcp",
+                        record.get("state"),
+                    ),
+                ).lastrowid
+                self.db.execute(
+                    "INSERT INTO services (port_id, name, product, version,"
+                    " extrainfo) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        port_id,
+                        _service_name(record.get("service")),
+                        record.get("product"),
+                        record.get("version"),
+                        record.get("extrainfo"),
+                    ),
+                )
+                continue
+
+            detail = record.get("detail")
+            if not isinstance(detail, str):
+                detail = json.dumps(detail, default=str)
+            self.db.execute(
+                "INSERT INTO findings (host_id, job_id, kind, port, name, detail)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    host_id,
+                    job_id,
+                    kind,
+                    _port_number(record.get("port")),
+                    record.get("name"),
+                    detail,
+                ),
+            )
+
+    def _host_id(self, target: str, address: str) -> int:
+        self.db.execute(
+            "INSERT OR IGNORE INTO hosts (scan_id, target, address) VALUES (?, ?, ?)",
+            (self.scan_id, target, address),
+        )
+        return self.db.execute(
+            "SELECT id FROM hosts WHERE scan_id = ? AND target = ? AND address = ?",
+            (self.scan_id, target, address),
+        ).fetchone()[0]
+
+    def close(self):
+        """Write queued jobs, mark the scan finished and close the database."""
+        self.flush()
+        if self.scan_id is not None:
+            with self.db:
+                self.db.execute(
+                    "UPDATE scans SET finished = ? WHERE id = ?",
+                    (time.time(), self.scan_id),
+                )
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _filters(filters: dict, columns: dict) -> Tuple[str, list]:
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                marks = ", ".join("?" * len(value))
+                clauses.append(f"{columns[name]} IN ({marks})")
+                params.extend(value)
+            elif isinstance(value, str) and any(c in value for c in "*?"):
+                clauses.append(f"{columns[name]} GLOB ?")
+                params.append(value)
+            else:
+                clauses.append(f"{columns[name]} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def ports(self, group_by: Optional[str] = None, **filters) -> List[dict]:
+        """Return port rows matching ``filters``, or counts per ``group_by``.
+
+        Filters are column names of :data:`PORT_COLUMNS` and match exactly,
+        by list membership, or as a glob when the value holds ``*`` or ``?``.
+        ``scan="latest"`` limits the rows to the most recent scan.
+        """
+        columns = dict(PORT_COLUMNS)
+        filters = self._latest(filters)
+        where, params = self._filters(filters, columns)
+        source = (
+            " FROM ports p JOIN hosts h ON h.id = p.host_id"
+            " LEFT JOIN services s ON s.port_id = p.id"
+        )
+        if group_by:
+            if group_by not in GROUP_COLUMNS:
+                raise ValueError(f"Cannot group by {group_by}")
+            column = GROUP_COLUMNS[group_by]
+            sql = (
+                f"SELECT {column}, COUNT(DISTINCT h.address){source}{where}"
+                f" GROUP BY {column} ORDER BY 2 DESC, 1"
+            )
+            rows = self.db.execute(sql, params).fetchall()
+            return [{group_by: value, "hosts": count} for value, count in rows]
+
+        select = ", ".join(expr for _, expr in PORT_COLUMNS)
+        sql = f"SELECT DISTINCT {select}{source}{where} ORDER BY h.address, p.port"
+        names = [name for name, _ in PORT_COLUMNS]
+        return [dict(zip(names, row)) for row in self.db.execute(sql, params)]
+
+    def findings(self, **filters) -> List[dict]:
+        """Return findings matching ``filters`` (see :meth:`ports`)."""
+        columns = dict(FINDING_COLUMNS)
+        filters = self._latest(filters)
+        where, params = self._filters(filters, columns)
+        select = ", ".join(expr for _, expr in FINDING_COLUMNS)
+        sql = (
+            f"SELECT {select} FROM findings f JOIN hosts h ON h.id = f.host_id"
+            f" JOIN jobs j ON j.id = f.job_id{where} ORDER BY h.address, f.id"
+        )
+        names = [name for name, _ in FINDING_COLUMNS]
+        return [dict(zip(names, row)) for row in self.db.execute(sql, params)]
+
+    def execute(self, sql: str, params=()) -> Tuple[List[str], List[tuple]]:
+        """Run raw SQL and return (column names, rows)."""
+        cursor = self.db.execute(sql, params)
+        names = [d[0] for d in cursor.description or ()]
+        return names, cursor.fetchall()
+
+    def _latest(self, filters: dict) -> dict:
+        if filters.get("scan") != "latest":
+            return filters
+        filters = dict(filters)
+        filters["scan"] = self.db.execute("SELECT MAX(id) FROM scans").fetchone()[0]
+        return filters
@@ -1,8 +1,17 @@
+import hashlib
 import logging
 import os
+import shutil
 import subprocess
 import sys
-from typing import Dict, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache import get_cache_dir, read_json, write_json_atomic
+
+# Seconds a tool's check_command may take before it is treated as broken
+CHECK_TIMEOUT = 15
 
 
 class ToolManager:
@@ -43,9 +52,130 @@ class ToolManager:
         },
     }
 
-    def __init__(self, logger=None):
+    # Tool status is shared by every ToolManager in the process, so that
+    # scanners created per (target, module) job do not probe tools again.
+    # Probe results are also kept on disk, keyed by PATH and the binary's
+    # mtime/inode, so later processes skip the probe entirely.
+    _installed_tools: Dict[str, bool] = {}
+    _tool_versions: Dict[str, Optional[str]] = {}
+    _failed_installs: set = set()
+    _tool_locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+    _disk_cache: Optional[dict] = None
+    _disk_guard = threading.Lock()
+
+    def __init__(self, logger=None, use_disk_cache: bool = True):
         self.logger = logger or logging.getLogger(__name__)
-        self.installed_tools = {}
+        self.installed_tools = self._installed_tools
+        self.use_disk_cache = use_disk_cache and not os.environ.get(
+            "ENCHANTE_NO_TOOL_CACHE"
+        )
+
+    @classmethod
+    def _lock_for(cls, tool_name: str) -> threading.Lock:
+        with cls._locks_guard:
+            return cls._tool_locks.setdefault(tool_name, threading.Lock())
+
+    @classmethod
+    def clear_cache(cls):
+        """Forget every cached tool status held in memory."""
+        cls._installed_tools.clear()
+        cls._tool_versions.clear()
+        cls._failed_installs.clear()
+        with cls._disk_guard:
+            cls._disk_cache = None
+
+    @staticmethod
+    def _cache_path() -> str:
+        return os.path.join(get_cache_dir(), "tools.json")
+
+    @staticmethod
+    def _path_key() -> str:
+        return hashlib.sha1(os.environ.get("PATH", "").encode()).hexdigest()
+
+    @staticmethod
+    def _fingerprint(binary_path: str) -> List[int]:
+        st = os.stat(binary_path)
+        return [st.st_mtime_ns, st.st_ino, st.st_size]
+
+    def _cached_probe(self, tool_name: str, fingerprint: List[int]) -> Optional[dict]:
+        """Return the on-disk probe result if the binary has not changed."""
+        cls = type(self)
+        with cls._disk_guard:
+            if cls._disk_cache is None:
+                cls._disk_cache = read_json(self._cache_path(), {}) or {}
+            entry = cls._disk_cache.get(self._path_key(), {}).get(tool_name)
+
+        if entry and entry.get("fingerprint") == fingerprint:
+            return entry
+        return None
+
+    def _store_probe(self, tool_name: str, entry: dict):
+        """Merge a probe result into the shared on-disk cache."""
+        cls = type(self)
+        path = self._cache_path()
+        with cls._disk_guard:
+            # Re-read so entries written by other processes are kept
+            data = read_json(path, {}) or {}
+            data.setdefault(self._path_key(), {})[tool_name] = entry
+            try:
+                write_json_atomic(path, data)
+            except OSError as e:
+                self.logger.debug(f"Could not write tool cache {path}: {str(e)}")
+            cls._disk_cache = data
+
+    def _probe(self, tool_name: str, tool_info: dict) -> Tuple[bool, Optional[str]]:
+        """Check a tool without consulting the in-memory cache."""
+        command = tool_info["check_command"].split()
+        binary_path = shutil.which(command[0])
+        if binary_path is None:
+            # Not on PATH: nothing to spawn and nothing worth caching
+            return False, None
+
+        try:
+            fingerprint = self._fingerprint(binary_path)
+        except OSError:
+            return False, None
+
+        if self.use_disk_cache:
+            entry = self._cached_probe(tool_name, fingerprint)
+            if entry is not None:
+                self.logger.debug(f"Using cached status for {tool_name}")
+                return entry["installed"], entry.get("version")
+
+        try:
+            process = subprocess.run(
+                [binary_path] + command[1:],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors="replace",
+                timeout=CHECK_TIMEOUT,
+                check=True,
+            )
+            installed = True
+            version = next(
+                (
+                    line.strip()
+                    for line in (process.stdout + process.stderr).splitlines()
+                    if line.strip()
+                ),
+                None,
+            )
+        except (subprocess.SubprocessError, OSError):
+            installed, version = False, None
+
+        if self.use_disk_cache:
+            self._store_probe(
+                tool_name,
+                {
+                    "path": binary_path,
+                    "fingerprint": fingerprint,
+                    "installed": installed,
+                    "version": version,
+                },
+            )
+        return installed, version
 
     def is_tool_installed(self, tool_name: str) -> bool:
         """Check if a tool is installed and available in PATH."""
@@ -57,18 +187,33 @@ class ToolManager:
             self.logger.warning(f"Unknown tool: {tool_name}")
             return False
 
-        try:
-            subprocess.run(
-                tool_info["check_command"].split(),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-            )
-            self.installed_tools[tool_name] = True
-            return True
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.installed_tools[tool_name] = False
-            return False
+        with self._lock_for(tool_name):
+            # Another thread may have finished probing while we waited
+            if tool_name in self.installed_tools:
+                return self.installed_tools[tool_name]
+
+            installed, version = self._probe(tool_name, tool_info)
+            self._tool_versions[tool_name] = version
+            self.installed_tools[tool_name] = installed
+            return installed
+
+    def get_tool_version(self, tool_name: str) -> Optional[str]:
+        """Return the first line printed by the tool's check command."""
+        if not self.is_tool_installed(tool_name):
+            return None
+        return self._tool_versions.get(tool_name)
+
+    def check_tools(
+        self, tool_names: Optional[Iterable[str]] = None, max_workers: int = 8
+    ) -> Dict[str, bool]:
+        """Check several tools in parallel and return their status by name."""
+        tool_names = list(self.COMMON_TOOLS if tool_names is None else tool_names)
+        if not tool_names:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tool_names))) as pool:
+            statuses = pool.map(self.is_tool_installed, tool_names)
+            return dict(zip(tool_names, statuses))
 
     def install_tool(self, tool_name: str) -> bool:
         """Attempt to install a tool if it's not already installed."""
@@ -81,6 +226,9 @@ class ToolManager:
             self.logger.error(f"Unknown tool: {tool_name}")
             return False
 
+        if tool_name in self._failed_installs:
+            return False
+
         try:
             self.logger.info(f"Installing {tool_name}...")
             subprocess.run(
@@ -96,14 +244,17 @@ class ToolManager:
                 check=True,
             )
 
+            self.installed_tools.pop(tool_name, None)
             if self.is_tool_installed(tool_name):
                 self.logger.info(f"Successfully installed {tool_name}")
                 return True
             else:
                 self.logger.error(f"Failed to install {tool_name}")
+                self._failed_installs.add(tool_name)
                 return False
-        except subprocess.SubprocessError as e:
+        except (subprocess.SubprocessError, OSError) as e:
             self.logger.error(f"Error installing {tool_name}: {str(e)}")
+            self._failed_installs.add(tool_name)
             return False
 
     def ensure_tool_available(self, tool_name: str) -> bool:
@@ -115,8 +266,5 @@ class ToolManager:
 
     def get_available_tools(self) -> List[str]:
         """Return a list of available tools."""
-        available_tools = []
-        for tool_name in self.COMMON_TOOLS:
-            if self.is_tool_installed(tool_name):
-                available_tools.append(tool_name)
-        return available_tools
+        statuses = self.check_tools()
+        return [tool_name for tool_name in self.COMMON_TOOLS if statuses[tool_name]]
@@ -1,52 +1,134 @@
-from ...core.scanner import Scanner
+import logging
 
+from ...core.connect_scan import ConnectScanner, expand_hosts, parse_ports
+from ...core.nmap import NmapScanner
+from ...core.scanner import run_sync
 
-class PortScanner(Scanner):
-    """Scan for open ports on a target using nmap."""
+ENGINES = ("nmap", "native")
+
+
+class PortScanner(NmapScanner):
+    """Scan for open ports on a target using nmap or a native connect scan.
+
+    The ``engine`` option selects nmap (the default) or ``native``, a
+    pure-Python TCP connect scan that needs no external tools and accepts
+    ``concurrency``, ``timeout`` and ``retries``. Its connection rate is
+    capped by the shared rate limiter (``rate``/``rate_per_target``).
+    """
+
+    tools = ("nmap",)
+    provides = ("ports",)
 
     def __init__(self, target, options=None):
         super().__init__(target, options)
         self.ports = self.options.get("ports", "1-1000")
         self.scan_type = self.options.get(
-            "scan_type", "SV"
+            "scan_type", "sV"
         )  # Default to service version detection
+        self.engine = self.options.get("engine", "nmap")
+        self.open_ports = []
 
-    def scan(self):
-        """Scan ports using nmap."""
-        self.logger.info(f"Scanning ports {self.ports} on {self.target}")
+    def nmap_ports(self):
+        return self.ports
 
-        # Build nmap command based on verbosity
-        nmap_command = f"nmap -p{self.ports} -T4 -{self.scan_type}"
+    def nmap_flags(self):
+        flags = ["-T4", f"-{self.scan_type}"]
 
         # Add verbosity flags based on our verbosity level
-        if self.verbosity >= 2:
-            nmap_command += " -v"
         if self.verbosity >= 3:
-            nmap_command += "v"
+            flags.append("-vv")
+        elif self.verbosity >= 2:
+            flags.append("-v")
+        return flags
 
-        nmap_command += f" {self.target}"
+    def on_nmap_host(self, host):
+        """Record the open ports of a host as soon as nmap reports it."""
+        names = {h["name"] for h in host.get("hostnames", [])}
+        other_host = host["address"] != self.target and self.target not in names
 
-        result = self.run_tool("nmap", nmap_command)
+        for port in host["ports"]:
+            if not port["state"].startswith("open"):
+                continue
+            open_port = dict(port)
+            open_port.pop("scripts", None)
+            if other_host:
+                open_port["host"] = host["address"]
+            self.open_ports.append(open_port)
+            if self.logger.isEnabledFor(logging.INFO):
+                label = f"{port['port']}/{port['protocol']}"
+                self.logger.info(f"Open port found: {label} ({port['service']})")
 
-        if not result["success"]:
-            self.logger.error(f"Nmap scan failed: {result['stderr']}")
-            self.results = {"status": "failed", "error": result["stderr"]}
+    def scan(self):
+        """Scan ports using nmap."""
+        if self.engine not in ENGINES:
+            error = f"Unknown engine {self.engine}, expected one of {ENGINES}"
+            self.results = {"status": "failed", "error": error}
             return self.results
+        if self.engine == "native":
+            return run_sync(self.ascan())
+
+        self.logger.info(f"Scanning ports {self.ports} on {self.target}")
+
+        self.open_ports = []
+        return self.nmap_completed(self.run_nmap())
 
-        # Parse nmap output for open ports
-        open_ports = []
-        for line in result["stdout"].splitlines():
-            if "/tcp" in line and "open" in line:
-                parts = line.strip().split()
-                if len(parts) >= 2:
-                    port = parts[0].split("/")[0]
-                    service = parts[2] if len(parts) > 2 else "unknown"
-                    open_ports.append({"port": port, "service": service})
+    def uses_nmap(self):
+        return self.engine == "nmap"
+
+    def nmap_completed(self, result):
+        """Report the open ports found by nmap."""
+        if self.tool_failed(result):
+            error = result.get("error") or result["stderr"]
+            self.logger.error(f"Nmap scan failed: {error}")
+            self.results = {"status": "failed", "error": error}
+            return self.results
 
         self.results = {
             "status": "completed",
-            "open_ports": open_ports,
-            "raw_output": result["stdout"] if self.verbosity >= 2 else None,
+            "open_ports": self.open_ports,
+            "raw_output": self.tool_output(result) if self.verbosity >= 2 else None,
         }
 
         return self.results
+
+    async def ascan(self):
+        """Scan ports with the native engine, or nmap in an executor."""
+        if self.engine != "native":
+            return await super().ascan()
+
+        self.logger.info(f"Connect-scanning ports {self.ports} on {self.target}")
+        try:
+            hosts = expand_hosts(self.target)
+            ports = parse_ports(self.ports)
+        except ValueError as e:
+            self.results = {"status": "failed", "error": str(e)}
+            return self.results
+
+        engine = ConnectScanner(
+            concurrency=self.options.get("concurrency", 500),
+            timeout=self.options.get("timeout", 1.0),
+            retries=self.options.get("retries", 1),
+            limiter=self.rate_limiter,
+            deadline=self.deadline,
+            logger=self.logger,
+        )
+        found = await engine.scan(hosts, ports)
+        self.timed_out = engine.timed_out
+        if not found:
+            error = f"Could not resolve {self.target}"
+            self.results = {"status": "failed", "error": error}
+            return self.results
+
+        self.open_ports = []
+        for host, open_ports in found.items():
+            for port in open_ports:
+                if host != self.target:
+                    port["host"] = host
+                self.open_ports.append(port)
+
+        self.results = {
+            "status": "completed",
+            "open_ports": self.open_ports,
+            "raw_output": None,
+        }
+        return self.results
@@ -1,31 +1,80 @@
-from ...core.scanner import Scanner
+import math
+import re
 
+from ...core.nmap import NmapScanner
 
-class SSHScanner(Scanner):
+# hydra: "[22][ssh] host: 10.0.0.1   login: root   password: toor"
+HYDRA_CREDENTIAL = re.compile(
+    r"host:\s*(?P<host>\S+)\s+login:\s*(?P<login>\S+)\s+password:\s*(?P<password>.*)$"
+)
+
+
+class SSHScanner(NmapScanner):
     """Scan SSH services for vulnerabilities and attempt basic enumeration."""
 
+    tools = ("nmap", "hydra")
+    requires = ("tcp/22", "service:ssh")
+    # hydra runs against each target after nmap, so a shared nmap run
+    # would queue every target's hydra run behind one job slot
+    batchable = False
+    mergeable = False
+
     def __init__(self, target, options=None):
         super().__init__(target, options)
         self.port = self.options.get("port", 22)
         self.usernames = self.options.get("usernames", ["root", "admin", "user"])
         self.passwords = self.options.get("passwords", ["password", "admin", "123456"])
+        self.credentials = []
+
+    def nmap_ports(self):
+        return str(self.port)
+
+    def nmap_scripts(self):
+        return ["ssh-auth-methods", "ssh-hostkey", "ssh-brute"]
+
+    def nmap_flags(self):
+        return ["-T4"]
+
+    def hydra_flags(self):
+        """Return hydra's parallelism flags, throttled under a rate limit."""
+        if not self.tool_rate:
+            return "-t 4"
+        if self.tool_rate < 1:
+            # One attempt every few seconds across all tasks
+            return f"-t 1 -c {math.ceil(1 / self.tool_rate)}"
+        return f"-t {min(4, int(self.tool_rate))}"
+
+    def parse_output_line(self, tool_name, line):
+        """Parse nmap output and record credentials reported by hydra."""
+        if tool_name != "hydra":
+            super().parse_output_line(tool_name, line)
+            return
+        match = HYDRA_CREDENTIAL.search(line)
+        if match:
+            login = match.group("login")
+            self.credentials.append(
+                {"login": login, "password": match.group("password")}
+            )
+            self.logger.warning(f"Valid SSH credentials found for {login}")
 
     def scan(self):
         """Scan SSH service for vulnerabilities and attempt login."""
         self.logger.info(f"Scanning SSH service on {self.target}:{self.port}")
 
         # First use nmap for SSH scanning
-        nmap_command = f"nmap -p{self.port} --script ssh-auth-methods,ssh-hostkey,ssh-brute -T4 {self.target}"
-
-        result = self.run_tool("nmap", nmap_command)
+        return self.nmap_completed(self.run_nmap())
 
-        if not result["success"]:
-            self.logger.error(f"SSH scan failed: {result['stderr']}")
-            self.results = {"status": "failed", "error": result["stderr"]}
+    def nmap_completed(self, result):
+        """Report the nmap findings and enumerate further with hydra."""
+        if self.tool_failed(result):
+            error = result.get("error") or result["stderr"]
+            self.logger.error(f"SSH scan failed: {error}")
+            self.results = {"status": "failed", "error": error}
             return self.results
 
         # Try hydra for brute force if we have enough verbosity level
         hydra_results = None
+        self.credentials = []
         if self.verbosity >= 2:
             # Create temporary username and password files
             import os
@@ -42,8 +91,10 @@ class SSHScanner(Scanner):
                 pass_file_path = pass_file.name
 
             try:
-                hydra_command = f"hydra -L {user_file_path} -P {pass_file_path} -t 4 ssh://{self.target}:{self.port}"
+                hydra_command = f"hydra -L {user_file_path} -P {pass_file_path} {self.hydra_flags()} ssh://{self.target}:{self.port}"
                 hydra_results = self.run_tool("hydra", hydra_command)
+                if not hydra_results.get("parsed"):
+                    self.feed_output("hydra", hydra_results["stdout"])
             finally:
                 # Clean up temp files
                 os.unlink(user_file_path)
@@ -51,12 +102,14 @@ class SSHScanner(Scanner):
 
         self.results = {
             "status": "completed",
-            "nmap_scan": result["stdout"],
+            "nmap_scan": self.host_for(),
+            "raw_output": self.tool_output(result) if self.verbosity >= 2 else None,
             "hydra_scan": (
-                hydra_results["stdout"]
-                if hydra_results and hydra_results["success"]
+                self.tool_output(hydra_results)
+                if hydra_results and not self.tool_failed(hydra_results)
                 else None
             ),
+            "credentials": self.credentials,
         }
 
         return self.results
@@ -1,21 +1,89 @@
+import logging
+import os
+import re
+import tempfile
+
+from ...core.http_discovery import HttpDiscovery
 from ...core.scanner import Scanner
+from ...core.wordlist import Wordlist
+
+# gobuster: "/admin (Status: 301) [Size: 312] [--> http://host/admin/]"
+GOBUSTER_LINE = re.compile(
+    r"^(?P<path>\S+)\s+\(Status:\s*(?P<status>\d+)\)"
+    r"(?:\s+\[Size:\s*(?P<size>\d+)\])?"
+    r"(?:\s+\[-->\s*(?P<redirect>[^\]]+)\])?"
+)
+# ffuf: "admin [Status: 301, Size: 312, Words: 20, Lines: 10, Duration: 3ms]"
+FFUF_LINE = re.compile(
+    r"^(?P<path>\S+)\s+\[Status:\s*(?P<status>\d+),\s*Size:\s*(?P<size>\d+)"
+)
 
 
 class DirectoryScanner(Scanner):
-    """Scan for directories and files on a web server using gobuster or ffuf."""
+    """Scan for directories and files on a web server using gobuster or ffuf.
+
+    With ``tool`` set to ``native``, or when neither tool is installed, the
+    built-in threaded HTTP engine is used instead.
+    """
+
+    tools = ("gobuster", "ffuf")
+    requires = ("service:http", "service:https", "tcp/80", "tcp/443")
 
     def __init__(self, target, options=None):
         super().__init__(target, options)
+        # One path, or several as a list or comma-separated string
         self.wordlist = self.options.get(
             "wordlist", "/usr/share/wordlists/dirb/common.txt"
         )
         self.extensions = self.options.get("extensions", "php,html,txt")
+        self.wordlists = Wordlist(self.wordlist, self.extensions)
         self.threads = self.options.get("threads", 10)
-        self.tool = self.options.get("tool", "gobuster")  # gobuster or ffuf
+        # gobuster, ffuf or native
+        self.tool = self.options.get("tool", "gobuster")
+
+        self.port = self.options.get("port")
 
         # Ensure target URL has the correct format
         if not self.target.startswith(("http://", "https://")):
-            self.target = f"http://{self.target}"
+            scheme = "https" if self._uses_tls() else "http"
+            if self.port and int(self.port) not in (80, 443):
+                self.target = f"{scheme}://{self.target}:{self.port}"
+            else:
+                self.target = f"{scheme}://{self.target}"
+
+        self.findings = []
+
+    def _uses_tls(self):
+        """Guess whether the configured port serves HTTPS."""
+        if not self.port:
+            return False
+        for open_port in self.options.get("open_ports", []):
+            if str(open_port.get("port")) == str(self.port):
+                service = str(open_port.get("service", ""))
+                return "ssl" in service or "https" in service
+        return int(self.port) in (443, 8443)
+
+    def parse_output_line(self, tool_name, line):
+        """Record a discovered path from a line of gobuster or ffuf output."""
+        pattern = GOBUSTER_LINE if tool_name == "gobuster" else FFUF_LINE
+        match = pattern.match(line.strip())
+        if not match:
+            return
+
+        path = match.group("path")
+        if not path.startswith("/"):
+            path = f"/{path}"
+        finding = {
+            "path": path,
+            "status": int(match.group("status")),
+            "size": int(match.group("size")) if match.group("size") else None,
+        }
+        redirect = match.groupdict().get("redirect")
+        if redirect:
+            finding["redirect"] = redirect.strip()
+        self.findings.append(finding)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Found {path} (status {finding['status']})")
 
     def scan(self):
         """Scan for directories using the selected tool."""
@@ -34,26 +102,100 @@ class DirectoryScanner(Scanner):
                 self.logger.warning("Ffuf not found, falling back to gobuster")
                 self.tool = "gobuster"
 
+        if self.tool != "native" and not self.tool_manager.is_tool_installed(self.tool):
+            self.logger.warning(f"{self.tool} not found, using the native engine")
+            self.tool = "native"
+
+        missing = [path for path in self.wordlists.paths if not os.path.isfile(path)]
+        if missing and self.tool == "native":
+            error = f"Wordlist {', '.join(missing)} not found"
+            self.logger.error(error)
+            self.results = {"status": "failed", "error": error}
+            return self.results
+
+        if self.tool == "native":
+            return self.native_scan()
+
+        # External tools take a single list; merge several into one
+        merged = None
+        wordlist = self.wordlists.paths[0] if self.wordlists.paths else ""
+        if len(self.wordlists.paths) > 1 and not missing:
+            fd, merged = tempfile.mkstemp(prefix="enchante-", suffix=".txt")
+            os.close(fd)
+            self.wordlists.export(merged)
+            wordlist = merged
+
+        threads = self.threads
+        if self.tool_rate:
+            # Never run more threads than requests allowed per second
+            threads = max(1, min(int(threads), int(self.tool_rate)))
+
         if self.tool == "gobuster":
-            command = f"gobuster dir -u {self.target} -w {self.wordlist} -x {self.extensions} -t {self.threads}"
+            command = f"gobuster dir -u {self.target} -w {wordlist} -x {self.extensions} -t {threads}"
+            if self.tool_rate:
+                # gobuster only knows a delay between requests of each thread
+                command += f" --delay {int(threads * 1000 / self.tool_rate)}ms"
             if self.verbosity >= 2:
                 command += " -v"
         else:  # ffuf
-            command = f"ffuf -u {self.target}/FUZZ -w {self.wordlist}:FUZZ -e .{self.extensions.replace(',', ',.') if self.extensions else ''} -t {self.threads}"
+            command = f"ffuf -u {self.target}/FUZZ -w {wordlist}:FUZZ -e .{self.extensions.replace(',', ',.') if self.extensions else ''} -t {threads}"
+            if self.tool_rate:
+                command += f" -rate {max(1, int(self.tool_rate))}"
             if self.verbosity >= 2:
                 command += " -v"
 
-        result = self.run_tool(self.tool, command)
+        self.findings = []
+        try:
+            result = self.run_tool(self.tool, command)
+        finally:
+            if merged:
+                os.unlink(merged)
 
-        if not result["success"]:
+        if self.tool_failed(result):
             self.logger.error(f"{self.tool} scan failed: {result['stderr']}")
             self.results = {"status": "failed", "error": result["stderr"]}
             return self.results
 
+        if not result.get("parsed"):
+            self.feed_output(self.tool, result["stdout"])
+
         self.results = {
             "status": "completed",
-            "raw_output": result["stdout"],
+            "findings": self.findings,
+            "raw_output": self.tool_output(result),
             "command": result["command"],
         }
 
         return self.results
+
+    def native_scan(self):
+        """Discover content with the built-in HTTP engine."""
+        try:
+            engine = HttpDiscovery(
+                self.target,
+                threads=self.threads,
+                timeout=self.options.get("http_timeout", 10),
+                status_codes=self.options.get("status_codes"),
+                limiter=self.rate_limiter,
+                deadline=self.deadline,
+                logger=self.logger,
+            )
+        except ValueError as e:
+            self.results = {"status": "failed", "error": str(e)}
+            return self.results
+
+        def _log_hit(hit):
+            self.logger.info(f"Found {hit['path']} (status {hit['status']})")
+
+        on_hit = _log_hit if self.logger.isEnabledFor(logging.INFO) else None
+        self.findings = engine.run(self.wordlists, on_hit=on_hit)
+        self.timed_out = engine.timed_out
+        self.results = {
+            "status": "completed",
+            "findings": self.findings,
+            "raw_output": None,
+            "command": None,
+            "requests": engine.requests,
+            "errors": engine.errors,
+        }
+        return self.results
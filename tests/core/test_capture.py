@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import sys
+
+import pytest
+
+from enchante.core.capture import OutputCapture
+from enchante.core.scanner import Scanner
+from enchante.core.tools import ToolManager
+
+
+class ChattyScanner(Scanner):
+    """Runs a script writing numbered lines to stdout and stderr."""
+
+    def scan(self):
+        result = self.run_tool("nmap", self.options["command"])
+        self.results = {"status": "completed", "raw_output": self.tool_output(result)}
+        return self.results
+
+    async def ascan(self):
+        result = await self.arun_tool("nmap", self.options["command"])
+        self.results = {"status": "completed", "raw_output": self.tool_output(result)}
+        return self.results
+
+
+def test_small_output_stays_in_memory(tmp_path):
+    capture = OutputCapture(str(tmp_path), limit=100)
+    capture.write("line 1\n")
+    capture.write("line 2\n")
+    assert capture.close() == "line 1\nline 2\n"
+    assert capture.artifact is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_large_output_is_spooled_by_content(tmp_path):
+    text = "".join(f"line {i}\n" for i in range(1000))
+    artifacts = []
+    for _ in range(2):
+        capture = OutputCapture(str(tmp_path), limit=1000, ring_size=100)
+        for line in text.splitlines(keepends=True):
+            capture.write(line)
+            assert capture.buffered < 1000 + 20
+        tail = capture.close()
+        assert text.endswith(tail) and 100 <= len(tail) < 120
+        artifacts.append(capture.artifact)
+
+    artifact = artifacts[0]
+    assert artifacts[1] == artifact
+    assert artifact["sha256"] == hashlib.sha256(text.encode()).hexdigest()
+    assert artifact["size"] == len(text) and artifact["lines"] == 1000
+    assert artifact["excerpt"].startswith("line 0\nline 1\n")
+    with open(artifact["path"]) as f:
+        assert f.read() == text
+    # Identical outputs share one file and leave no spool files behind
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == [
+        f"{artifact['sha256']}.txt"
+    ]
+
+
+@pytest.mark.parametrize("limit", [0, 1])
+def test_tiny_limits_spool_everything(tmp_path, limit):
+    capture = OutputCapture(str(tmp_path), limit=limit)
+    capture.write("line 1\n")
+    capture.write("line 2\n")
+    assert capture.close() == "line 2\n"
+    assert capture.artifact["lines"] == 2
+    with open(capture.artifact["path"]) as f:
+        assert f.read() == "line 1\nline 2\n"
+
+
+def test_negative_output_limit_is_rejected():
+    with pytest.raises(ValueError, match="output_limit"):
+        ChattyScanner("example.com", {"output_limit": -1})
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_tool_output_over_the_limit_is_referenced(tmp_path, monkeypatch, use_async):
+    monkeypatch.setattr(ToolManager, "ensure_tool_available", lambda self, name: True)
+    script = tmp_path / "chatty.py"
+    script.write_text(
+        "import sys\n"
+        "for i in range(20000):\n"
+        "    print(f'port {i} open')\n"
+        "    print(f'warning {i}', file=sys.stderr)\n"
+    )
+    options = {
+        "command": f"{sys.executable} {script}",
+        "artifact_dir": str(tmp_path / "artifacts"),
+        "output_limit": 10000,
+    }
+    scanner = ChattyScanner("example.com", options)
+    if use_async:
+        results = asyncio.run(scanner.ascan())
+    else:
+        results = scanner.scan()
+
+    reference = results["raw_output"]
+    assert reference["lines"] == 20000
+    with open(reference["path"]) as f:
+        assert f.read().splitlines()[-1] == "port 19999 open"
+
+    result = scanner.run_tool("nmap", options["command"])
+    assert result["stdout"].endswith("port 19999 open\n")
+    assert len(result["stdout"]) <= 10000
+    assert result["stderr"].endswith("warning 19999\n")
+    assert result["stderr_artifact"]["lines"] == 20000
@@ -0,0 +1,84 @@
+import asyncio
+import socket
+import time
+
+import pytest
+
+from enchante.cli import parse_module_options
+from enchante.core.connect_scan import ConnectScanner, expand_hosts, parse_ports
+from enchante.core.ratelimit import RateLimiter, TokenBucket
+from enchante.modules.network.port_scanner import PortScanner
+
+
+@pytest.fixture
+def local_ports():
+    """Return (open port, closed port) on the loopback interface."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    closed = probe.getsockname()[1]
+    probe.close()
+
+    yield listener.getsockname()[1], closed
+    listener.close()
+
+
+def test_parse_ports_and_hosts():
+    assert parse_ports("22,80-82, 80") == [22, 80, 81, 82]
+    assert parse_ports("65534-") == [65534, 65535]
+    with pytest.raises(ValueError):
+        parse_ports("0-10")
+    assert expand_hosts("10.0.0.0/30") == ["10.0.0.1", "10.0.0.2"]
+    assert expand_hosts("example.com") == ["example.com"]
+
+
+def test_connect_scan_finds_listening_socket(local_ports):
+    open_port, closed_port = local_ports
+    engine = ConnectScanner(concurrency=4, timeout=1, retries=0)
+    results = asyncio.run(engine.scan(["127.0.0.1"], [open_port, closed_port]))
+
+    assert [p["port"] for p in results["127.0.0.1"]] == [str(open_port)]
+    assert results["127.0.0.1"][0]["state"] == "open"
+
+
+def test_port_scanner_native_engine(local_ports):
+    open_port, closed_port = local_ports
+    scanner = PortScanner(
+        "127.0.0.1",
+        {"engine": "native", "ports": f"{open_port},{closed_port}", "rate": 100},
+    )
+    result = scanner.scan()
+
+    assert result["status"] == "completed"
+    assert [p["port"] for p in result["open_ports"]] == [str(open_port)]
+    assert "host" not in result["open_ports"][0]
+
+
+def test_port_scanner_rejects_unknown_engine():
+    result = PortScanner("127.0.0.1", {"engine": "masscan"}).scan()
+    assert result["status"] == "failed"
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_limiter_buckets_per_target():
+    limiter = RateLimiter(per_target=1, burst=1)
+    assert limiter.reserve("a") == 0
+    assert limiter.reserve("b") == 0
+    assert limiter.reserve("a") > 0
+
+
+def test_parse_module_options():
+    options = parse_module_options(["engine=native", "concurrency=50"])
+    assert options == {"engine": "native", "concurrency": 50}
+    with pytest.raises(ValueError):
+        parse_module_options(["engine"])
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from enchante.core.distributed import Coordinator, CoordinatorServer, Worker
+from enchante.core.scheduler import Job
+
+
+class SlowManager:
+    """Stand-in ModuleManager recording which jobs it runs."""
+
+    def __init__(self, delay=0.01):
+        self.calls = []
+        self.delay = delay
+
+    def run_module(self, module_name, target, options=None):
+        self.calls.append((target, module_name))
+        time.sleep(self.delay)
+        return {"status": "completed", "ports": options.get("ports")}
+
+
+def _serve(coordinator, token=None):
+    server = CoordinatorServer(coordinator, ("127.0.0.1", 0), token=token)
+    server.start()
+    return server
+
+
+def _post(url, payload, token=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(payload).encode()
+    with urllib.request.urlopen(urllib.request.Request(url, data, headers)) as r:
+        return json.loads(r.read())
+
+
+def test_workers_share_the_jobs():
+    targets = [f"10.0.0.{i}" for i in range(10)]
+    jobs = [Job(target, module) for target in targets for module in ("m1", "m2")]
+    finished = []
+    coordinator = Coordinator(
+        jobs, {"ports": "22"}, on_result=lambda job, result: finished.append(job)
+    )
+    server = _serve(coordinator, token="secret")
+    try:
+        managers = [SlowManager() for _ in range(3)]
+        workers = [
+            Worker(server.url, manager, jobs=2, token="secret", poll_interval=0.05)
+            for manager in managers
+        ]
+        threads = [threading.Thread(target=w.run) for w in workers]
+        for thread in threads:
+            thread.start()
+        assert coordinator.wait(timeout=30)
+        for thread in threads:
+            thread.join(10)
+
+        for token in (None, "wrong", "sécret"):
+            with pytest.raises(urllib.error.HTTPError) as e:
+                _post(f"{server.url}/lease", {"worker": "intruder"}, token=token)
+            assert e.value.code == 401
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    calls = [call for manager in managers for call in manager.calls]
+    assert sorted(calls) == sorted((job.target, job.module) for job in jobs)
+    assert sum(w.completed for w in workers) == len(jobs) == len(finished)
+    results = coordinator.results_by_target()
+    assert list(results) == targets
+    assert results["10.0.0.3"]["m2"] == {"status": "completed", "ports": "22"}
+
+
+def test_leases_are_renewed_while_jobs_run():
+    jobs = [Job("a", "m1"), Job("b", "m1")]
+    coordinator = Coordinator(jobs, lease_time=0.3)
+    server = _serve(coordinator)
+    try:
+        # Jobs take several lease times, and a second worker waits for any
+        # job whose lease runs out
+        busy = SlowManager(delay=1.0)
+        idle = SlowManager()
+        workers = [
+            Worker(server.url, busy, jobs=2, poll_interval=0.05),
+            Worker(server.url, idle, jobs=2, poll_interval=0.05),
+        ]
+        threads = [threading.Thread(target=w.run) for w in workers]
+        threads[0].start()
+        time.sleep(0.1)
+        threads[1].start()
+        assert coordinator.wait(timeout=10)
+        for thread in threads:
+            thread.join(10)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert sorted(busy.calls) == [("a", "m1"), ("b", "m1")]
+    assert idle.calls == []
+    assert [w.completed for w in workers] == [2, 0]
+
+
+def test_worker_errors_carry_a_status():
+    class FailingManager:
+        def run_module(self, module_name, target, options=None):
+            raise RuntimeError("boom")
+
+    coordinator = Coordinator([Job("a", "m1")])
+    server = _serve(coordinator)
+    try:
+        Worker(server.url, FailingManager(), poll_interval=0.05).run()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert coordinator.results_by_target() == {
+        "a": {"m1": {"status": "error", "error": "boom"}}
+    }
+
+
+def test_lost_jobs_are_leased_again_then_given_up():
+    jobs = [Job("a", "m1"), Job("b", "m1")]
+    coordinator = Coordinator(jobs, lease_time=0.2, max_attempts=2)
+    server = _serve(coordinator)
+    try:
+        # A worker that leases everything and vanishes
+        lost = _post(f"{server.url}/lease", {"worker": "crashed", "count": 2})
+        assert len(lost["jobs"]) == 2
+        time.sleep(0.3)
+
+        # A second one takes "a" over but also disappears with "b"
+        retry = _post(f"{server.url}/lease", {"worker": "flaky", "count": 2})
+        assert [job["target"] for job in retry["jobs"]] == ["a", "b"]
+        by_target = {job["target"]: job["lease"] for job in retry["jobs"]}
+        accepted = _post(
+            f"{server.url}/result",
+            {"worker": "flaky", "lease": by_target["a"], "result": {"ok": 1}},
+        )
+        assert accepted == {"accepted": True}
+        # The stale lease of the crashed worker no longer counts
+        stale = _post(
+            f"{server.url}/result",
+            {"worker": "crashed", "lease": lost["jobs"][0]["lease"], "result": {}},
+        )
+        assert stale == {"accepted": False}
+
+        assert coordinator.wait(timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    results = coordinator.results_by_target()
+    assert results["a"]["m1"] == {"ok": 1}
+    assert results["b"]["m1"] == {
+        "status": "error",
+        "error": "Job lost by workers 2 times",
+    }
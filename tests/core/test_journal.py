@@ -0,0 +1,59 @@
+import json
+
+from enchante.core.journal import Journal
+from enchante.core.scheduler import Scheduler
+
+
+class CountingManager:
+    """Stand-in ModuleManager that counts the jobs it runs."""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = fail
+
+    def run_module(self, module_name, target, options=None):
+        self.calls.append((target, module_name))
+        if (target, module_name) in self.fail:
+            raise RuntimeError("interrupted")
+        return {"status": "completed", "target": target, "module": module_name}
+
+
+def test_journal_survives_a_truncated_record(tmp_path):
+    path = tmp_path / "scan.jsonl"
+    with Journal(str(path)) as journal:
+        journal.record("a", "m1", {"ports": "22"}, {"status": "completed"})
+        journal.record("a", "m2", {}, {"status": "failed", "error": "x"})
+    with open(path, "a") as f:
+        f.write('{"target": "b", "module": "m1", "res')
+
+    with Journal(str(path), resume=True) as journal:
+        assert journal.get("a", "m1", {"ports": "22", "verbosity": 2}) == {
+            "status": "completed"
+        }
+        assert journal.get("a", "m1", {"ports": "80"}) is None
+        # Failed jobs run again
+        assert journal.get("a", "m2", {}) is None
+        journal.record("b", "m1", {}, {"status": "completed"})
+
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[-1])["target"] == "b"
+    assert len(Journal(str(path), resume=True).entries) == 3
+
+
+def test_scheduler_resumes_from_journal(tmp_path):
+    path = str(tmp_path / "scan.jsonl")
+    manager = CountingManager(fail={("b", "m2")})
+    with Journal(path) as journal:
+        first = Scheduler(manager, jobs=2, journal=journal).run(
+            ["a", "b"], ["m1", "m2"]
+        )
+    assert first["b"]["m2"] == {"status": "error", "error": "interrupted"}
+
+    manager = CountingManager()
+    with Journal(path, resume=True) as journal:
+        results = Scheduler(manager, journal=journal).run(["a", "b"], ["m1", "m2"])
+
+    assert manager.calls == [("b", "m2")]
+    assert list(results["a"]) == ["m1", "m2"]
+    assert results["a"]["m1"]["target"] == "a"
+    assert results["b"]["m2"]["status"] == "completed"
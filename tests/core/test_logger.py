@@ -0,0 +1,53 @@
+import json
+import logging
+import threading
+from logging.handlers import QueueHandler
+
+import pytest
+
+from enchante.core.logger import ROOT_LOGGER, configure_logging, get_logger
+
+
+@pytest.fixture
+def manager():
+    manager = configure_logging(0)
+    yield manager
+    configure_logging(0, json_path="")
+
+
+def test_configuring_again_adds_no_handlers(manager, capsys):
+    for verbosity in (0, 1, 2):
+        assert configure_logging(verbosity) is manager
+    handlers = logging.getLogger(ROOT_LOGGER).handlers
+    assert sum(isinstance(h, QueueHandler) for h in handlers) == 1
+
+    get_logger("enchante.test").info("only once")
+    manager.flush()
+    assert capsys.readouterr().out.count("only once") == 1
+
+
+def test_json_sink_keeps_info_records_from_worker_threads(manager, tmp_path, capsys):
+    path = tmp_path / "log.jsonl"
+    configure_logging(0, json_path=str(path))
+    logger = get_logger("PortScanner")
+    assert logger.name == "enchante.PortScanner"
+
+    def work(n):
+        for i in range(50):
+            logger.info(f"worker {n} line {i}")
+        logger.verbose("not kept")
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.warning("done")
+    manager.flush()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 201
+    assert records[-1]["level"] == "WARNING"
+    assert {r["logger"] for r in records} == {"enchante.PortScanner"}
+    # The console still only shows warnings at verbosity 0
+    assert capsys.readouterr().out.count("PortScanner") == 1
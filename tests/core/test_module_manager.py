@@ -0,0 +1,50 @@
+import time
+
+from enchante.core.module import ModuleManager
+from enchante.core.scanner import Scanner
+
+
+class SlowScanner(Scanner):
+    def scan(self):
+        time.sleep(0.2)
+        self.results = {"status": "completed", "target": self.target}
+        return self.results
+
+
+class BrokenScanner(Scanner):
+    def scan(self):
+        raise RuntimeError("boom")
+
+
+def make_manager():
+    manager = ModuleManager()
+    manager.modules = {
+        "slow.One": SlowScanner,
+        "slow.Two": SlowScanner,
+        "broken.Broken": BrokenScanner,
+    }
+    return manager
+
+
+def test_run_modules_in_parallel():
+    """Test that independent modules run concurrently with --jobs"""
+    manager = make_manager()
+    start = time.monotonic()
+    results = manager.run_modules(["slow.One", "slow.Two"], "example.com", jobs=2)
+    elapsed = time.monotonic() - start
+
+    assert list(results) == ["slow.One", "slow.Two"]
+    assert all(r["status"] == "completed" for r in results.values())
+    assert elapsed < 0.35
+
+
+def test_run_modules_keeps_errors_separate():
+    """Test that a failing module does not affect the others"""
+    manager = make_manager()
+    results = manager.run_modules(
+        ["slow.One", "broken.Broken", "slow.Two"], "example.com", jobs=3
+    )
+
+    assert results["broken.Broken"]["status"] == "error"
+    assert results["slow.One"]["status"] == "completed"
+    assert results["slow.Two"]["status"] == "completed"
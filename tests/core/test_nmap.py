@@ -0,0 +1,286 @@
+import threading
+import time
+
+from enchante.core.module import ModuleManager
+from enchante.core.nmap import (
+    NmapScanner,
+    NmapXmlParser,
+    build_nmap_command,
+    merge_port_specs,
+    parse_nmap_xml,
+    slice_host,
+)
+from enchante.core.scheduler import Job, Scheduler
+from enchante.modules.network.port_scanner import PortScanner
+from enchante.modules.services.ssh_scanner import SSHScanner
+
+NMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<nmaprun scanner="nmap" args="nmap -oX - 10.0.0.1">
+<host><status state="up"/>
+<address addr="10.0.0.1" addrtype="ipv4"/>
+<hostnames><hostname name="box.lan" type="PTR"/></hostnames>
+<ports>
+<port protocol="tcp" portid="22"><state state="open"/>
+<service name="ssh" product="OpenSSH" version="8.9p1"/>
+<script id="ssh-hostkey" output="&#xa;  256 aa:bb (ED25519)">
+<table><elem key="type">ssh-ed25519</elem><elem key="bits">256</elem></table>
+</script>
+</port>
+<port protocol="tcp" portid="443"><state state="open"/>
+<service name="http" tunnel="ssl"/></port>
+<port protocol="udp" portid="161"><state state="open|filtered"/>
+<service name="snmp"/></port>
+<port protocol="tcp" portid="25"><state state="closed"/>
+<service name="smtp"/></port>
+</ports>
+<hostscript><script id="smb-os-discovery" output="OS: Unix">
+<elem key="os">Unix</elem></script></hostscript>
+</host>
+<runstats><finished time="1" exit="success"/></runstats>
+</nmaprun>
+"""
+
+
+def test_parse_nmap_xml_ports_and_scripts():
+    hosts = parse_nmap_xml(NMAP_XML)
+
+    assert len(hosts) == 1
+    host = hosts[0]
+    assert host["address"] == "10.0.0.1"
+    assert host["hostnames"] == [{"name": "box.lan", "type": "PTR"}]
+
+    ssh, https, snmp, smtp = host["ports"]
+    assert ssh["product"] == "OpenSSH"
+    assert ssh["scripts"]["ssh-hostkey"]["output"] == "256 aa:bb (ED25519)"
+    assert ssh["scripts"]["ssh-hostkey"]["data"] == [
+        {"type": "ssh-ed25519", "bits": "256"}
+    ]
+    assert https["service"] == "ssl/http"
+    assert snmp["protocol"] == "udp" and snmp["state"] == "open|filtered"
+    assert smtp["state"] == "closed"
+    assert host["scripts"]["smb-os-discovery"]["data"] == {"os": "Unix"}
+
+
+def test_parser_accepts_chunks_and_reports_hosts_early():
+    seen = []
+    parser = NmapXmlParser(on_host=seen.append)
+    for i in range(0, len(NMAP_XML), 7):
+        parser.feed(NMAP_XML[i : i + 7])
+        if "</host>" in NMAP_XML[: i + 7]:
+            assert len(seen) == 1
+
+    assert parser.close() == seen
+    assert parser.error is None
+
+
+def test_parser_reports_truncated_output():
+    parser = NmapXmlParser()
+    parser.feed(NMAP_XML[: NMAP_XML.index("<runstats>")])
+    assert len(parser.close()) == 1
+    assert parser.error
+
+
+def test_build_nmap_command():
+    command = build_nmap_command(["a", "b"], "22", ["ssh-hostkey"], ["-T4"])
+    assert command == "nmap -p22 -T4 --script ssh-hostkey -oX - a b"
+
+
+def _xml_run_tool(self, tool_name, command):
+    return {"success": True, "stdout": NMAP_XML, "stderr": "", "command": command}
+
+
+def test_port_scanner_reads_xml(monkeypatch):
+    monkeypatch.setattr(PortScanner, "run_tool", _xml_run_tool)
+    result = PortScanner("10.0.0.1").scan()
+
+    assert result["status"] == "completed"
+    assert [p["port"] for p in result["open_ports"]] == ["22", "443", "161"]
+    assert "scripts" not in result["open_ports"][0]
+    assert result["raw_output"] is None
+
+
+def test_ssh_scanner_returns_host_record(monkeypatch):
+    monkeypatch.setattr(SSHScanner, "run_tool", _xml_run_tool)
+    scanner = SSHScanner("box.lan")
+    command = scanner.nmap_command()
+
+    assert "-p22" in command and "ssh-hostkey" in command
+    assert scanner.host_for() is None
+
+    result = scanner.scan()
+    assert result["nmap_scan"]["address"] == "10.0.0.1"
+    assert "ssh-hostkey" in result["nmap_scan"]["ports"][0]["scripts"]
+
+
+TWO_HOSTS_XML = """<?xml version="1.0"?>
+<nmaprun>
+<host><status state="up"/><address addr="10.0.0.1" addrtype="ipv4"/>
+<ports><port protocol="tcp" portid="22"><state state="open"/>
+<service name="ssh"/></port></ports></host>
+<host><status state="up"/><address addr="10.0.0.2" addrtype="ipv4"/>
+<hostnames><hostname name="web.lan" type="user"/></hostnames>
+<ports><port protocol="tcp" portid="80"><state state="open"/>
+<service name="http"/></port></ports></host>
+<runstats><finished time="1" exit="success"/></runstats>
+</nmaprun>
+"""
+
+
+def test_port_scanner_batches_targets_into_one_run(monkeypatch):
+    commands = []
+
+    def _run_tool(self, tool_name, command):
+        commands.append(command)
+        return {"success": True, "stdout": TWO_HOSTS_XML, "stderr": "", "command": ""}
+
+    monkeypatch.setattr(PortScanner, "run_tool", _run_tool)
+    results = PortScanner.scan_batch({"10.0.0.1": {}, "web.lan": {}, "10.0.0.9": {}})
+
+    assert len(commands) == 1 and " -iL " in commands[0]
+    assert [p["port"] for p in results["10.0.0.1"]["open_ports"]] == ["22"]
+    assert [p["port"] for p in results["web.lan"]["open_ports"]] == ["80"]
+    assert results["10.0.0.9"] == {
+        "status": "completed",
+        "open_ports": [],
+        "raw_output": None,
+    }
+
+
+def test_scheduler_groups_batchable_jobs():
+    manager = ModuleManager()
+    manager.discover_modules()
+    scheduler = Scheduler(manager, batch_size=2)
+    jobs = [
+        Job("a", "port_scanner.PortScanner"),
+        Job("a", "directory_scanner.DirectoryScanner"),
+        Job("b", "port_scanner.PortScanner"),
+        Job("c", "port_scanner.PortScanner"),
+        Job("d", "port_scanner.PortScanner", {"ports": "22"}),
+        Job("e", "port_scanner.PortScanner", {"open_ports": [1]}),
+    ]
+
+    assert scheduler.plan_units(jobs, {}) == [[0, 2], [1], [3, 5], [4]]
+
+
+MERGED_XML = """<?xml version="1.0"?>
+<nmaprun>
+<host><status state="up"/><address addr="10.0.0.1" addrtype="ipv4"/>
+<ports>
+<port protocol="tcp" portid="22"><state state="open"/><service name="ssh"/>
+<script id="ssh-hostkey" output="key"/></port>
+<port protocol="tcp" portid="80"><state state="open"/><service name="http"/></port>
+<port protocol="tcp" portid="445"><state state="open"/>
+<service name="microsoft-ds"/></port>
+</ports>
+<hostscript><script id="smb-os-discovery" output="OS: Windows"/></hostscript>
+</host>
+<runstats><finished time="1" exit="success"/></runstats>
+</nmaprun>
+"""
+
+
+def test_merge_port_specs_and_slice_host():
+    assert merge_port_specs(["80-90", "22", "85,445"]) == "22,80-90,445"
+    assert merge_port_specs(["T:22", "T:22"]) == "T:22"
+
+    host = parse_nmap_xml(MERGED_XML)[0]
+    sliced = slice_host(host, {22}, ["ssh-*"])
+    assert [p["port"] for p in sliced["ports"]] == ["22"]
+    assert "scripts" not in sliced
+    assert "ssh-hostkey" in sliced["ports"][0]["scripts"]
+
+
+class ProbeScanner(NmapScanner):
+    """nmap-only module reporting the host record of a few ports."""
+
+    ports = ""
+    scripts = []
+
+    def nmap_ports(self):
+        return self.ports
+
+    def nmap_scripts(self):
+        return self.scripts
+
+    def scan(self):
+        return self.nmap_completed(self.run_nmap())
+
+    def nmap_completed(self, result):
+        self.results = {"status": "completed", "nmap_scan": self.host_for()}
+        return self.results
+
+
+class SshProbe(ProbeScanner):
+    ports = "22"
+    scripts = ["ssh-hostkey"]
+
+
+class SmbProbe(ProbeScanner):
+    ports = "445"
+    scripts = ["smb-os-discovery"]
+
+
+def _manager_with_probes():
+    manager = ModuleManager()
+    manager.discover_modules()
+    manager.modules.update({"probe.SshProbe": SshProbe, "probe.SmbProbe": SmbProbe})
+    return manager
+
+
+def test_modules_on_one_target_share_an_nmap_run(monkeypatch):
+    commands = []
+
+    def _run_tool(self, tool_name, command):
+        commands.append(command)
+        stdout = MERGED_XML if tool_name == "nmap" else ""
+        return {"success": True, "stdout": stdout, "stderr": "", "command": command}
+
+    monkeypatch.setattr(NmapScanner, "run_tool", _run_tool)
+    scheduler = Scheduler(_manager_with_probes(), merge=True)
+    modules = ["port_scanner.PortScanner", "probe.SshProbe", "probe.SmbProbe"]
+    results = scheduler.run(["10.0.0.1"], modules, {"ports": "80-90"})["10.0.0.1"]
+
+    nmap_commands = [c for c in commands if c.startswith("nmap")]
+    assert len(nmap_commands) == 1
+    assert "-p22,80-90,445" in nmap_commands[0]
+    assert "-sV" in nmap_commands[0] and "smb-os-discovery" in nmap_commands[0]
+
+    assert [p["port"] for p in results["port_scanner.PortScanner"]["open_ports"]] == [
+        "80"
+    ]
+    ssh_host = results["probe.SshProbe"]["nmap_scan"]
+    assert [p["port"] for p in ssh_host["ports"]] == ["22"]
+    assert "scripts" not in ssh_host
+    smb_host = results["probe.SmbProbe"]["nmap_scan"]
+    assert [p["port"] for p in smb_host["ports"]] == ["445"]
+    assert "smb-os-discovery" in smb_host["scripts"]
+
+
+def test_follow_up_tools_of_a_batch_run_in_parallel(monkeypatch):
+    lock = threading.Lock()
+    running = {"enum4linux": 0}
+    peak = {"enum4linux": 0}
+
+    def _run_tool(self, tool_name, command):
+        if tool_name == "enum4linux":
+            with lock:
+                running[tool_name] += 1
+                peak[tool_name] = max(peak[tool_name], running[tool_name])
+            time.sleep(0.2)
+            with lock:
+                running[tool_name] -= 1
+        stdout = MERGED_XML if tool_name == "nmap" else ""
+        return {"success": True, "stdout": stdout, "stderr": "", "command": command}
+
+    monkeypatch.setattr(NmapScanner, "run_tool", _run_tool)
+    manager = ModuleManager()
+    manager.discover_modules()
+    scheduler = Scheduler(manager, jobs=4, batch_size=4, merge=True)
+    targets = [f"10.0.0.{i}" for i in range(1, 5)]
+    results = scheduler.run(targets, ["smb_scanner.SmbScanner"])
+
+    assert all(
+        results[target]["smb_scanner.SmbScanner"]["status"] == "completed"
+        for target in targets
+    )
+    assert peak["enum4linux"] == 4
@@ -0,0 +1,59 @@
+import gzip
+import json
+import zlib
+
+from enchante.core.output import JsonlWriter, compact_result, is_jsonl
+from enchante.core.scheduler import Scheduler
+
+
+class RawManager:
+    """Stand-in ModuleManager returning results with raw tool output."""
+
+    def run_module(self, module_name, target, options=None):
+        return {
+            "status": "completed",
+            "open_ports": [{"port": "22"}],
+            "raw_output": "x" * 1000,
+            "nmap_scan": {"address": target},
+            "hydra_scan": "y" * 1000,
+        }
+
+
+def test_is_jsonl():
+    assert is_jsonl("scan.jsonl") and is_jsonl("scan.jsonl.gz")
+    assert not is_jsonl("scan.json") and not is_jsonl("scan.json.gz")
+
+
+def test_gzip_records_are_readable_while_writing(tmp_path):
+    path = str(tmp_path / "scan.jsonl.gz")
+    with JsonlWriter(path) as writer:
+        writer.write("a", "m1", {"status": "completed"})
+        writer.write("b", "m1", {"status": "failed"})
+        # Every record is flushed, so what is on disk so far decompresses
+        with open(path, "rb") as f:
+            partial = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(f.read())
+        assert len(partial.splitlines()) == 2
+
+    with gzip.open(path, "rt") as f:
+        records = [json.loads(line) for line in f]
+    assert [(r["target"], r["result"]["status"]) for r in records] == [
+        ("a", "completed"),
+        ("b", "failed"),
+    ]
+
+
+def test_compact_scheduler_streams_full_results(tmp_path):
+    streamed = []
+    scheduler = Scheduler(RawManager(), jobs=2, compact=True)
+    results = scheduler.run(
+        ["a", "b"], ["m1"], on_result=lambda job, result: streamed.append(result)
+    )
+
+    assert all("raw_output" in result for result in streamed)
+    assert results["a"]["m1"] == compact_result(streamed[0])
+    # The parsed nmap host record is a finding, not raw output
+    assert results["a"]["m1"] == {
+        "status": "completed",
+        "open_ports": [{"port": "22"}],
+        "nmap_scan": {"address": "a"},
+    }
@@ -0,0 +1,113 @@
+from enchante.core.journal import Journal
+from enchante.core.module import ModuleManager
+from enchante.core.pipeline import Pipeline, requirement_matches
+from enchante.core.scheduler import Scheduler
+from enchante.core.scanner import Scanner
+
+OPEN_PORTS = {
+    "web-host": [{"port": "8080", "service": "http-proxy"}],
+    "ssh-host": [{"port": "22", "service": "ssh"}],
+}
+
+
+class FakePortScanner(Scanner):
+    provides = ("ports",)
+
+    def scan(self):
+        if self.target not in OPEN_PORTS:
+            self.results = {"status": "failed", "error": "nmap failed"}
+        else:
+            open_ports = OPEN_PORTS[self.target]
+            self.results = {"status": "completed", "open_ports": open_ports}
+        return self.results
+
+
+class FakeSSHScanner(Scanner):
+    requires = ("tcp/22", "service:ssh")
+
+    def scan(self):
+        self.results = {"status": "completed", "port": self.options.get("port")}
+        return self.results
+
+
+class FakeWebScanner(Scanner):
+    requires = ("service:http", "tcp/80")
+
+    def scan(self):
+        self.results = {"status": "completed", "port": self.options.get("port")}
+        return self.results
+
+
+def make_manager():
+    manager = ModuleManager()
+    manager.modules = {
+        "ssh.SSH": FakeSSHScanner,
+        "ports.Ports": FakePortScanner,
+        "web.Web": FakeWebScanner,
+    }
+    return manager
+
+
+def test_requirement_matching():
+    """Test port and service requirements"""
+    assert requirement_matches("tcp/22", {"port": "22", "service": "ssh"})
+    assert not requirement_matches("udp/22", {"port": "22", "service": "ssh"})
+    assert requirement_matches("service:http", {"port": "443", "service": "ssl/http"})
+    assert not requirement_matches("service:http", {"port": "1", "service": "httpx"})
+
+
+def test_pipeline_runs_dependents_only_where_they_apply():
+    """Test that dependents are skipped or given the discovered port"""
+    manager = make_manager()
+    results = manager.run_targets(
+        ["web-host", "ssh-host"],
+        ["ssh.SSH", "ports.Ports", "web.Web"],
+        jobs=4,
+        pipeline=True,
+    )
+
+    web, ssh = results["web-host"], results["ssh-host"]
+    assert list(web) == ["ssh.SSH", "ports.Ports", "web.Web"]
+    assert web["ssh.SSH"]["status"] == "skipped"
+    assert web["web.Web"] == {"status": "completed", "port": 8080}
+    assert ssh["ssh.SSH"] == {"status": "completed", "port": 22}
+    assert ssh["web.Web"]["status"] == "skipped"
+
+
+def test_pipeline_runs_everything_when_discovery_fails():
+    """Test that a failed port scan does not hide any module"""
+    manager = make_manager()
+    results = manager.run_targets(
+        ["unknown-host"], ["ports.Ports", "ssh.SSH", "web.Web"], pipeline=True
+    )
+
+    assert results["unknown-host"]["ssh.SSH"] == {"status": "completed", "port": None}
+    assert results["unknown-host"]["web.Web"]["status"] == "completed"
+
+
+def test_pipeline_resumes_from_journal(tmp_path):
+    """Test that a resumed pipeline restores results and re-derives skips"""
+    path = str(tmp_path / "scan.jsonl")
+    targets = ["web-host", "ssh-host"]
+    modules = ["ports.Ports", "ssh.SSH", "web.Web"]
+    manager = make_manager()
+    with Journal(path) as journal:
+        scheduler = Scheduler(manager, jobs=2, journal=journal)
+        first = Pipeline(manager, scheduler).run(targets, modules)
+
+    calls = []
+    manager = make_manager()
+    run_module = manager.run_module
+
+    def counting_run_module(name, target, options=None):
+        calls.append((target, name))
+        return run_module(name, target, options)
+
+    manager.run_module = counting_run_module
+    with Journal(path, resume=True) as journal:
+        scheduler = Scheduler(manager, jobs=2, journal=journal)
+        resumed = Pipeline(manager, scheduler).run(targets, modules)
+
+    assert calls == []
+    assert resumed == first
+    assert resumed["web-host"]["ssh.SSH"]["status"] == "skipped"
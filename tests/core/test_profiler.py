@@ -0,0 +1,54 @@
+import json
+import sys
+
+import pytest
+
+from enchante.core.module import ModuleManager
+from enchante.core.profiler import Profiler, set_profiler
+from enchante.core.scanner import Scanner
+from enchante.core.tools import ToolManager
+
+
+class BusyToolScanner(Scanner):
+    def scan(self):
+        result = self.run_tool("nmap", self.options["command"])
+        self.results = {"status": "completed", "lines": result["stdout"].count("\n")}
+        return self.results
+
+    def parse_output_line(self, tool_name, line):
+        int(line)
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setattr(ToolManager, "ensure_tool_available", lambda self, name: True)
+    profiler = Profiler()
+    set_profiler(profiler)
+    yield profiler
+    set_profiler(None)
+
+
+def test_profiler_breaks_down_module_runs(profiler, tmp_path):
+    manager = ModuleManager()
+    manager.modules = {"busy.BusyToolScanner": BusyToolScanner}
+    script = tmp_path / "tool.py"
+    script.write_text("for i in range(20000):\n    print(i)\n")
+    options = {"command": f"{sys.executable} {script}"}
+    results = manager.run_targets(["a", "b"], ["busy.BusyToolScanner"], options, jobs=2)
+    assert results["a"]["busy.BusyToolScanner"]["lines"] == 20000
+
+    row = profiler.summary()["busy.BusyToolScanner"]
+    assert row["jobs"] == 2 and row["tools"] == 2
+    assert row["tool_s"] > 0 and row["parse_s"] > 0
+    assert row["wall_s"] >= row["tool_s"] + row["parse_s"]
+
+    tool = next(s for s in profiler.spans if s["cat"] == "tool")
+    assert tool["args"]["lines"] == 20000 and tool["args"]["first_output_s"] >= 0
+    assert "user_s" in tool["args"]
+
+    path = tmp_path / "trace.json"
+    profiler.export_chrome_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    lanes = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert {"busy.BusyToolScanner a", "busy.BusyToolScanner b"} <= lanes
+    assert {e["cat"] for e in events if e["ph"] == "X"} >= {"module", "scan", "tool"}
@@ -0,0 +1,73 @@
+import sys
+
+import pytest
+
+from enchante.core import registry
+from enchante.core.module import ModuleManager
+
+PLUGIN_SOURCE = '''
+from enchante.core.scanner import Scanner
+
+
+class HeavyScanner(Scanner):
+    """Scanner with a costly import."""
+
+    def scan(self):
+        self.results = {"status": "completed"}
+        return self.results
+
+
+class HeavierScanner(HeavyScanner):
+    """Subclass of another scanner."""
+
+
+class Helper:
+    pass
+'''
+
+
+@pytest.fixture
+def plugin_package(tmp_path, monkeypatch):
+    package = tmp_path / "lazyplugins"
+    (package / "extra").mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "extra" / "__init__.py").write_text("")
+    (package / "extra" / "heavy.py").write_text(PLUGIN_SOURCE)
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    yield "lazyplugins"
+    for name in list(sys.modules):
+        if name.startswith("lazyplugins"):
+            del sys.modules[name]
+
+
+def test_manifest_lists_scanners_without_importing(plugin_package):
+    """Test that scanners are found from source alone"""
+    specs = registry.build_manifest(plugin_package)
+
+    assert [spec.name for spec in specs] == [
+        "heavy.HeavierScanner",
+        "heavy.HeavyScanner",
+    ]
+    assert specs[1].description == "Scanner with a costly import."
+    assert "lazyplugins.extra.heavy" not in sys.modules
+
+    # The cached manifest gives the same answer
+    assert registry.build_manifest(plugin_package) == specs
+
+
+def test_module_is_imported_on_first_run(plugin_package):
+    """Test that ModuleManager imports a scanner only when it runs"""
+    manager = ModuleManager()
+    manager.discover_modules(plugin_package)
+
+    assert sorted(manager.get_available_modules()) == [
+        "heavy.HeavierScanner",
+        "heavy.HeavyScanner",
+    ]
+    assert "lazyplugins.extra.heavy" not in sys.modules
+
+    result = manager.run_module("heavy.HeavyScanner", "example.com")
+    assert result == {"status": "completed"}
+    assert "lazyplugins.extra.heavy" in sys.modules
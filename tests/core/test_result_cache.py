@@ -0,0 +1,74 @@
+import os
+import time
+
+from enchante.core.module import ModuleManager
+from enchante.core.result_cache import ResultCache
+from enchante.core.scanner import Scanner
+
+
+class CountingScanner(Scanner):
+    runs = 0
+
+    def scan(self):
+        CountingScanner.runs += 1
+        self.results = {"status": "completed", "run": CountingScanner.runs}
+        return self.results
+
+
+def test_key_ignores_option_order_and_tracks_tool_version():
+    """Test that equivalent options share a key and tool upgrades do not"""
+    options = {"a": 1, "b": [1, 2]}
+    key = ResultCache.make_key("m", "t", options, {"nmap": "7.94"})
+
+    reordered = {"b": (1, 2), "a": 1}
+    assert key == ResultCache.make_key("m", "t", reordered, {"nmap": "7.94"})
+    assert key != ResultCache.make_key("m", "t", options, {"nmap": "7.95"})
+
+
+def test_ttl_and_size_eviction(tmp_path):
+    """Test that expired and least recently used entries are dropped"""
+    cache = ResultCache(str(tmp_path), ttl=60, max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.set(name, {"status": "completed", "name": name})
+        time.sleep(0.01)
+
+    assert cache.get("a") is None
+    assert cache.get("c") == {"status": "completed", "name": "c"}
+
+    cache.ttl = 0
+    assert cache.get("c") is None
+
+
+def test_run_module_uses_cache_until_refresh(tmp_path):
+    """Test that repeat runs are served from the cache"""
+    manager = ModuleManager(result_cache=ResultCache(str(tmp_path)))
+    manager.modules = {"counting.Counting": CountingScanner}
+    CountingScanner.runs = 0
+
+    first = manager.run_module("counting.Counting", "example.com")
+    second = manager.run_module("counting.Counting", "example.com")
+    other = manager.run_module("counting.Counting", "other.com")
+    assert first == second == {"status": "completed", "run": 1}
+    assert other["run"] == 2
+
+    manager.refresh = True
+    assert manager.run_module("counting.Counting", "example.com")["run"] == 3
+
+
+def test_eviction_skips_writes_in_progress_and_is_rate_limited(tmp_path):
+    """Test that temporary files survive and sweeps are not run per write"""
+    pending = tmp_path / ".tmp-abc.json"
+    pending.write_text("{}")
+    os.utime(pending, (0, 0))
+    cache = ResultCache(str(tmp_path), ttl=60, max_entries=10)
+    cache.set("a", {"status": "completed"})
+    assert pending.exists()
+
+    # Stale entries written by others wait for the next sweep
+    stale = tmp_path / "stale.json"
+    stale.write_text("{}")
+    os.utime(stale, (0, 0))
+    cache.set("b", {"status": "completed"})
+    assert stale.exists()
+    cache.evict()
+    assert not stale.exists() and pending.exists()
@@ -0,0 +1,165 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from enchante.core.module import ModuleManager
+from enchante.core.scanner import Scanner
+from enchante.core.tools import ToolManager
+
+
+class AsyncEchoScanner(Scanner):
+    async def ascan(self):
+        result = await self.arun_tool("nmap", f"{sys.executable} -c print(42)")
+        self.results = {"status": "completed", "output": result["stdout"].strip()}
+        return self.results
+
+
+class SyncScanner(Scanner):
+    def scan(self):
+        self.results = {"status": "completed"}
+        return self.results
+
+
+@pytest.fixture(autouse=True)
+def tools_available(monkeypatch):
+    monkeypatch.setattr(ToolManager, "ensure_tool_available", lambda self, name: True)
+
+
+def test_async_scanner_has_sync_adapter():
+    """Test that an ascan-only module can still be run with scan()"""
+    scanner = AsyncEchoScanner("example.com")
+    assert scanner.scan() == {"status": "completed", "output": "42"}
+
+
+def test_arun_targets_drives_sync_and_async_modules():
+    """Test that one event loop runs both kinds of module"""
+    manager = ModuleManager()
+    manager.modules = {"echo.Async": AsyncEchoScanner, "plain.Sync": SyncScanner}
+
+    results = asyncio.run(
+        manager.arun_targets(["a", "b"], ["echo.Async", "plain.Sync"], jobs=10)
+    )
+
+    assert results["a"]["echo.Async"]["output"] == "42"
+    assert results["b"]["plain.Sync"]["status"] == "completed"
+
+
+def test_scanner_without_scan_raises():
+    """Test that a module implementing neither hook fails clearly"""
+
+    class EmptyScanner(Scanner):
+        pass
+
+    with pytest.raises(NotImplementedError):
+        EmptyScanner("example.com").scan()
+
+
+class LineCollector(Scanner):
+    retain_output = False
+
+    def __init__(self, target, options=None):
+        super().__init__(target, options)
+        self.lines = []
+
+    def parse_output_line(self, tool_name, line):
+        self.lines.append(line)
+
+    def scan(self):
+        return self.results
+
+
+def write_script(tmp_path, body):
+    script = tmp_path / "tool.py"
+    script.write_text(body)
+    return f"{sys.executable} {script}"
+
+
+def test_run_tool_streams_lines_to_parser(tmp_path):
+    """Test that output lines reach the parser without being retained"""
+    command = write_script(
+        tmp_path, "import sys\nfor i in range(3):\n    print(f'line {i}')\n"
+    )
+    scanner = LineCollector("example.com")
+    result = scanner.run_tool("nmap", command)
+
+    assert result["success"]
+    assert result["parsed"]
+    assert result["stdout"] == ""
+    assert scanner.lines == ["line 0", "line 1", "line 2"]
+
+
+def test_iter_tool_yields_lines_as_they_arrive(tmp_path):
+    """Test that the first line is available before the tool exits"""
+    command = write_script(
+        tmp_path,
+        "import sys, time\nprint('first', flush=True)\ntime.sleep(1)\nprint('last')\n",
+    )
+    scanner = LineCollector("example.com")
+    status = {}
+    lines = scanner.iter_tool("nmap", command, status)
+
+    assert next(lines) == "first"
+    assert status == {}
+    assert list(lines) == ["last"]
+    assert status["returncode"] == 0
+
+
+HANGING_TOOL = """import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+print(child.pid, flush=True)
+print("partial", flush=True)
+time.sleep(60)
+"""
+
+
+def _alive(pid, wait=2.0):
+    """Tell whether a process is still running after up to ``wait`` seconds."""
+    stop = time.monotonic() + wait
+    while True:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                state = f.read().rsplit(")", 1)[1].split()[0]
+        except FileNotFoundError:
+            return False
+        if state == "Z":
+            return False
+        if time.monotonic() > stop:
+            return True
+        time.sleep(0.05)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc")
+@pytest.mark.parametrize("use_async", [False, True])
+def test_tool_group_is_stopped_at_deadline(tmp_path, use_async):
+    """Test that a hung tool and its children are killed at the deadline"""
+    command = write_script(tmp_path, HANGING_TOOL)
+    scanner = LineCollector("example.com", {"max_time": 0.5})
+    start = time.monotonic()
+    if use_async:
+        result = asyncio.run(scanner.arun_tool("nmap", command))
+    else:
+        result = scanner.run_tool("nmap", command)
+
+    assert time.monotonic() - start < 5
+    assert result["timed_out"] and not result["success"]
+    assert scanner.lines[1] == "partial"
+    assert not _alive(int(scanner.lines[0]))
+
+    scanner.results = {"status": "completed", "lines": scanner.lines}
+    assert scanner.get_results()["status"] == "timeout"
+    # Later tools do not start once the deadline has passed
+    assert scanner.run_tool("nmap", command)["stderr"].startswith("Deadline")
+
+
+def test_jobs_after_the_scan_deadline_are_not_run():
+    """Test that jobs starting after the deadline report a timeout"""
+    manager = ModuleManager()
+    manager.modules = {"plain.Sync": SyncScanner}
+    results = manager.run_targets(
+        ["a", "b"], ["plain.Sync"], {"deadline": time.time() - 1}, jobs=2
+    )
+
+    assert results["a"]["plain.Sync"]["status"] == "timeout"
+    assert results["b"]["plain.Sync"]["status"] == "timeout"
@@ -0,0 +1,84 @@
+import asyncio
+import io
+import threading
+import time
+
+from enchante.core.scheduler import Scheduler, load_targets
+
+
+class RecordingManager:
+    """Stand-in ModuleManager that tracks concurrency per target."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = {}
+        self.max_active = {}
+        self.max_total = 0
+
+    def run_module(self, module_name, target, options=None):
+        with self.lock:
+            self.active[target] = self.active.get(target, 0) + 1
+            self.max_active[target] = max(
+                self.max_active.get(target, 0), self.active[target]
+            )
+            self.max_total = max(self.max_total, sum(self.active.values()))
+        time.sleep(0.05)
+        with self.lock:
+            self.active[target] -= 1
+        if module_name == "bad":
+            raise RuntimeError("boom")
+        return {"status": "completed", "module": module_name}
+
+
+def test_scheduler_honours_caps():
+    """Test global and per-target concurrency limits"""
+    manager = RecordingManager()
+    scheduler = Scheduler(manager, jobs=4, per_target=1)
+    targets = ["a", "b", "c"]
+    results = scheduler.run(targets, ["m1", "m2", "bad"])
+
+    assert list(results) == targets
+    assert list(results["a"]) == ["m1", "m2", "bad"]
+    assert results["b"]["m2"]["status"] == "completed"
+    assert results["c"]["bad"] == {"status": "error", "error": "boom"}
+    assert all(count == 1 for count in manager.max_active.values())
+    assert 1 < manager.max_total <= 3
+
+
+def test_async_errors_carry_a_status():
+    """Test that a raising module gives an error result with a status"""
+
+    class FailingManager:
+        async def arun_module(self, module_name, target, options=None):
+            raise RuntimeError("boom")
+
+    results = asyncio.run(Scheduler(FailingManager()).arun(["a"], ["bad"]))
+
+    assert results == {"a": {"bad": {"status": "error", "error": "boom"}}}
+
+
+def test_load_targets_from_file_and_stdin(tmp_path, monkeypatch):
+    """Test that targets are merged from every source without duplicates"""
+    targets_file = tmp_path / "targets.txt"
+    targets_file.write_text("# hosts\n10.0.0.1\n\n10.0.0.2\n")
+    monkeypatch.setattr("sys.stdin", io.StringIO("10.0.0.2\n10.0.0.3\n"))
+
+    targets = load_targets(["10.0.0.1", "-"], str(targets_file))
+
+    assert targets == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+
+
+def test_rate_limits_are_shared_between_parallel_jobs():
+    """Test that each job gets its share of the global and per-target rates"""
+    from enchante.core.ratelimit import RateLimiter
+
+    limiter = RateLimiter(rate=100, per_target=10)
+    scheduler = Scheduler(
+        RecordingManager(), jobs=4, per_target=2, rate_limiter=limiter
+    )
+    jobs = scheduler.build_jobs(["a", "b"], ["m1", "m2", "m3"])
+
+    # 100/s over 4 parallel jobs, 10/s over 2 parallel jobs per target
+    assert scheduler.tool_rate_share(jobs) == 5
+    options = scheduler._rate_options(jobs, {"verbosity": 1})
+    assert options["_rate_limiter"] is limiter and options["_tool_rate"] == 5
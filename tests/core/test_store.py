@@ -0,0 +1,87 @@
+import json
+
+from typer.testing import CliRunner
+
+from enchante.cli import app
+from enchante.core.store import ResultStore
+
+PORT_RESULT = {
+    "status": "completed",
+    "open_ports": [
+        {"port": "22", "protocol": "tcp", "state": "open", "service": "ssh"},
+        {"port": "445", "protocol": "tcp", "state": "open", "service": "microsoft-ds"},
+    ],
+}
+
+SMB_RESULT = {
+    "status": "completed",
+    "nmap_scan": {
+        "address": "10.0.0.2",
+        "ports": [
+            {
+                "port": "445",
+                "protocol": "tcp",
+                "state": "open",
+                "service": "ssl/microsoft-ds",
+                "product": "Samba",
+                "scripts": {"smb-security-mode": {"output": "signing disabled"}},
+            }
+        ],
+        "scripts": {"smb-os-discovery": {"output": "OS: Unix"}},
+    },
+    "shares": [{"share": "IPC$", "mapping": "OK", "listing": "N/A"}],
+}
+
+
+def _fill(path):
+    with ResultStore(path, batch_size=2) as store:
+        store.begin_scan("test")
+        store.add("10.0.0.1", "port_scanner.PortScanner", PORT_RESULT)
+        store.add("smb.lan", "smb_scanner.SmbScanner", SMB_RESULT)
+        store.add("10.0.0.3", "port_scanner.PortScanner", {"status": "failed"})
+
+
+def test_store_normalises_results(tmp_path):
+    path = str(tmp_path / "results.db")
+    _fill(path)
+
+    with ResultStore(path, readonly=True) as store:
+        rows = store.ports(port=445)
+        assert [(r["target"], r["address"]) for r in rows] == [
+            ("10.0.0.1", "10.0.0.1"),
+            ("smb.lan", "10.0.0.2"),
+        ]
+        assert rows[1]["service"] == "microsoft-ds" and rows[1]["product"] == "Samba"
+        assert [r["address"] for r in store.ports(service="ss*")] == ["10.0.0.1"]
+        assert store.ports(group_by="port", scan="latest") == [
+            {"port": 445, "hosts": 2},
+            {"port": 22, "hosts": 1},
+        ]
+
+        scripts = store.findings(kind="script")
+        assert [(f["port"], f["name"]) for f in scripts] == [
+            (445, "smb-security-mode"),
+            (None, "smb-os-discovery"),
+        ]
+        share = store.findings(kind="share")[0]
+        assert share["name"] == "IPC$" and json.loads(share["detail"])["mapping"]
+
+        _, rows = store.execute("SELECT status, COUNT(*) FROM jobs GROUP BY 1")
+        assert sorted(rows) == [("completed", 2), ("failed", 1)]
+
+
+def test_query_command(tmp_path):
+    path = str(tmp_path / "results.db")
+    _fill(path)
+
+    result = CliRunner().invoke(app, ["query", path, "-p", "445", "--json"])
+    assert result.exit_code == 0
+    rows = [json.loads(line) for line in result.output.splitlines()]
+    assert [r["address"] for r in rows] == ["10.0.0.1", "10.0.0.2"]
+
+    result = CliRunner().invoke(app, ["query", path, "--sql", "DELETE FROM jobs"])
+    assert result.exit_code == 1
+
+    result = CliRunner().invoke(app, ["query", path, "--scan", "foo"])
+    assert result.exit_code == 1
+    assert "--scan must be a scan id" in result.output
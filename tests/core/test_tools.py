@@ -0,0 +1,63 @@
+import os
+import stat
+
+import pytest
+
+from enchante.core.tools import ToolManager
+
+
+@pytest.fixture
+def fake_tool(tmp_path, monkeypatch):
+    """Put a fake tool on PATH that records every time it is run."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "calls.log"
+    tool = bin_dir / "faketool"
+    tool.write_text(f"#!/bin/sh\necho run >> {calls}\necho 'faketool 1.2.3'\n")
+    tool.chmod(tool.stat().st_mode | stat.S_IEXEC)
+
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setitem(
+        ToolManager.COMMON_TOOLS,
+        "faketool",
+        {"apt": "faketool", "check_command": "faketool --version"},
+    )
+    ToolManager.clear_cache()
+    yield tool, calls
+    ToolManager.clear_cache()
+
+
+def probe_count(calls):
+    return len(calls.read_text().splitlines()) if calls.exists() else 0
+
+
+def test_tool_probe_is_cached_across_processes(fake_tool):
+    """Test that a second process reuses the on-disk probe result"""
+    tool, calls = fake_tool
+
+    assert ToolManager().is_tool_installed("faketool")
+    assert ToolManager().get_tool_version("faketool") == "faketool 1.2.3"
+    assert probe_count(calls) == 1
+
+    # Simulate a new process: only the disk cache survives
+    ToolManager.clear_cache()
+    assert ToolManager().is_tool_installed("faketool")
+    assert probe_count(calls) == 1
+
+    # A changed binary is probed again
+    tool.write_text(tool.read_text() + "# upgraded\n")
+    ToolManager.clear_cache()
+    assert ToolManager().is_tool_installed("faketool")
+    assert probe_count(calls) == 2
+
+
+def test_missing_tool_is_not_spawned(fake_tool, monkeypatch):
+    """Test that tools missing from PATH are rejected without probing"""
+    monkeypatch.setitem(
+        ToolManager.COMMON_TOOLS,
+        "missingtool",
+        {"apt": "missingtool", "check_command": "missingtool-xyz --version"},
+    )
+    statuses = ToolManager().check_tools(["faketool", "missingtool"])
+    assert statuses == {"faketool": True, "missingtool": False}
@@ -0,0 +1,77 @@
+import os
+
+from enchante.core import wordlist as wordlist_module
+from enchante.core.wordlist import Wordlist, WordlistIndex, load_index
+
+
+def _write(path, text):
+    path.write_bytes(text.encode())
+    return str(path)
+
+
+def test_wordlist_dedupes_and_expands(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    first = _write(tmp_path / "a.txt", "# header\nadmin\n\n  login \r\nadmin\n")
+    second = _write(tmp_path / "b.txt", "login\nbackup\nadmin.php\n")
+
+    words = Wordlist([first, second], "php")
+
+    # admin.php is an entry of its own, so it is not generated from admin
+    assert list(words) == [
+        "admin",
+        "login",
+        "login.php",
+        "backup",
+        "backup.php",
+        "admin.php",
+        "admin.php.php",
+    ]
+    assert list(words.words()) == [b"admin", b"login", b"backup", b"admin.php"]
+
+
+def test_index_is_cached_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    path = _write(tmp_path / "words.txt", "one\ntwo\nthree\ntwo\n")
+
+    index = load_index(path)
+    assert len(index) == 3
+
+    # A fresh process would map the stored index instead of reading the list
+    wordlist_module._indexes.clear()
+    monkeypatch.setattr(WordlistIndex, "build", classmethod(lambda cls, p: 1 / 0))
+    mapped = load_index(path)
+    assert list(mapped.entries()) == [b"one", b"two", b"three"]
+    assert list(mapped.hashes) == list(index.hashes)
+    assert os.listdir(tmp_path / "cache" / "wordlists")
+
+
+def test_index_rebuilt_when_list_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "words.txt"
+    _write(path, "one\n")
+    assert list(Wordlist(str(path))) == ["one"]
+
+    _write(path, "one\ntwo\n")
+    os.utime(path, ns=(1, 1))
+    assert list(Wordlist(str(path))) == ["one", "two"]
+
+
+def test_empty_wordlist(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    path = _write(tmp_path / "empty.txt", "")
+    assert list(Wordlist(path, "php")) == []
+    wordlist_module._indexes.clear()
+    assert list(Wordlist(path, "php")) == []
+
+
+def test_index_dedupes_across_sorted_runs(tmp_path, monkeypatch):
+    # Runs of 3 entries force the on-disk merge of several sorted runs
+    monkeypatch.setattr(wordlist_module, "RUN_SIZE", 3)
+    lines = ["c", "a", "b", "a", "d", "c", "e", "b", "f", "a"]
+    path = _write(tmp_path / "words.txt", "\n".join(lines) + "\n")
+
+    index = WordlistIndex.build(path)
+
+    assert list(index.entries()) == [b"c", b"a", b"b", b"d", b"e", b"f"]
+    assert list(index.sorted_hashes) == sorted(index.hashes)
+    assert len(index.offsets) == len(index.lengths) == len(index.hashes) == 6
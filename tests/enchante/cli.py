@@ -1,24 +1,71 @@
 import json
-from typing import Optional
+import time
+from contextlib import ExitStack
+from typing import List, Optional
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
-from enchante.core.logger import get_logger
-from enchante.core.module import ModuleManager
+# Heavy imports (rich, the scanner core) are deferred to the commands that
+# need them so that --help and the listing commands start quickly. Plain
+# help output also keeps typer from loading its rich formatter.
+app = typer.Typer(
+    help="Enchante - A Modular Penetration Testing Framework",
+    rich_markup_mode=None,
+)
 
-app = typer.Typer(help="Enchante - A Modular Penetration Testing Framework")
-console = Console()
 
+class _LazyConsole:
+    """Create the rich Console the first time something is printed."""
 
-def setup(verbosity: int = 0):
+    _console = None
+
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+
+console = _LazyConsole()
+
+
+def get_logger(name: str, verbosity: int = 0, log_json: Optional[str] = None):
+    """Return a logger, setting the verbosity (see enchante.core.logger)."""
+    from enchante.core.logger import configure_logging
+    from enchante.core.logger import get_logger as _get_logger
+
+    configure_logging(verbosity, log_json)
+    return _get_logger(name)
+
+
+def setup(verbosity: int = 0, log_json: Optional[str] = None):
     """Initial setup to discover modules."""
-    # Configure root logger
-    logger = get_logger("enchante", verbosity)
+    from enchante.core.module import ModuleManager
+
+    # Configure the enchante logger, once per process
+    get_logger("enchante", verbosity, log_json)
     return ModuleManager(verbosity)
 
 
+def parse_module_options(pairs: Optional[List[str]]) -> dict:
+    """Turn KEY=VALUE pairs into module options.
+
+    Values are read as JSON where possible (numbers, booleans, lists) and
+    kept as strings otherwise.
+    """
+    options = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        if not sep or not key.strip():
+            raise ValueError(f"Invalid option '{pair}', expected KEY=VALUE")
+        try:
+            options[key.strip()] = json.loads(value)
+        except ValueError:
+            options[key.strip()] = value
+    return options
+
+
 @app.command()
 def list_modules(
     verbose: Optional[int] = typer.Option(
@@ -36,11 +83,14 @@ def list_modules(
         )
         return
 
+    from rich.table import Table
+
     table = Table(title="Available Modules")
     table.add_column("Module Name", style="cyan")
+    table.add_column("Description")
 
     for module in sorted(modules):
-        table.add_row(module)
+        table.add_row(module, module_manager.get_module_description(module))
 
     console.print(table)
 
@@ -61,6 +111,8 @@ def list_tools(
         tool for tool in tool_manager.COMMON_TOOLS if tool not in available_tools
     ]
 
+    from rich.table import Table
+
     table = Table(title="External Tools Status")
     table.add_column("Tool Name", style="cyan")
     table.add_column("Status", style="green")
@@ -128,20 +180,144 @@ def install_tools(
 
 @app.command()
 def scan(
-    target: str = typer.Argument(..., help="Target to scan (IP, hostname, or URL)"),
+    targets: Optional[List[str]] = typer.Argument(
+        None, help="Targets to scan (IP, hostname, or URL); use - to read stdin"
+    ),
+    targets_file: Optional[str] = typer.Option(
+        None, "--targets-file", "-iL", help="File with one target per line"
+    ),
     module: str = typer.Option(None, "--module", "-m", help="Specific module to run"),
     output: Optional[str] = typer.Option(
-        None, "--output", "-o", help="Output file for results (JSON format)"
+        None,
+        "--output",
+        "-o",
+        help="Output file for results (JSON); .jsonl or .jsonl.gz streams one "
+        "line per finished job",
+    ),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", min=1, help="Number of jobs to run in parallel"
+    ),
+    per_target: Optional[int] = typer.Option(
+        None, "--per-target", min=1, help="Maximum parallel jobs against one target"
+    ),
+    cache: bool = typer.Option(
+        False, "--cache/--no-cache", help="Reuse results of identical recent runs"
+    ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Ignore cached results but store new ones (implies --cache)",
+    ),
+    cache_ttl: int = typer.Option(
+        3600, "--cache-ttl", min=0, help="Seconds a cached result stays valid"
+    ),
+    pipeline: bool = typer.Option(
+        False,
+        "--pipeline",
+        help="Run port discovery first and other modules only where they apply",
+    ),
+    use_async: bool = typer.Option(
+        False, "--async", help="Drive all jobs from a single asyncio event loop"
+    ),
+    batch_size: int = typer.Option(
+        0,
+        "--batch-size",
+        min=0,
+        help="Scan up to N targets in one nmap run for modules that support it",
+    ),
+    merge: bool = typer.Option(
+        False, "--merge", help="Combine the nmap runs of modules on the same target"
+    ),
+    rate: Optional[float] = typer.Option(
+        None, "--rate", min=0, help="Maximum packets or requests per second overall"
+    ),
+    rate_per_target: Optional[float] = typer.Option(
+        None,
+        "--rate-per-target",
+        min=0,
+        help="Maximum packets or requests per second against one target",
+    ),
+    journal_path: Optional[str] = typer.Option(
+        None, "--journal", help="Record each finished job to this JSONL file"
+    ),
+    resume: bool = typer.Option(
+        False, "--resume", help="Skip jobs already completed in the --journal file"
+    ),
+    module_timeout: Optional[float] = typer.Option(
+        None,
+        "--module-timeout",
+        min=0,
+        help="Seconds each module may run before its tools are stopped",
+    ),
+    scan_timeout: Optional[float] = typer.Option(
+        None,
+        "--scan-timeout",
+        min=0,
+        help="Seconds the whole scan may run; later jobs report a timeout",
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="Print where the scan spent its time"
+    ),
+    profile_trace: Optional[str] = typer.Option(
+        None,
+        "--profile-trace",
+        help="Write a Chrome trace (chrome://tracing, Perfetto) to this file",
+    ),
+    database: Optional[str] = typer.Option(
+        None, "--db", help="Store results in this SQLite database (see query)"
+    ),
+    artifacts: Optional[str] = typer.Option(
+        None,
+        "--artifacts",
+        help="Directory for large tool outputs (default: the cache directory)",
+    ),
+    log_json: Optional[str] = typer.Option(
+        None, "--log-json", help="Also write log records to this JSON-lines file"
+    ),
+    module_options: Optional[List[str]] = typer.Option(
+        None,
+        "--option",
+        "-O",
+        help="Module option as KEY=VALUE (e.g. engine=native), may be repeated",
     ),
     verbose: Optional[int] = typer.Option(
         0, "--verbose", "-v", count=True, help="Increase verbosity"
     ),
 ):
-    """Scan a target using the specified module or all modules."""
-    module_manager = setup(verbose)
+    """Scan targets using the specified module or all modules."""
+    from enchante.core.logger import flush_logging
+    from enchante.core.output import JsonlWriter, is_jsonl
+    from enchante.core.scanner import run_sync
+    from enchante.core.scheduler import load_targets
+
+    profiler = None
+    if profile or profile_trace:
+        from enchante.core.profiler import Profiler, set_profiler
+
+        profiler = Profiler()
+        set_profiler(profiler)
+
+    module_manager = setup(verbose, log_json)
     logger = get_logger("enchante.scan", verbose)
 
-    logger.info(f"Starting scan of {target} with verbosity level {verbose}")
+    if cache or refresh:
+        from enchante.core.result_cache import ResultCache
+
+        module_manager.result_cache = ResultCache(ttl=cache_ttl, logger=logger)
+        module_manager.refresh = refresh
+
+    if resume and not journal_path:
+        console.print("[bold red]--resume needs a --journal file.[/bold red]")
+        raise typer.Exit(1)
+
+    target_list = load_targets(targets, targets_file)
+    if not target_list:
+        console.print("[bold red]No targets given. Aborting.[/bold red]")
+        raise typer.Exit(1)
+
+    logger.info(
+        f"Starting scan of {len(target_list)} target(s) with verbosity level {verbose}"
+    )
     module_manager.discover_modules()
 
     modules = module_manager.get_available_modules()
@@ -150,67 +326,523 @@ def scan(
         console.print("[bold red]No modules found. Aborting.[/bold red]")
         return
 
-    results = {}
-    options = {"verbosity": verbose}
+    try:
+        options = parse_module_options(module_options)
+    except ValueError as e:
+        console.print(f"[bold red]{str(e)}[/bold red]")
+        raise typer.Exit(1)
+    options["verbosity"] = verbose
+    if module_timeout:
+        options["max_time"] = module_timeout
+    if scan_timeout:
+        options["deadline"] = time.time() + scan_timeout
+    if artifacts:
+        options["artifact_dir"] = artifacts
+
+    rate_limiter = None
+    if rate or rate_per_target:
+        from enchante.core.ratelimit import RateLimiter
+
+        rate_limiter = RateLimiter(rate, rate_per_target)
 
     if module:
         # Run a specific module
         if module not in modules:
             console.print(f"[bold red]Module '{module}' not found.[/bold red]")
             return
+        modules = [module]
+
+    journal = None
+    if journal_path:
+        from enchante.core.journal import Journal
 
-        with console.status(f"Running module {module} on {target}..."):
-            try:
-                logger.info(f"Running module: {module}")
-                module_result = module_manager.run_module(module, target, options)
-                results[module] = module_result
-            except Exception as e:
-                logger.error(f"Error running module {module}: {str(e)}")
-                results[module] = {"error": str(e)}
+        journal = Journal(journal_path, resume=resume, logger=logger)
+
+    if len(target_list) == 1:
+        description = target_list[0]
     else:
-        # Run all modules
-        with console.status(f"Running all modules on {target}..."):
+        description = f"{len(target_list)} targets"
+
+    # Sinks receive every result as its job finishes
+    sinks = []
+    store = writer = None
+    if database:
+        from enchante.core.store import ResultStore
+
+        store = ResultStore(database, logger=logger)
+        store.begin_scan(f"{len(modules)} module(s) on {description}")
+        sinks.append(store.add)
+    if output and is_jsonl(output):
+        writer = JsonlWriter(output)
+        sinks.append(writer.write)
+
+    def on_result(job, result):
+        for sink in sinks:
+            sink(job.target, job.module, result)
+
+    with ExitStack() as stack:
+        for resource in (journal, store, writer):
+            if resource is not None:
+                stack.enter_context(resource)
+        stack.enter_context(
+            console.status(f"Running {len(modules)} module(s) on {description}...")
+        )
+        if verbose >= 1:
             for mod in modules:
-                try:
-                    logger.info(f"Running module: {mod}")
-                    if verbose >= 1:
-                        console.print(f"Running module: {mod}")
-                    module_result = module_manager.run_module(mod, target, options)
-                    results[mod] = module_result
-                except Exception as e:
-                    logger.error(f"Error running module {mod}: {str(e)}")
-                    results[mod] = {"error": str(e)}
-
-    # Display results based on verbosity
-    if verbose >= 1:
-        for mod_name, mod_results in results.items():
-            console.print(f"\n[bold cyan]Results from {mod_name}:[/bold cyan]")
-            console.print(mod_results)
-    else:
-        # Simplified output for default verbosity
-        console.print("\n[bold cyan]Scan Results Summary:[/bold cyan]")
-        table = Table(title=f"Scan Results for {target}")
-        table.add_column("Module", style="cyan")
-        table.add_column("Status", style="green")
-        table.add_column("Findings", style="yellow")
-
-        for mod_name, mod_results in results.items():
-            status = mod_results.get("status", "unknown")
-            if "error" in mod_results:
-                status = "failed"
-                findings = mod_results["error"]
+                console.print(f"Running module: {mod}")
+        try:
+            if use_async:
+                results_by_target = run_sync(
+                    module_manager.arun_targets(
+                        target_list,
+                        modules,
+                        options,
+                        jobs=jobs,
+                        per_target=per_target,
+                        pipeline=pipeline,
+                        batch_size=batch_size,
+                        merge=merge,
+                        rate_limiter=rate_limiter,
+                        journal=journal,
+                        on_result=on_result if sinks else None,
+                        compact=writer is not None,
+                    )
+                )
             else:
-                findings = "See detailed output (-v)"
+                results_by_target = module_manager.run_targets(
+                    target_list,
+                    modules,
+                    options,
+                    jobs=jobs,
+                    per_target=per_target,
+                    pipeline=pipeline,
+                    batch_size=batch_size,
+                    merge=merge,
+                    rate_limiter=rate_limiter,
+                    journal=journal,
+                    on_result=on_result if sinks else None,
+                    compact=writer is not None,
+                )
+        except KeyboardInterrupt:
+            from enchante.core.process import kill_running_tools
+
+            kill_running_tools()
+            flush_logging()
+            console.print("\n[bold red]Scan interrupted.[/bold red]")
+            if journal is not None:
+                console.print(f"Rerun with --resume to continue from {journal_path}.")
+            raise typer.Exit(130)
+
+    # Let queued log lines through before the results
+    flush_logging()
+
+    print_results(results_by_target, verbose)
+
+    if profiler is not None:
+        print_profile(profiler)
+        if profile_trace:
+            profiler.export_chrome_trace(profile_trace)
+            console.print(f"[green]Trace written to {profile_trace}[/green]")
+
+    # Save results to file if requested, unless they were streamed
+    if writer is not None:
+        console.print(f"\n[green]{writer.count} results streamed to {output}[/green]")
+    elif output:
+        save_results(output, target_list, results_by_target)
+
+
+def print_results(results_by_target: dict, verbose: int = 0):
+    """Print results in full (-v) or as a summary table per target."""
+    from rich.table import Table
+
+    for target, target_results in results_by_target.items():
+        if verbose >= 1:
+            for mod_name, mod_results in target_results.items():
+                console.print(
+                    f"\n[bold cyan]Results from {mod_name} on {target}:[/bold cyan]"
+                )
+                console.print(mod_results)
+        else:
+            # Simplified output for default verbosity
+            console.print("\n[bold cyan]Scan Results Summary:[/bold cyan]")
+            table = Table(title=f"Scan Results for {target}")
+            table.add_column("Module", style="cyan")
+            table.add_column("Status", style="green")
+            table.add_column("Findings", style="yellow")
+
+            for mod_name, mod_results in target_results.items():
+                status = mod_results.get("status", "unknown")
+                if "error" in mod_results:
+                    if status != "timeout":
+                        status = "failed"
+                    findings = mod_results["error"]
+                elif status == "timeout":
+                    findings = "Partial results (-v)"
+                else:
+                    findings = "See detailed output (-v)"
+
+                table.add_row(mod_name, status, findings)
+
+            console.print(table)
+
+
+def save_results(output: str, target_list: List[str], results_by_target: dict):
+    """Write results as JSON; a single target keeps the {module: result} layout."""
+    if len(target_list) == 1:
+        results = results_by_target[target_list[0]]
+    else:
+        results = results_by_target
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    console.print(f"\n[green]Results saved to {output}[/green]")
+
+
+def print_profile(profiler):
+    """Print the per-module time breakdown of a profiled scan."""
+    from rich.table import Table
+
+    table = Table(title="Profile")
+    table.add_column("Module", style="cyan")
+    for name in ("Jobs", "Wall s", "Tools", "Tool s", "Tool CPU s", "Parse s"):
+        table.add_column(name, justify="right")
+    table.add_column("Overhead s", justify="right")
+    table.add_column("Max RSS MiB", justify="right")
+
+    def _seconds(row, key):
+        return f"{row[key]:.3f}" if key in row else ""
+
+    for module, row in profiler.summary().items():
+        table.add_row(
+            module,
+            str(row.get("jobs", "")),
+            _seconds(row, "wall_s"),
+            str(row.get("tools", "")),
+            _seconds(row, "tool_s"),
+            _seconds(row, "tool_cpu_s"),
+            _seconds(row, "parse_s"),
+            _seconds(row, "overhead_s"),
+            f"{row['maxrss_kb'] / 1024:.1f}" if row.get("maxrss_kb") else "",
+        )
+    console.print(table)
+
+
+def _print_rows(title: str, rows: List[dict], as_json: bool):
+    if as_json:
+        for row in rows:
+            typer.echo(json.dumps(row, default=str))
+        return
+    if not rows:
+        console.print("[yellow]No matching results.[/yellow]")
+        return
+
+    from rich.table import Table
+
+    table = Table(title=title)
+    for name in rows[0]:
+        table.add_column(name, style="cyan" if name == "address" else None)
+    for row in rows:
+        table.add_row(*("" if v is None else str(v) for v in row.values()))
+    console.print(table)
+
 
-            table.add_row(mod_name, status, findings)
+@app.command()
+def query(
+    database: str = typer.Argument(..., help="Database written by scan --db"),
+    port: Optional[List[int]] = typer.Option(
+        None, "--port", "-p", help="Port number, may be repeated"
+    ),
+    service: Optional[str] = typer.Option(
+        None, "--service", "-s", help="Service name (globs such as 'http*' work)"
+    ),
+    host: Optional[str] = typer.Option(None, "--host", help="Host address or glob"),
+    target: Optional[str] = typer.Option(None, "--target", help="Scanned target"),
+    state: str = typer.Option("open", "--state", help="Port state, or 'all'"),
+    findings: Optional[str] = typer.Option(
+        None,
+        "--findings",
+        "-f",
+        help="List findings of a kind (script, path, credential, share, finding)",
+    ),
+    module: Optional[str] = typer.Option(
+        None, "--module", "-m", help="Only findings of this module"
+    ),
+    count_by: Optional[str] = typer.Option(
+        None,
+        "--count-by",
+        help="Count hosts per address, target, port, service or product",
+    ),
+    scan_id: Optional[str] = typer.Option(
+        None, "--scan", help="Scan id, or 'latest' (default: all scans)"
+    ),
+    sql: Optional[str] = typer.Option(
+        None, "--sql", help="Run a read-only SQL query instead"
+    ),
+    as_json: bool = typer.Option(False, "--json", help="Print one JSON row per line"),
+):
+    """Query results stored with scan --db."""
+    import sqlite3
+
+    from enchante.core.store import ResultStore
+
+    if scan_id is not None and scan_id != "latest":
+        try:
+            scan_id = int(scan_id)
+        except ValueError:
+            console.print(
+                f"[bold red]--scan must be a scan id or 'latest', not {scan_id}"
+                "[/bold red]"
+            )
+            raise typer.Exit(1)
+
+    try:
+        store = ResultStore(database, readonly=True)
+    except sqlite3.Error as e:
+        console.print(f"[bold red]Cannot open {database}: {str(e)}[/bold red]")
+        raise typer.Exit(1)
+
+    try:
+        if sql:
+            names, rows = store.execute(sql)
+            _print_rows("Query", [dict(zip(names, row)) for row in rows], as_json)
+        elif findings:
+            rows = store.findings(
+                kind=None if findings == "all" else findings,
+                module=module,
+                target=target,
+                address=host,
+                port=port or None,
+                scan=scan_id,
+            )
+            _print_rows(f"Findings: {findings}", rows, as_json)
+        else:
+            rows = store.ports(
+                group_by=count_by,
+                port=port or None,
+                service=service,
+                address=host,
+                target=target,
+                state=None if state == "all" else state,
+                scan=scan_id,
+            )
+            _print_rows("Ports", rows, as_json)
+    except (sqlite3.Error, ValueError) as e:
+        console.print(f"[bold red]{str(e)}[/bold red]")
+        raise typer.Exit(1)
+    finally:
+        store.close()
 
-        console.print(table)
 
-    # Save results to file if requested
-    if output:
-        with open(output, "w") as f:
-            json.dump(results, f, indent=4)
-        console.print(f"\n[green]Results saved to {output}[/green]")
+@app.command()
+def coordinator(
+    targets: Optional[List[str]] = typer.Argument(
+        None, help="Targets to scan (IP, hostname, or URL); use - to read stdin"
+    ),
+    targets_file: Optional[str] = typer.Option(
+        None, "--targets-file", "-iL", help="File with one target per line"
+    ),
+    module: str = typer.Option(None, "--module", "-m", help="Specific module to run"),
+    listen: str = typer.Option(
+        "127.0.0.1:8765", "--listen", help="Address (host:port) to serve workers on"
+    ),
+    token: Optional[str] = typer.Option(
+        None,
+        "--token",
+        envvar="ENCHANTE_TOKEN",
+        help="Shared secret workers must present",
+    ),
+    lease_time: float = typer.Option(
+        60.0, "--lease-time", min=1, help="Seconds before a silent worker's job moves"
+    ),
+    max_attempts: int = typer.Option(
+        3, "--max-attempts", min=1, help="Times a job is handed out before it fails"
+    ),
+    per_target: Optional[int] = typer.Option(
+        None, "--per-target", min=1, help="Maximum parallel jobs against one target"
+    ),
+    output: Optional[str] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Output file for results (JSON); .jsonl or .jsonl.gz streams one "
+        "line per finished job",
+    ),
+    journal_path: Optional[str] = typer.Option(
+        None, "--journal", help="Record each finished job to this JSONL file"
+    ),
+    resume: bool = typer.Option(
+        False, "--resume", help="Skip jobs already completed in the --journal file"
+    ),
+    database: Optional[str] = typer.Option(
+        None, "--db", help="Store results in this SQLite database (see query)"
+    ),
+    module_timeout: Optional[float] = typer.Option(
+        None,
+        "--module-timeout",
+        min=0,
+        help="Seconds each module may run before its tools are stopped",
+    ),
+    module_options: Optional[List[str]] = typer.Option(
+        None,
+        "--option",
+        "-O",
+        help="Module option as KEY=VALUE (e.g. engine=native), may be repeated",
+    ),
+    verbose: Optional[int] = typer.Option(
+        0, "--verbose", "-v", count=True, help="Increase verbosity"
+    ),
+):
+    """Hand out scan jobs to enchante worker processes and collect results."""
+    from enchante.core.distributed import Coordinator, CoordinatorServer, parse_address
+    from enchante.core.logger import flush_logging
+    from enchante.core.output import JsonlWriter, is_jsonl
+    from enchante.core.scheduler import Scheduler, load_targets
+
+    module_manager = setup(verbose)
+    logger = get_logger("enchante.coordinator", verbose)
+
+    if resume and not journal_path:
+        console.print("[bold red]--resume needs a --journal file.[/bold red]")
+        raise typer.Exit(1)
+
+    target_list = load_targets(targets, targets_file)
+    if not target_list:
+        console.print("[bold red]No targets given. Aborting.[/bold red]")
+        raise typer.Exit(1)
+
+    module_manager.discover_modules()
+    modules = module_manager.get_available_modules()
+    if module:
+        if module not in modules:
+            console.print(f"[bold red]Module '{module}' not found.[/bold red]")
+            raise typer.Exit(1)
+        modules = [module]
+
+    try:
+        options = parse_module_options(module_options)
+    except ValueError as e:
+        console.print(f"[bold red]{str(e)}[/bold red]")
+        raise typer.Exit(1)
+    options["verbosity"] = verbose
+    if module_timeout:
+        options["max_time"] = module_timeout
+
+    journal = None
+    if journal_path:
+        from enchante.core.journal import Journal
+
+        journal = Journal(journal_path, resume=resume, logger=logger)
+
+    sinks = []
+    store = writer = None
+    if database:
+        from enchante.core.store import ResultStore
+
+        store = ResultStore(database, logger=logger)
+        store.begin_scan(f"{len(modules)} module(s) on {len(target_list)} target(s)")
+        sinks.append(store.add)
+    if output and is_jsonl(output):
+        writer = JsonlWriter(output)
+        sinks.append(writer.write)
+
+    def on_result(job, result):
+        for sink in sinks:
+            sink(job.target, job.module, result)
+
+    jobs = Scheduler(module_manager).build_jobs(target_list, modules)
+    with ExitStack() as stack:
+        for resource in (journal, store, writer):
+            if resource is not None:
+                stack.enter_context(resource)
+        hub = Coordinator(
+            jobs,
+            options,
+            lease_time=lease_time,
+            max_attempts=max_attempts,
+            per_target=per_target,
+            journal=journal,
+            on_result=on_result if sinks else None,
+            compact=writer is not None,
+            logger=logger,
+        )
+        try:
+            server = CoordinatorServer(hub, parse_address(listen), token=token)
+        except (OSError, ValueError) as e:
+            console.print(f"[bold red]Cannot listen on {listen}: {str(e)}[/bold red]")
+            raise typer.Exit(1)
+        server.start()
+        console.print(
+            f"Serving {len(jobs)} job(s) on {server.url}; "
+            f"start workers with: enchante worker {server.url}"
+        )
+        try:
+            with console.status("Waiting for workers..."):
+                hub.wait()
+        except KeyboardInterrupt:
+            console.print("\n[bold red]Coordinator interrupted.[/bold red]")
+            if journal is not None:
+                console.print(f"Rerun with --resume to continue from {journal_path}.")
+            raise typer.Exit(130)
+        finally:
+            if hub.done:
+                # Give polling workers a moment to hear that the scan is done
+                time.sleep(1.0)
+            server.shutdown()
+            server.server_close()
+
+    flush_logging()
+    results_by_target = hub.results_by_target()
+    print_results(results_by_target, verbose)
+    if writer is not None:
+        console.print(f"\n[green]{writer.count} results streamed to {output}[/green]")
+    elif output:
+        save_results(output, target_list, results_by_target)
+
+
+@app.command()
+def worker(
+    url: str = typer.Argument(..., help="Coordinator URL, e.g. http://10.0.0.5:8765"),
+    jobs: int = typer.Option(
+        1, "--jobs", "-j", min=1, help="Number of jobs to run in parallel"
+    ),
+    name: Optional[str] = typer.Option(
+        None, "--name", help="Worker name (default: host name and process id)"
+    ),
+    token: Optional[str] = typer.Option(
+        None,
+        "--token",
+        envvar="ENCHANTE_TOKEN",
+        help="Shared secret of the coordinator",
+    ),
+    verbose: Optional[int] = typer.Option(
+        0, "--verbose", "-v", count=True, help="Increase verbosity"
+    ),
+):
+    """Run scan jobs handed out by an enchante coordinator."""
+    import urllib.error
+
+    from enchante.core.distributed import Worker
+
+    module_manager = setup(verbose)
+    logger = get_logger("enchante.worker", verbose)
+    module_manager.discover_modules()
+
+    if "://" not in url:
+        url = f"http://{url}"
+    agent = Worker(
+        url, module_manager, jobs=jobs, name=name, token=token, logger=logger
+    )
+    try:
+        completed = agent.run()
+    except urllib.error.HTTPError as e:
+        console.print(f"[bold red]Coordinator refused the worker: {e}[/bold red]")
+        raise typer.Exit(1)
+    except (urllib.error.URLError, OSError) as e:
+        console.print(f"[bold red]Cannot reach {url}: {str(e)}[/bold red]")
+        raise typer.Exit(1)
+    except KeyboardInterrupt:
+        console.print("\n[bold red]Worker interrupted.[/bold red]")
+        raise typer.Exit(130)
+    console.print(f"[green]Completed {completed} job(s) for {url}[/green]")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import tempfile
+from collections import deque
+from typing import Deque, Optional
+
+from .cache import get_cache_dir
+
+# Characters of output kept in memory before it is spooled to disk
+MEMORY_LIMIT = 1024 * 1024
+# Characters of the most recent output kept once output is spooled
+RING_SIZE = 64 * 1024
+# Characters of output quoted in an artifact reference
+EXCERPT_SIZE = 2048
+
+
+def artifact_path(directory: str, sha256: str) -> str:
+    """Return where an artifact with the given hash is stored."""
+    return os.path.join(directory, sha256[:2], f"{sha256}.txt")
+
+
+class OutputCapture:
+    """Collects a tool's output with bounded memory.
+
+    Output is kept in memory up to ``limit`` characters; 0 spools any
+    output. Past that it is spooled to a file in ``directory``
+    (``$ENCHANTE_CACHE_DIR/artifacts`` by default) and only the last
+    ``ring_size`` characters stay in memory.
+    :meth:`close` files the spooled output under its SHA-256, so identical
+    outputs are stored once, and sets :attr:`artifact` to a reference with
+    its path, size in bytes, hash, line count and an excerpt.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        limit: int = MEMORY_LIMIT,
+        ring_size: int = RING_SIZE,
+    ):
+        self.directory = directory
+        self.limit = limit
+        # At least the last piece of output is always kept, even with limit 0
+        self.ring_size = max(1, min(ring_size, limit))
+        self.chunks: Deque[str] = deque()
+        self.buffered = 0
+        self.lines = 0
+        self.artifact: Optional[dict] = None
+        self._file = None
+        self._spool_path: Optional[str] = None
+        self._hash = None
+        self._size = 0
+        self._excerpt = ""
+
+    @property
+    def spooled(self) -> bool:
+        return self._spool_path is not None
+
+    def write(self, text: str):
+        """Add a piece of output, such as a line with its newline."""
+        self.lines += text.count("\n")
+        self.chunks.append(text)
+        self.buffered += len(text)
+        if self._file is None:
+            if self.buffered > self.limit:
+                self._spool()
+            return
+
+        self._write(text)
+        # Keep at least ring_size characters of the most recent output
+        while (
+            len(self.chunks) > 1
+            and self.buffered - len(self.chunks[0]) >= self.ring_size
+        ):
+            self.buffered -= len(self.chunks.popleft())
+
+    def _write(self, text: str):
+        data = text.encode("utf-8", errors="replace")
+        self._file.write(data)
+        self._hash.update(data)
+        self._size += len(data)
+
+    def _spool(self):
+        """Move the output held so far to a file and keep writing there."""
+        if self.directory is None:
+            self.directory = get_cache_dir("artifacts")
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+        fd, self._spool_path = tempfile.mkstemp(prefix=".spool-", dir=self.directory)
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+
+        text = "".join(self.chunks)
+        self._excerpt = text[:EXCERPT_SIZE]
+        self._write(text)
+        self.chunks = deque([text[-self.ring_size :]])
+        self.buffered = len(self.chunks[0])
+
+    def close(self) -> str:
+        """Finish capturing and return the output still held in memory.
+
+        That is all of it unless the output was spooled, in which case it
+        is the most recent part and :attr:`artifact` points at the rest.
+        """
+        text = "".join(self.chunks)
+        if self._file is None or self._file.closed:
+            return text
+
+        self._file.close()
+        sha256 = self._hash.hexdigest()
+        path = artifact_path(self.directory, sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(self._spool_path)
+        else:
+            os.replace(self._spool_path, path)
+        self.artifact = {
+            "path": path,
+            "size": self._size,
+            "sha256": sha256,
+            "lines": self.lines,
+            "excerpt": self._excerpt,
+        }
+        return text
+
+    def discard(self):
+        """Drop a spool file that will not be used (e.g. after an error)."""
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+            os.unlink(self._spool_path)
@@ -0,0 +1,465 @@
+import hmac
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .output import compact_result
+from .process import kill_running_tools
+from .scheduler import Job
+
+# Seconds a worker holds a job before it is handed to another worker,
+# unless the worker renews the lease with a heartbeat
+LEASE_TIME = 60.0
+# Times a job is leased before it is given up as lost
+MAX_ATTEMPTS = 3
+DEFAULT_PORT = 8765
+
+
+class Coordinator:
+    """Hands out (target x module) jobs to workers and collects their results.
+
+    Workers lease jobs for ``lease_time`` seconds and renew the lease while
+    a job runs. A job whose lease runs out (its worker crashed or lost the
+    network) goes back to the queue, until it has been leased
+    ``max_attempts`` times and is reported as lost. At most ``per_target``
+    jobs against one target are leased at once.
+
+    The journal, ``on_result`` and ``compact`` work as for
+    :class:`~enchante.core.scheduler.Scheduler`. Jobs are run one by one on
+    the workers; batching and merging are not applied.
+    """
+
+    def __init__(
+        self,
+        jobs: List[Job],
+        options: Optional[dict] = None,
+        lease_time: float = LEASE_TIME,
+        max_attempts: int = MAX_ATTEMPTS,
+        per_target: Optional[int] = None,
+        journal=None,
+        on_result: Optional[Callable[[Job, dict], None]] = None,
+        compact: bool = False,
+        logger=None,
+    ):
+        self.jobs = jobs
+        self.options = options or {}
+        self.lease_time = lease_time
+        self.max_attempts = max_attempts
+        self.per_target = per_target
+        self.journal = journal
+        self.on_result = on_result
+        self.compact = compact
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.results: Dict[int, dict] = {}
+        self.attempts: Counter = Counter()
+        # Job position -> (lease id, worker, expiry)
+        self.leases: Dict[int, Tuple[str, str, float]] = {}
+        self.workers: Dict[str, float] = {}
+        self._issued: Dict[str, int] = {}
+        self._active: Counter = Counter()
+        self._changed = threading.Condition()
+
+        self.pending = deque()
+        for index, job in enumerate(jobs):
+            result = None
+            if journal is not None:
+                result = journal.get(job.target, job.module, self.job_options(job))
+            if result is not None:
+                self._finish(index, result, record=False)
+            else:
+                self.pending.append(index)
+        if self.results:
+            self.logger.info(f"Resuming: {len(self.results)} of {len(jobs)} jobs done")
+
+    def job_options(self, job: Job) -> dict:
+        options = dict(self.options)
+        options.update(job.options or {})
+        return options
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) == len(self.jobs)
+
+    def _finish(self, index: int, result: dict, record: bool = True):
+        job = self.jobs[index]
+        if record and self.journal is not None:
+            try:
+                self.journal.record(
+                    job.target, job.module, self.job_options(job), result
+                )
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Could not write to the journal: {str(e)}")
+        self.results[index] = compact_result(result) if self.compact else result
+        if self.on_result:
+            self.on_result(job, result)
+
+    def _release(self, index: int):
+        lease = self.leases.pop(index, None)
+        if lease is not None:
+            self._active[self.jobs[index].target] -= 1
+
+    def _reap(self):
+        """Requeue the jobs whose lease has run out, or give them up."""
+        now = time.time()
+        requeue = []
+        for index, (_, worker, expires) in list(self.leases.items()):
+            if expires > now:
+                continue
+            self._release(index)
+            job = self.jobs[index]
+            if self.attempts[index] >= self.max_attempts:
+                self.logger.error(
+                    f"Giving up on {job.module} on {job.target}: "
+                    f"lost {self.attempts[index]} times"
+                )
+                error = f"Job lost by workers {self.attempts[index]} times"
+                self._finish(index, {"status": "error", "error": error})
+            else:
+                self.logger.warning(
+                    f"Lease of {job.module} on {job.target} by {worker} expired"
+                )
+                requeue.append(index)
+        # Lost jobs go first, in their original order
+        self.pending.extendleft(reversed(requeue))
+
+        deadline = self.options.get("deadline")
+        if deadline and now >= deadline:
+            while self.pending:
+                self._finish(
+                    self.pending.popleft(),
+                    {"status": "timeout", "error": "Scan deadline passed before start"},
+                )
+
+    def lease(self, worker: str, count: int = 1) -> dict:
+        """Lease up to ``count`` jobs to ``worker``."""
+        with self._changed:
+            self.workers[worker] = time.time()
+            self._reap()
+            leased = []
+            deferred = deque()
+            while self.pending and len(leased) < count:
+                index = self.pending.popleft()
+                job = self.jobs[index]
+                if self.per_target and self._active[job.target] >= self.per_target:
+                    deferred.append(index)
+                    continue
+                lease_id = uuid.uuid4().hex
+                self.leases[index] = (lease_id, worker, time.time() + self.lease_time)
+                self._issued[lease_id] = index
+                self._active[job.target] += 1
+                self.attempts[index] += 1
+                leased.append(
+                    {
+                        "lease": lease_id,
+                        "target": job.target,
+                        "module": job.module,
+                        "options": self.job_options(job),
+                    }
+                )
+            deferred.extend(self.pending)
+            self.pending = deferred
+            self._changed.notify_all()
+            return {
+                "jobs": leased,
+                "lease_time": self.lease_time,
+                "done": self.done,
+            }
+
+    def renew(self, worker: str, lease_ids: List[str]) -> dict:
+        """Extend the leases a worker still holds; return those it lost."""
+        lost = []
+        with self._changed:
+            self.workers[worker] = time.time()
+            for lease_id in lease_ids:
+                index = self._issued.get(lease_id)
+                lease = self.leases.get(index)
+                if lease is None or lease[0] != lease_id:
+                    lost.append(lease_id)
+                    continue
+                self.leases[index] = (lease_id, worker, time.time() + self.lease_time)
+        return {"lost": lost}
+
+    def complete(self, worker: str, lease_id: str, result: dict) -> dict:
+        """Accept a job's result; the first result for a job wins."""
+        with self._changed:
+            self.workers[worker] = time.time()
+            index = self._issued.get(lease_id)
+            if index is None or index in self.results:
+                return {"accepted": False}
+            self._release(index)
+            if index in self.pending:
+                # Its lease had expired, but the job finished after all
+                self.pending.remove(index)
+            self._finish(index, result)
+            self._changed.notify_all()
+            return {"accepted": True}
+
+    def status(self) -> dict:
+        with self._changed:
+            return {
+                "jobs": len(self.jobs),
+                "done": len(self.results),
+                "pending": len(self.pending),
+                "leased": len(self.leases),
+                "workers": len(self.workers),
+            }
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every job has a result; return whether they all do."""
+        end = None if timeout is None else time.time() + timeout
+        with self._changed:
+            while not self.done:
+                remaining = None if end is None else end - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Wake up now and then to requeue jobs of vanished workers
+                self._changed.wait(min(remaining or 1.0, 1.0))
+                self._reap()
+        return True
+
+    def results_by_target(self) -> Dict[str, Dict[str, dict]]:
+        by_target: Dict[str, Dict[str, dict]] = {}
+        for index, job in enumerate(self.jobs):
+            if index in self.results:
+                by_target.setdefault(job.target, {})[job.module] = self.results[index]
+        return by_target
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON over HTTP: POST /lease, /renew and /result; GET /status."""
+
+    server: "CoordinatorServer"
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != "/status":
+            self._reply(404, {"error": "Not found"})
+            return
+        self._reply(200, self.server.coordinator.status())
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            worker = str(body.get("worker", self.client_address[0]))
+            coordinator = self.server.coordinator
+            if self.path == "/lease":
+                reply = coordinator.lease(worker, int(body.get("count", 1)))
+            elif self.path == "/renew":
+                reply = coordinator.renew(worker, list(body.get("leases", [])))
+            elif self.path == "/result":
+                reply = coordinator.complete(worker, body["lease"], body["result"])
+            else:
+                self._reply(404, {"error": "Not found"})
+                return
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": f"Bad request: {str(e)}"})
+            return
+        self._reply(200, reply)
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token:
+            return True
+        # Compare in constant time so the token cannot be guessed by timing
+        given = self.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(given, f"Bearer {token}".encode()):
+            self._reply(401, {"error": "Unauthorized"})
+            return False
+        return True
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        self.server.coordinator.logger.debug(
+            f"{self.client_address[0]} {format % args}"
+        )
+
+
+class CoordinatorServer(ThreadingHTTPServer):
+    """Serves a :class:`Coordinator` to workers over HTTP."""
+
+    daemon_threads = True
+
+    def __init__(self, coordinator: Coordinator, address, token: Optional[str] = None):
+        self.coordinator = coordinator
+        self.token = token
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        """Serve requests on a background thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Split ``host:port`` (or just a port) into a listening address."""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port or DEFAULT_PORT)
+
+
+class Worker:
+    """Pulls jobs from a coordinator, runs them and pushes the results back.
+
+    Up to ``jobs`` jobs run at once through ``module_manager.run_module``.
+    Leases are renewed while jobs run, so long scans are not handed to
+    another worker. The worker exits once the coordinator reports that
+    every job is done, or after ``retries`` failed attempts in a row to
+    reach it.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        module_manager,
+        jobs: int = 1,
+        name: Optional[str] = None,
+        token: Optional[str] = None,
+        poll_interval: float = 1.0,
+        retries: int = 5,
+        logger=None,
+    ):
+        self.url = url.rstrip("/")
+        self.module_manager = module_manager
+        self.jobs = max(1, jobs)
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.token = token
+        self.poll_interval = poll_interval
+        self.retries = retries
+        self.logger = logger or logging.getLogger(__name__)
+        self.completed = 0
+        self._running: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def _call(self, path: str, payload: dict) -> dict:
+        """POST to the coordinator, retrying while it cannot be reached."""
+        data = json.dumps(dict(payload, worker=self.name), default=str).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        attempt = 1
+        while True:
+            request = urllib.request.Request(self.url + path, data, headers)
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    return json.loads(response.read())
+            except urllib.error.HTTPError:
+                raise
+            except (urllib.error.URLError, OSError) as e:
+                if attempt >= self.retries:
+                    raise
+                self.logger.warning(f"Coordinator unreachable: {str(e)}")
+                attempt += 1
+                time.sleep(self.poll_interval)
+
+    def _run_job(self, lease_id: str, job: Job, options: dict):
+        try:
+            result = self.module_manager.run_module(job.module, job.target, options)
+        except Exception as e:
+            self.logger.error(
+                f"Error running module {job.module} on {job.target}: {str(e)}"
+            )
+            result = {"status": "error", "error": str(e)}
+        try:
+            self._call("/result", {"lease": lease_id, "result": result})
+            with self._lock:
+                self.completed += 1
+        except (urllib.error.URLError, OSError) as e:
+            # The lease runs out and the coordinator hands the job on
+            self.logger.error(f"Could not send result of {job.module}: {str(e)}")
+        finally:
+            with self._lock:
+                self._running.pop(lease_id, None)
+
+    def _renew(self, interval: float):
+        while not self._stopped.wait(interval):
+            with self._lock:
+                leases = list(self._running)
+            if not leases:
+                continue
+            try:
+                lost = self._call("/renew", {"leases": leases})["lost"]
+            except (urllib.error.URLError, OSError) as e:
+                self.logger.warning(f"Could not renew leases: {str(e)}")
+                continue
+            for lease_id in lost:
+                self.logger.warning(f"Lease {lease_id} was handed to another worker")
+
+    def run(self) -> int:
+        """Work until the coordinator is done; return the jobs completed."""
+        try:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                try:
+                    self._lease_jobs(executor)
+                except BaseException:
+                    # Stop the tools of running jobs; their leases run out and
+                    # the coordinator hands the jobs to other workers
+                    kill_running_tools()
+                    raise
+        finally:
+            # Only now that every job has sent its result, stop renewing
+            self._stopped.set()
+        return self.completed
+
+    def _lease_jobs(self, executor: ThreadPoolExecutor):
+        """Lease jobs into free slots until the coordinator is done."""
+        renewer = None
+        while True:
+            with self._lock:
+                free = self.jobs - len(self._running)
+            if not free:
+                time.sleep(0.05)
+                continue
+
+            try:
+                reply = self._call("/lease", {"count": free})
+            except (urllib.error.URLError, OSError) as e:
+                if renewer is None or isinstance(e, urllib.error.HTTPError):
+                    raise
+                # A coordinator that has finished stops serving
+                self.logger.warning(f"Coordinator has gone away: {str(e)}")
+                return
+            if renewer is None:
+                renewer = threading.Thread(
+                    target=self._renew, args=(reply["lease_time"] / 3,), daemon=True
+                )
+                renewer.start()
+            if reply["done"]:
+                return
+            if not reply["jobs"]:
+                time.sleep(self.poll_interval)
+                continue
+
+            for leased in reply["jobs"]:
+                job = Job(leased["target"], leased["module"])
+                self.logger.info(f"Leased {job.module} on {job.target}")
+                with self._lock:
+                    self._running[leased["lease"]] = job
+                executor.submit(self._run_job, leased["lease"], job, leased["options"])
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .result_cache import normalize_options
+
+# Results worth keeping on resume; errors, failures and timeouts run again.
+# Pipeline skips are not journalled: they follow from the discovery
+# results, so a resumed pipeline decides them again.
+RESUMABLE_STATUSES = ("completed",)
+
+
+def job_key(target: str, module: str, options: Optional[dict] = None) -> Tuple:
+    """Return the key a job is recorded under.
+
+    Jobs match when their target, module and options match. Volatile
+    options (see ``normalize_options``) and the verbosity are left out, so
+    a scan can be resumed with different limits or log levels.
+    """
+    options = {k: v for k, v in normalize_options(options).items() if k != "verbosity"}
+    return target, module, json.dumps(options, sort_keys=True)
+
+
+class Journal:
+    """Append-only JSON-lines record of finished (target, module) jobs.
+
+    Every result is written and flushed to disk as soon as its job
+    finishes, so an interrupted scan loses at most the jobs still running.
+    When opened with ``resume`` the entries already in the file are loaded
+    and jobs with a completed entry can be skipped (see :meth:`get`);
+    otherwise the file is started afresh.
+    """
+
+    def __init__(self, path: str, resume: bool = False, logger=None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self.entries: Dict[Tuple, dict] = {}
+        self._lock = threading.Lock()
+
+        if resume:
+            self.load()
+        self._file = open(path, "a" if resume else "w")
+        if resume and self._file.tell() and not self._ends_with_newline():
+            # The last record was cut short; start on a fresh line
+            self._file.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def load(self) -> int:
+        """Read the entries of an existing journal; return how many were read.
+
+        Lines that cannot be parsed, such as a record cut short by a
+        crash, are ignored. A later entry for a job replaces an earlier one.
+        """
+        count = 0
+        try:
+            f = open(self.path)
+        except FileNotFoundError:
+            return 0
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    key = job_key(entry["target"], entry["module"], entry["options"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+                self.entries[key] = entry["result"]
+                count += 1
+        self.logger.info(f"Loaded {count} journal entries from {self.path}")
+        return count
+
+    def get(
+        self, target: str, module: str, options: Optional[dict] = None
+    ) -> Optional[dict]:
+        """Return the recorded result of a job if it need not run again."""
+        result = self.entries.get(job_key(target, module, options))
+        if result is not None and result.get("status") in RESUMABLE_STATUSES:
+            return result
+        return None
+
+    def record(self, target: str, module: str, options: Optional[dict], result: dict):
+        """Append the result of a finished job and flush it to disk."""
+        entry = {
+            "time": time.time(),
+            "target": target,
+            "module": module,
+            "options": normalize_options(options),
+            "result": result,
+        }
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self.entries[job_key(target, module, options)] = result
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -2,24 +2,63 @@ import importlib
 import inspect
 import logging
 import pkgutil
-from typing import Dict, List, Optional, Type
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Type
 
+from . import registry
 from .logger import get_logger
-from .scanner import Scanner
+from .pipeline import Pipeline
+from .profiler import profile_job, profile_span
+from .registry import ModuleSpec
+from .scheduler import Scheduler
+
+if TYPE_CHECKING:
+    from .scanner import Scanner
 
 
 class ModuleManager:
     """Manages loading and running scanner modules."""
 
-    def __init__(self, verbosity: int = 0):
-        self.modules: Dict[str, Type[Scanner]] = {}
+    def __init__(self, verbosity: int = 0, result_cache=None, refresh: bool = False):
+        self.modules: Dict[str, Type["Scanner"]] = {}
+        self.specs: Dict[str, ModuleSpec] = {}
         self.verbosity = verbosity
         self.logger = get_logger("enchante.modules", verbosity)
+        # Optional ResultCache; with refresh set, cached results are
+        # ignored but fresh ones are still stored
+        self.result_cache = result_cache
+        self.refresh = refresh
+
+    def discover_modules(self, package_name: str = "enchante.modules", lazy=True):
+        """Discover all available scanner modules.
 
-    def discover_modules(self, package_name: str = "enchante.modules"):
-        """Discover and load all available scanner modules."""
+        By default scanners are only registered by name from the module
+        manifest and imported the first time they are run. Pass
+        ``lazy=False`` to import every module straight away.
+        """
         self.logger.info(f"Discovering modules in {package_name}")
+        with profile_span("discover_modules", "setup", package=package_name):
+            self._discover_modules(package_name, lazy)
+
+    def _discover_modules(self, package_name: str, lazy: bool):
+        if not lazy:
+            self._import_modules(package_name)
+            return
+
+        try:
+            specs = registry.build_manifest(package_name)
+        except ImportError as e:
+            self.logger.error(f"Error importing package {package_name}: {str(e)}")
+            specs = []
+
+        if package_name == "enchante.modules":
+            specs += registry.entry_point_specs()
 
+        for spec in specs:
+            self.specs[spec.name] = spec
+            self.logger.verbose(f"Registered scanner: {spec.name}")
+
+    def _import_modules(self, package_name: str):
+        """Import every module of a package and register its scanners."""
         try:
             package = importlib.import_module(package_name)
 
@@ -28,7 +67,7 @@ class ModuleManager:
             ):
                 if is_pkg:
                     # Recursively discover modules in subpackages
-                    self.discover_modules(name)
+                    self._import_modules(name)
                 else:
                     try:
                         module = importlib.import_module(name)
@@ -40,6 +79,8 @@ class ModuleManager:
 
     def _register_scanners_from_module(self, module):
         """Register all Scanner classes from the given module."""
+        from .scanner import Scanner
+
         for name, obj in inspect.getmembers(module):
             if (
                 inspect.isclass(obj)
@@ -47,7 +88,6 @@ class ModuleManager:
                 and obj != Scanner
                 and obj.__module__ == module.__name__
             ):
-
                 module_name = obj.__module__.split(".")[-1]
                 key = f"{module_name}.{name}"
                 self.modules[key] = obj
@@ -55,18 +95,52 @@ class ModuleManager:
 
     def get_available_modules(self) -> List[str]:
         """Return a list of all available module names."""
-        return list(self.modules.keys())
+        names = list(self.modules.keys())
+        names += [name for name in self.specs if name not in self.modules]
+        return names
+
+    def get_module_description(self, module_name: str) -> str:
+        """Return a module's one-line description without importing it."""
+        if module_name in self.specs:
+            return self.specs[module_name].description
+        doc = inspect.getdoc(self.get_module(module_name)) or ""
+        return doc.splitlines()[0] if doc else ""
+
+    def get_module(self, module_name: str) -> Type["Scanner"]:
+        """Get a module class by name, importing it on first use."""
+        from .scanner import Scanner
 
-    def get_module(self, module_name: str) -> Type[Scanner]:
-        """Get a module class by name."""
-        if module_name not in self.modules:
+        if module_name in self.modules:
+            return self.modules[module_name]
+        if module_name not in self.specs:
             raise ValueError(f"Module {module_name} not found")
-        return self.modules[module_name]
+
+        spec = self.specs[module_name]
+        self.logger.debug(f"Importing {spec.module} for module {module_name}")
+        try:
+            with profile_span(f"import {module_name}", "setup", source=spec.module):
+                module_class = registry.load_class(spec)
+        except (ImportError, AttributeError) as e:
+            raise ValueError(f"Module {module_name} could not be loaded: {str(e)}")
+
+        if not (inspect.isclass(module_class) and issubclass(module_class, Scanner)):
+            raise ValueError(f"Module {module_name} is not a Scanner")
+
+        self.modules[module_name] = module_class
+        return module_class
 
     def run_module(
         self, module_name: str, target: str, options: Optional[dict] = None
     ) -> dict:
         """Run a module by name and return its results."""
+        with profile_job(module_name, target) as span:
+            results = self._run_module(module_name, target, options)
+            span["status"] = results.get("status")
+            return results
+
+    def _run_module(
+        self, module_name: str, target: str, options: Optional[dict] = None
+    ) -> dict:
         options = options or {}
 
         # Ensure verbosity is set in options
@@ -76,12 +150,309 @@ class ModuleManager:
         self.logger.info(f"Running module {module_name} on target {target}")
 
         module_class = self.get_module(module_name)
-        scanner = module_class(target, options)
+        cache_key, cached = self._cached_result(
+            module_class, module_name, target, options
+        )
+        if cached is not None:
+            return cached
+
+        with profile_span("init", "init", module=module_name, target=target):
+            scanner = module_class(target, options)
 
         try:
-            scanner.scan()
+            with profile_span("scan", "scan", module=module_name, target=target):
+                scanner.scan()
             results = scanner.get_results()
+            self._store_result(cache_key, results)
             return results
         except Exception as e:
             self.logger.error(f"Error in module {module_name}: {str(e)}")
             return {"status": "error", "error": str(e)}
+
+    async def arun_module(
+        self, module_name: str, target: str, options: Optional[dict] = None
+    ) -> dict:
+        """Run a module by name from an event loop and return its results."""
+        with profile_job(module_name, target) as span:
+            results = await self._arun_module(module_name, target, options)
+            span["status"] = results.get("status")
+            return results
+
+    async def _arun_module(
+        self, module_name: str, target: str, options: Optional[dict] = None
+    ) -> dict:
+        options = options or {}
+
+        # Ensure verbosity is set in options
+        if "verbosity" not in options:
+            options["verbosity"] = self.verbosity
+
+        self.logger.info(f"Running module {module_name} on target {target}")
+
+        module_class = self.get_module(module_name)
+        cache_key, cached = self._cached_result(
+            module_class, module_name, target, options
+        )
+        if cached is not None:
+            return cached
+
+        with profile_span("init", "init", module=module_name, target=target):
+            scanner = module_class(target, options)
+
+        try:
+            with profile_span("scan", "scan", module=module_name, target=target):
+                await scanner.ascan()
+            results = scanner.get_results()
+            self._store_result(cache_key, results)
+            return results
+        except Exception as e:
+            self.logger.error(f"Error in module {module_name}: {str(e)}")
+            return {"status": "error", "error": str(e)}
+
+    def run_batch(self, module_name: str, target_options: Dict[str, dict]) -> dict:
+        """Run a module against several targets in one batch.
+
+        ``target_options`` maps each target to its options. Cached results
+        are reused per target and only the rest go to the module's
+        ``scan_batch``. Returns results by target.
+        """
+        module_class = self.get_module(module_name)
+        results: Dict[str, dict] = {}
+        keys: Dict[str, Optional[str]] = {}
+        pending: Dict[str, dict] = {}
+
+        for target, options in target_options.items():
+            options = dict(options)
+            options.setdefault("verbosity", self.verbosity)
+            key, cached = self._cached_result(
+                module_class, module_name, target, options
+            )
+            if cached is not None:
+                results[target] = cached
+            else:
+                keys[target] = key
+                pending[target] = options
+
+        if not pending:
+            return results
+
+        self.logger.info(
+            f"Running module {module_name} on {len(pending)} targets in one batch"
+        )
+        try:
+            label = f"{len(pending)} targets"
+            with profile_job(module_name, label, jobs=len(pending)):
+                batch = module_class.scan_batch(pending)
+        except Exception as e:
+            self.logger.error(f"Error in module {module_name}: {str(e)}")
+            batch = {target: {"status": "error", "error": str(e)} for target in pending}
+
+        for target in pending:
+            result = batch.get(target)
+            if result is None:
+                result = {"status": "error", "error": "No result from batch run"}
+            self._store_result(keys[target], result)
+            results[target] = result
+        return results
+
+    def run_merged(self, target: str, module_options: Dict[str, dict]) -> dict:
+        """Run several modules against one target, sharing one nmap run.
+
+        ``module_options`` maps module names to their options. Modules
+        whose scan can be merged (see ``NmapScanner.can_merge``) run through
+        a single nmap process; the others run on their own. Returns
+        results by module name.
+        """
+        from .nmap import run_shared_nmap
+
+        results: Dict[str, dict] = {}
+        entries = []
+        for module_name, options in module_options.items():
+            options = dict(options)
+            options.setdefault("verbosity", self.verbosity)
+            module_class = self.get_module(module_name)
+            key, cached = self._cached_result(
+                module_class, module_name, target, options
+            )
+            if cached is not None:
+                results[module_name] = cached
+            else:
+                entries.append((module_name, key, module_class(target, options)))
+
+        shared = [
+            scanner
+            for _, _, scanner in entries
+            if scanner.mergeable and scanner.can_merge()
+        ]
+        if len(shared) > 1:
+            names = ", ".join(name for name, _, s in entries if s in shared)
+            self.logger.info(f"Running {names} on {target} in one nmap run")
+            try:
+                with profile_job(f"merged {names}", target, jobs=len(shared)):
+                    run_shared_nmap(shared)
+            except Exception as e:
+                self.logger.error(f"Error in merged nmap run: {str(e)}")
+                for scanner in shared:
+                    scanner.results = {"status": "error", "error": str(e)}
+        else:
+            shared = []
+
+        for module_name, key, scanner in entries:
+            if scanner not in shared:
+                try:
+                    with profile_job(module_name, target):
+                        scanner.scan()
+                except Exception as e:
+                    self.logger.error(f"Error in module {module_name}: {str(e)}")
+                    scanner.results = {"status": "error", "error": str(e)}
+            result = scanner.get_results()
+            self._store_result(key, result)
+            results[module_name] = result
+
+        return {name: results[name] for name in module_options}
+
+    async def arun_merged(self, target: str, module_options: Dict[str, dict]) -> dict:
+        """Run :meth:`run_merged` in the event loop's executor."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.run_merged, target, module_options)
+
+    async def arun_batch(
+        self, module_name: str, target_options: Dict[str, dict]
+    ) -> dict:
+        """Run :meth:`run_batch` in the event loop's executor."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.run_batch, module_name, target_options
+        )
+
+    def _cached_result(
+        self, module_class, module_name: str, target: str, options: dict
+    ) -> Tuple[Optional[str], Optional[dict]]:
+        """Return the cache key for a run and its cached result, if any."""
+        if self.result_cache is None:
+            return None, None
+
+        from .tools import ToolManager
+
+        tool_manager = ToolManager(self.logger)
+        tool_versions = {
+            tool: tool_manager.get_tool_version(tool)
+            for tool in getattr(module_class, "tools", ())
+        }
+        key = self.result_cache.make_key(module_name, target, options, tool_versions)
+
+        if self.refresh:
+            return key, None
+
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            self.logger.warning(
+                f"Using cached result for {module_name} on {target} "
+                "(--refresh runs it again)"
+            )
+        return key, cached
+
+    def _store_result(self, key: Optional[str], results: dict):
+        """Cache a completed result; failures are always re-run."""
+        if key is not None and results.get("status") == "completed":
+            self.result_cache.set(key, results)
+
+    def run_modules(
+        self,
+        module_names: List[str],
+        target: str,
+        options: Optional[dict] = None,
+        jobs: int = 1,
+    ) -> Dict[str, dict]:
+        """Run several modules against a target, up to ``jobs`` at a time.
+
+        Results are keyed by module name in the order the modules were given.
+        An exception raised by one module is recorded as that module's
+        ``error`` and does not affect the others.
+        """
+        return self.run_targets([target], module_names, options, jobs=jobs)[target]
+
+    def run_targets(
+        self,
+        targets: List[str],
+        module_names: List[str],
+        options: Optional[dict] = None,
+        jobs: int = 1,
+        per_target: Optional[int] = None,
+        on_result=None,
+        pipeline: bool = False,
+        batch_size: int = 0,
+        merge: bool = False,
+        rate_limiter=None,
+        journal=None,
+        compact: bool = False,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Run several modules against many targets through one scheduler.
+
+        At most ``jobs`` (target, module) pairs run at once, and at most
+        ``per_target`` of them against the same target. Results are keyed
+        by target, then by module name. With ``pipeline`` set, discovery
+        modules run first and the others only where they apply (see
+        :class:`~enchante.core.pipeline.Pipeline`). A ``batch_size`` above 1
+        lets batchable modules scan up to that many targets in one run, and
+        ``merge`` combines the nmap runs of several modules on one target.
+        A ``rate_limiter`` caps the traffic of all jobs together, and a
+        :class:`~enchante.core.journal.Journal` records finished jobs so an
+        interrupted scan can be resumed. With ``compact`` set, the returned
+        results leave out raw tool output (see
+        :func:`~enchante.core.output.compact_result`); ``on_result`` still
+        sees each result in full.
+        """
+        scheduler = Scheduler(
+            self,
+            jobs=jobs,
+            per_target=per_target,
+            batch_size=batch_size,
+            merge=merge,
+            rate_limiter=rate_limiter,
+            journal=journal,
+            compact=compact,
+            logger=self.logger,
+        )
+        if pipeline:
+            return Pipeline(self, scheduler, logger=self.logger).run(
+                targets, module_names, options, on_result=on_result
+            )
+        return scheduler.run(targets, module_names, options, on_result=on_result)
+
+    async def arun_targets(
+        self,
+        targets: List[str],
+        module_names: List[str],
+        options: Optional[dict] = None,
+        jobs: int = 1,
+        per_target: Optional[int] = None,
+        on_result=None,
+        pipeline: bool = False,
+        batch_size: int = 0,
+        merge: bool = False,
+        rate_limiter=None,
+        journal=None,
+        compact: bool = False,
+    ) -> Dict[str, Dict[str, dict]]:
+        """Async counterpart of :meth:`run_targets` driven by one event loop."""
+        scheduler = Scheduler(
+            self,
+            jobs=jobs,
+            per_target=per_target,
+            batch_size=batch_size,
+            merge=merge,
+            rate_limiter=rate_limiter,
+            journal=journal,
+            compact=compact,
+            logger=self.logger,
+        )
+        if pipeline:
+            return await Pipeline(self, scheduler, logger=self.logger).arun(
+                targets, module_names, options, on_result=on_result
+            )
+        return await scheduler.arun(targets, module_names, options, on_result=on_result)
@@ -0,0 +1,509 @@
+import fnmatch
+import ipaddress
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .connect_scan import parse_ports
+from .scanner import Scanner
+
+
+def _script_data(elem) -> Any:
+    """Convert the <elem>/<table> children of a script element to Python data."""
+    children = list(elem)
+    if not children:
+        return None
+
+    keyed = all(child.get("key") is not None for child in children)
+    values = [
+        child.text if child.tag == "elem" else _script_data(child) for child in children
+    ]
+    if keyed:
+        return {child.get("key"): value for child, value in zip(children, values)}
+    return values
+
+
+def script_record(elem) -> dict:
+    """Return a compact record for an nmap <script> element."""
+    record = {"output": (elem.get("output") or "").strip()}
+    data = _script_data(elem)
+    if data:
+        record["data"] = data
+    return record
+
+
+def port_record(elem) -> dict:
+    """Return a compact record for an nmap <port> element."""
+    record = {"port": elem.get("portid"), "protocol": elem.get("protocol")}
+
+    state = elem.find("state")
+    record["state"] = state.get("state") if state is not None else "unknown"
+
+    service = elem.find("service")
+    record["service"] = "unknown"
+    if service is not None:
+        name = service.get("name", "unknown")
+        if service.get("tunnel"):
+            name = f"{service.get('tunnel')}/{name}"
+        record["service"] = name
+        for key in ("product", "version", "extrainfo"):
+            if service.get(key):
+                record[key] = service.get(key)
+
+    scripts = {s.get("id"): script_record(s) for s in elem.findall("script")}
+    if scripts:
+        record["scripts"] = scripts
+    return record
+
+
+def host_record(elem) -> dict:
+    """Return a compact record for an nmap <host> element."""
+    addresses = {a.get("addrtype"): a.get("addr") for a in elem.findall("address")}
+    status = elem.find("status")
+    record = {
+        "address": addresses.get("ipv4") or addresses.get("ipv6"),
+        "hostnames": [
+            {"name": h.get("name"), "type": h.get("type")}
+            for h in elem.findall("hostnames/hostname")
+        ],
+        "status": status.get("state") if status is not None else "unknown",
+        "ports": [port_record(p) for p in elem.findall("ports/port")],
+    }
+    if addresses.get("mac"):
+        record["mac"] = addresses["mac"]
+
+    scripts = {s.get("id"): script_record(s) for s in elem.findall("hostscript/script")}
+    if scripts:
+        record["scripts"] = scripts
+    return record
+
+
+def host_matches(host: dict, target: str) -> bool:
+    """Check whether a host record belongs to a target.
+
+    The target may be the host's address, one of its hostnames or a
+    network containing it.
+    """
+    if host.get("address") == target:
+        return True
+    if any(h["name"] == target for h in host.get("hostnames", [])):
+        return True
+    if "/" in target and host.get("address"):
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+            return ipaddress.ip_address(host["address"]) in network
+        except ValueError:
+            return False
+    return False
+
+
+def compress_ports(ports: Iterable[int]) -> str:
+    """Write a set of ports as a compact nmap port list (``22,80-90``)."""
+    ranges: List[List[int]] = []
+    for port in sorted(set(ports)):
+        if ranges and port == ranges[-1][1] + 1:
+            ranges[-1][1] = port
+        else:
+            ranges.append([port, port])
+    return ",".join(
+        str(first) if first == last else f"{first}-{last}" for first, last in ranges
+    )
+
+
+def merge_port_specs(specs: Iterable[str]) -> str:
+    """Return one port list covering every spec in ``specs``."""
+    specs = list(dict.fromkeys(specs))
+    if len(specs) == 1:
+        return specs[0]
+    ports: Set[int] = set()
+    for spec in specs:
+        ports.update(parse_ports(spec))
+    return compress_ports(ports)
+
+
+def _script_selected(script_id: str, patterns: List[str]) -> bool:
+    for pattern in patterns:
+        # Categories such as "default" or "vuln" cannot be matched by name
+        if "-" not in pattern and "*" not in pattern:
+            return True
+        if fnmatch.fnmatchcase(script_id, pattern):
+            return True
+    return False
+
+
+def slice_host(host: dict, ports: Optional[Set[int]], scripts: List[str]) -> dict:
+    """Return the part of a host record that one module asked nmap for.
+
+    Only ports in ``ports`` (all if None) are kept, and only the output of
+    scripts matching ``scripts``.
+    """
+
+    def _scripts(record: dict) -> dict:
+        record = dict(record)
+        selected = {
+            name: output
+            for name, output in record.pop("scripts", {}).items()
+            if _script_selected(name, scripts)
+        }
+        if selected:
+            record["scripts"] = selected
+        return record
+
+    sliced = _scripts(host)
+    sliced["ports"] = [
+        _scripts(port)
+        for port in host["ports"]
+        if ports is None or int(port["port"]) in ports
+    ]
+    return sliced
+
+
+class NmapXmlParser:
+    """Incremental parser for nmap XML output (``-oX -``).
+
+    Data can be fed in arbitrary chunks as nmap produces it. Each <host>
+    element is turned into a compact record as soon as it is complete and
+    then dropped from the tree, so memory stays bounded on huge scans.
+    """
+
+    def __init__(self, on_host: Optional[Callable[[dict], None]] = None):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._depth = 0
+        self.on_host = on_host
+        self.hosts: List[dict] = []
+        self.error: Optional[str] = None
+
+    def feed(self, data: str):
+        """Parse another chunk of XML."""
+        self._parser.feed(data)
+        self._process_events()
+
+    def close(self) -> List[dict]:
+        """Finish parsing and return the host records collected so far."""
+        try:
+            self._parser.close()
+        except ET.ParseError:
+            # nmap was killed or failed before closing its output
+            if self.error is None:
+                self.error = "Incomplete nmap XML output"
+        self._process_events()
+        return self.hosts
+
+    def _process_events(self):
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                self._depth += 1
+                continue
+
+            self._depth -= 1
+            if elem.tag == "host":
+                record = host_record(elem)
+                if self.on_host:
+                    self.on_host(record)
+                self.hosts.append(record)
+            elif elem.tag == "finished" and elem.get("exit") == "error":
+                self.error = elem.get("errormsg") or "nmap reported an error"
+
+            # Drop finished top-level elements (hosts, progress reports)
+            if self._depth == 1:
+                self._root.remove(elem)
+
+
+def parse_nmap_xml(source) -> List[dict]:
+    """Parse a complete nmap XML document from a string or file object."""
+    parser = NmapXmlParser()
+    if isinstance(source, str):
+        parser.feed(source)
+    else:
+        for chunk in iter(lambda: source.read(64 * 1024), ""):
+            parser.feed(chunk)
+    return parser.close()
+
+
+def parse_nmap_text_line(line: str) -> Optional[dict]:
+    """Parse a port line of nmap's normal output, e.g. ``22/tcp open ssh``."""
+    parts = line.strip().split()
+    if len(parts) < 2 or "/" not in parts[0]:
+        return None
+
+    port, _, protocol = parts[0].partition("/")
+    if not port.isdigit() or protocol not in ("tcp", "udp", "sctp"):
+        return None
+
+    return {
+        "port": port,
+        "protocol": protocol,
+        "state": parts[1],
+        "service": parts[2] if len(parts) > 2 else "unknown",
+    }
+
+
+def build_nmap_command(
+    targets: Iterable[str],
+    ports: Optional[str] = None,
+    scripts: Iterable[str] = (),
+    flags: Iterable[str] = (),
+) -> str:
+    """Build an nmap command line that writes XML to stdout."""
+    command = ["nmap"]
+    if ports:
+        command.append(f"-p{ports}")
+    command.extend(flags)
+    scripts = list(scripts)
+    if scripts:
+        command.extend(["--script", ",".join(scripts)])
+    command.extend(["-oX", "-"])
+    command.extend(targets)
+    return " ".join(command)
+
+
+class NmapScanner(Scanner):
+    """Base class for modules that run nmap and read its XML output.
+
+    Subclasses describe the scan through :meth:`nmap_ports`,
+    :meth:`nmap_scripts` and :meth:`nmap_flags` and build their results
+    from the parsed host records in :meth:`nmap_completed`. Output that is
+    not XML (for example from an older nmap wrapper) falls back to parsing
+    port lines of the normal text output.
+
+    Because the scan is described rather than run by each module, the
+    scheduler can batch many targets into one nmap run (see
+    :meth:`scan_batch`) and merge the runs of several modules against the
+    same target (see :func:`run_shared_nmap`).
+    """
+
+    tools = ("nmap",)
+    batchable = True
+    mergeable = True
+    # Pipeline port details are not used to build the nmap command
+    batch_ignored_options = ("open_ports",)
+
+    def __init__(self, target, options=None):
+        super().__init__(target, options)
+        self.nmap_hosts: List[dict] = []
+        self._nmap_parser: Optional[NmapXmlParser] = None
+        self._nmap_mode: Optional[str] = None
+        self._text_host: Optional[dict] = None
+
+    def retains_output(self, tool_name: str) -> bool:
+        # Host records replace the raw nmap text, which is only kept for -vv
+        if tool_name == "nmap":
+            return self.verbosity >= 2
+        return super().retains_output(tool_name)
+
+    def nmap_ports(self) -> Optional[str]:
+        """Return the port specification to scan."""
+        return None
+
+    def nmap_scripts(self) -> List[str]:
+        """Return the NSE scripts to run."""
+        return []
+
+    def nmap_flags(self) -> List[str]:
+        """Return extra nmap flags (scan type, timing, verbosity)."""
+        return []
+
+    def nmap_rate_flags(self) -> List[str]:
+        """Return the flags that keep nmap within the module's rate share."""
+        if not self.tool_rate:
+            return []
+        return ["--max-rate", f"{self.tool_rate:g}"]
+
+    def nmap_command(self, targets: Optional[List[str]] = None) -> str:
+        """Return the nmap command line for this module."""
+        return build_nmap_command(
+            targets or [self.target],
+            ports=self.nmap_ports(),
+            scripts=self.nmap_scripts(),
+            flags=self.nmap_flags() + self.nmap_rate_flags(),
+        )
+
+    def uses_nmap(self) -> bool:
+        """Return whether this run goes through nmap (and can be batched)."""
+        return True
+
+    def can_merge(self) -> bool:
+        """Return whether this run can share an nmap process with others.
+
+        That needs an explicit port list without protocol prefixes, so the
+        ports of several modules can be combined.
+        """
+        ports = self.nmap_ports()
+        return self.uses_nmap() and bool(ports) and ":" not in str(ports)
+
+    def on_nmap_host(self, host: dict):
+        """Handle a host record as soon as nmap has finished with it."""
+
+    def nmap_completed(self, result: Dict[str, Any]) -> dict:
+        """Build ``self.results`` once nmap has run.
+
+        ``result`` is the run_tool result of the nmap run; the parsed hosts
+        are in ``self.nmap_hosts``.
+        """
+        if self.tool_failed(result):
+            error = result.get("error") or result["stderr"]
+            self.logger.error(f"Nmap scan failed: {error}")
+            self.results = {"status": "failed", "error": error}
+            return self.results
+
+        self.results = {
+            "status": "completed",
+            "nmap_scan": self.host_for(),
+            "raw_output": self.tool_output(result) if self.verbosity >= 2 else None,
+        }
+        return self.results
+
+    def scan(self):
+        """Run nmap and build the results from its output."""
+        return self.nmap_completed(self.run_nmap())
+
+    @classmethod
+    def scan_batch(cls, target_options: Dict[str, dict]) -> Dict[str, dict]:
+        """Scan several targets sharing the same options with one nmap run."""
+        scanners = [cls(target, options) for target, options in target_options.items()]
+        if len(scanners) == 1 or not scanners[0].uses_nmap():
+            return super().scan_batch(target_options)
+        run_shared_nmap(scanners)
+        return {scanner.target: scanner.get_results() for scanner in scanners}
+
+    def run_nmap(
+        self,
+        targets: Optional[List[str]] = None,
+        on_host: Optional[Callable[[dict], None]] = None,
+        command: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Run nmap and parse its output into ``self.nmap_hosts``.
+
+        Returns the run_tool result, with ``error`` set when nmap reported
+        a failure in its XML output. ``on_host`` replaces the default
+        handling of each host record, and ``command`` the module's own
+        nmap command line.
+        """
+        self._start_nmap_parse(on_host)
+        result = self.run_tool("nmap", command or self.nmap_command(targets))
+        if not result.get("parsed"):
+            self.feed_output("nmap", result["stdout"])
+        error = self._finish_nmap_parse()
+        if error:
+            result["success"] = False
+            result["error"] = error
+        return result
+
+    def _start_nmap_parse(self, on_host=None):
+        self.nmap_hosts = []
+        self._nmap_parser = NmapXmlParser(on_host=on_host or self._record_host)
+        self._nmap_mode = None
+        self._text_host = None
+
+    def _finish_nmap_parse(self) -> Optional[str]:
+        if self._nmap_mode == "xml":
+            self._nmap_parser.close()
+            return self._nmap_parser.error
+        if self._text_host is not None:
+            self._record_host(self._text_host)
+        return None
+
+    def _record_host(self, host: dict):
+        self.nmap_hosts.append(host)
+        self.on_nmap_host(host)
+
+    def parse_output_line(self, tool_name, line):
+        """Feed nmap output to the XML parser (or the text fallback)."""
+        if tool_name != "nmap" or self._nmap_parser is None:
+            return
+
+        if self._nmap_mode is None:
+            if not line.strip():
+                return
+            self._nmap_mode = "xml" if line.lstrip().startswith("<") else "text"
+
+        if self._nmap_mode == "xml":
+            self._nmap_parser.feed(line + "\n")
+            return
+
+        port = parse_nmap_text_line(line)
+        if port is not None:
+            if self._text_host is None:
+                self._text_host = {
+                    "address": self.target,
+                    "hostnames": [],
+                    "status": "up",
+                    "ports": [],
+                }
+            self._text_host["ports"].append(port)
+
+    def host_for(self, target: Optional[str] = None) -> Optional[dict]:
+        """Return the host record matching a target (address or hostname)."""
+        target = target or self.target
+        for host in self.nmap_hosts:
+            if host_matches(host, target):
+                return host
+        return self.nmap_hosts[0] if len(self.nmap_hosts) == 1 else None
+
+
+def run_shared_nmap(scanners: List[NmapScanner]):
+    """Run one nmap process for several scanners and complete each of them.
+
+    The scanners may target different hosts (a batch, passed to nmap as a
+    host list) and come from different modules (a merged run). The run
+    covers the union of their ports, scripts and flags. Each host record
+    is handed to every scanner whose target it belongs to, cut down to the
+    ports and scripts that scanner asked for, then each scanner builds its
+    results from the shared run.
+    """
+    driver = scanners[0]
+    targets = list(dict.fromkeys(scanner.target for scanner in scanners))
+    port_specs = [scanner.nmap_ports() for scanner in scanners]
+    ports = merge_port_specs(port_specs) if all(port_specs) else port_specs[0]
+    scripts: List[str] = []
+    flags: List[str] = []
+    for scanner in scanners:
+        scripts.extend(s for s in scanner.nmap_scripts() if s not in scripts)
+        flags.extend(f for f in scanner.nmap_flags() if f not in flags)
+
+    # What to cut out of each host record; None when nothing needs cutting
+    slices = []
+    for scanner, spec in zip(scanners, port_specs):
+        if spec == ports and scanner.nmap_scripts() == scripts:
+            slices.append(None)
+            continue
+        own_ports = set(parse_ports(spec)) if spec and spec != ports else None
+        slices.append((own_ports, scanner.nmap_scripts()))
+
+    for scanner in scanners:
+        scanner._start_nmap_parse()
+
+    def _dispatch(host: dict):
+        owners = [
+            (scanner, cut)
+            for scanner, cut in zip(scanners, slices)
+            if host_matches(host, scanner.target)
+        ]
+        if not owners:
+            driver.logger.debug(f"Ignoring nmap host {host.get('address')}")
+        for scanner, cut in owners:
+            scanner._record_host(host if cut is None else slice_host(host, *cut))
+
+    host_list = None
+    target_args = targets
+    if len(targets) > 1:
+        fd, host_list = tempfile.mkstemp(prefix="enchante-", suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(targets) + "\n")
+        target_args = ["-iL", host_list]
+
+    flags.extend(driver.nmap_rate_flags())
+    command = build_nmap_command(target_args, ports, scripts, flags)
+    try:
+        result = driver.run_nmap(on_host=_dispatch, command=command)
+    finally:
+        if host_list:
+            os.unlink(host_list)
+
+    for scanner in scanners:
+        scanner.timed_out = scanner.timed_out or bool(result.get("timed_out"))
+        scanner.nmap_completed(dict(result))
@@ -0,0 +1,91 @@
+import atexit
+import os
+import signal
+import subprocess
+import threading
+from typing import Optional, Set
+
+# Seconds a tool gets to exit after SIGTERM before it is killed
+KILL_GRACE = 2.0
+
+# Process groups of the tools currently running
+_groups: Set[int] = set()
+_groups_lock = threading.Lock()
+
+# Each tool runs in a session (and process group) of its own, so that it
+# and any children it starts can be stopped together
+SESSION_KWARGS = {"start_new_session": True} if hasattr(os, "killpg") else {}
+
+
+def track(process):
+    """Remember a tool's process group until :func:`untrack` is called."""
+    if SESSION_KWARGS:
+        with _groups_lock:
+            _groups.add(process.pid)
+
+
+def untrack(process):
+    with _groups_lock:
+        _groups.discard(process.pid)
+
+
+def signal_group(process, sig: Optional[int] = None):
+    """Send ``sig`` (default SIGKILL) to a tool's whole process group.
+
+    Falls back to signalling the process itself where process groups are
+    not available. A group that has already exited is ignored.
+    """
+    try:
+        if SESSION_KWARGS:
+            os.killpg(process.pid, signal.SIGKILL if sig is None else sig)
+        elif sig is None:
+            process.kill()
+        else:
+            process.send_signal(sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def terminate_group(process, grace: float = KILL_GRACE):
+    """Ask a tool's process group to exit, and kill it after ``grace`` seconds.
+
+    Works on a :class:`subprocess.Popen` and blocks until the tool has
+    exited.
+    """
+    signal_group(process, signal.SIGTERM)
+    try:
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        signal_group(process)
+        process.wait()
+    # Children that ignored SIGTERM may outlive the tool itself
+    signal_group(process)
+
+
+async def aterminate_group(process, grace: float = KILL_GRACE):
+    """Async version of :func:`terminate_group` for asyncio subprocesses."""
+    import asyncio
+
+    signal_group(process, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), grace)
+    except asyncio.TimeoutError:
+        signal_group(process)
+        await process.wait()
+    signal_group(process)
+
+
+def kill_running_tools() -> int:
+    """Kill the process group of every tool still running; return how many."""
+    with _groups_lock:
+        groups = list(_groups)
+        _groups.clear()
+    for pgid in groups:
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    return len(groups)
+
+
+atexit.register(kill_running_tools)
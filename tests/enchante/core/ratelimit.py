@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Token bucket allowing ``rate`` operations per second on average.
+
+    Up to ``burst`` tokens can be spent at once. The bucket is thread-safe
+    and can be used from synchronous code (:meth:`acquire`) and from an
+    event loop (:meth:`aacquire`). Callers reserve their tokens up front,
+    so waiting callers are served in order rather than racing each other.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst) if burst else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take ``tokens`` and return how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1):
+        """Block until ``tokens`` may be spent."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: float = 1):
+        """Wait in the event loop until ``tokens`` may be spent."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """A global token bucket combined with one bucket per target.
+
+    Either limit may be None to leave it unbounded.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        per_target: Optional[float] = None,
+        burst: Optional[float] = None,
+    ):
+        self.rate = rate
+        self.per_target = per_target
+        self.burst = burst
+        self._global = TokenBucket(rate, burst) if rate else None
+        self._targets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _target_bucket(self, target: str) -> Optional[TokenBucket]:
+        if not self.per_target:
+            return None
+        with self._lock:
+            bucket = self._targets.get(target)
+            if bucket is None:
+                bucket = TokenBucket(self.per_target, self.burst)
+                self._targets[target] = bucket
+            return bucket
+
+    def reserve(self, target: Optional[str] = None, tokens: float = 1) -> float:
+        """Take tokens from both buckets and return the longer wait."""
+        delay = self._global.reserve(tokens) if self._global else 0.0
+        bucket = self._target_bucket(target) if target is not None else None
+        if bucket is not None:
+            delay = max(delay, bucket.reserve(tokens))
+        return delay
+
+    def acquire(self, target: Optional[str] = None, tokens: float = 1):
+        """Block until ``tokens`` may be spent against ``target``."""
+        delay = self.reserve(target, tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, target: Optional[str] = None, tokens: float = 1):
+        """Wait in the event loop until ``tokens`` may be spent against ``target``."""
+        delay = self.reserve(target, tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def limiter_from_options(options: dict) -> Optional[RateLimiter]:
+    """Return the rate limiter a module should use.
+
+    That is the shared limiter handed out by the scheduler, or one built
+    from the module's own ``rate`` and ``rate_per_target`` options.
+    """
+    limiter = options.get("_rate_limiter")
+    if limiter is not None:
+        return limiter
+    rate, per_target = options.get("rate"), options.get("rate_per_target")
+    if rate or per_target:
+        return RateLimiter(rate, per_target)
+    return None
+
+
+def tool_rate(options: dict) -> Optional[float]:
+    """Return the rate an external tool run by a module may use.
+
+    The scheduler splits the global and per-target limits between the jobs
+    it runs at once and passes the share as ``_tool_rate``. A module run
+    on its own gets its full ``rate``/``rate_per_target``.
+    """
+    if options.get("_tool_rate"):
+        return float(options["_tool_rate"])
+    limits = [float(options[k]) for k in ("rate", "rate_per_target") if options.get(k)]
+    return min(limits) if limits else None
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .cache import get_cache_dir, read_json, write_json_atomic
+
+# Options that only affect how a module runs, not what it finds
+VOLATILE_OPTIONS = {
+    "deadline",
+    "max_time",
+    "timeout",
+    "rate",
+    "rate_per_target",
+    "artifact_dir",
+    "output_limit",
+}
+
+
+def normalize_options(options: Optional[dict]) -> Dict[str, Any]:
+    """Return module options in a stable, JSON-serialisable form."""
+    normalized = {}
+    for key, value in (options or {}).items():
+        if key in VOLATILE_OPTIONS or key.startswith("_"):
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(value, key=str) if isinstance(value, set) else list(value)
+        normalized[key] = value
+    return json.loads(json.dumps(normalized, sort_keys=True, default=str))
+
+
+class ResultCache:
+    """On-disk cache of module results with TTL and size-based eviction.
+
+    Entries are keyed by module name, target, normalised options and the
+    versions of the tools the module uses, so upgrading a tool or changing
+    an option never returns a stale result.
+
+    The cache directory is swept at most every ``evict_interval`` seconds,
+    or sooner once the entries written since the last sweep may exceed
+    ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        ttl: float = 3600,
+        max_entries: int = 1000,
+        max_bytes: int = 256 * 1024 * 1024,
+        evict_interval: float = 60,
+        logger=None,
+    ):
+        self.directory = directory or get_cache_dir("results")
+        os.makedirs(self.directory, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._next_evict = 0.0
+        # Entries found by the last sweep plus those written since
+        self._entries = 0
+
+    @staticmethod
+    def make_key(
+        module_name: str,
+        target: str,
+        options: Optional[dict] = None,
+        tool_versions: Optional[Dict[str, Optional[str]]] = None,
+    ) -> str:
+        """Return the cache key for one module run."""
+        payload = json.dumps(
+            {
+                "module": module_name,
+                "target": target,
+                "options": normalize_options(options),
+                "tools": tool_versions or {},
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a cached result, or None if missing or expired."""
+        path = self._path(key)
+        entry = read_json(path)
+        if not entry:
+            return None
+
+        if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            return None
+
+        # Mark the entry as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry.get("result")
+
+    def set(self, key: str, result: dict):
+        """Store a result and evict old entries if the cache is over its limits."""
+        try:
+            entry = {"created": time.time(), "result": result}
+            write_json_atomic(self._path(key), entry)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not cache result: {str(e)}")
+            return
+
+        with self._lock:
+            self._entries += 1
+            due = time.time() >= self._next_evict or self._entries > self.max_entries
+        if due:
+            self.evict()
+
+    @staticmethod
+    def _is_entry(name: str) -> bool:
+        # Skips the temporary files of writes still in progress
+        return name.endswith(".json") and not name.startswith(".")
+
+    def evict(self):
+        """Drop expired entries, then the least recently used beyond the limits."""
+        with self._lock:
+            now = time.time()
+            self._next_evict = now + self.evict_interval
+            self._sweep(now)
+
+    def _sweep(self, now: float):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not self._is_entry(name):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        count = len(entries)
+
+        for mtime, size, path in entries:
+            expired = self.ttl is not None and now - mtime > self.ttl
+            over_limit = count > self.max_entries or total_bytes > self.max_bytes
+            if not expired and not over_limit:
+                continue
+            self._remove(path)
+            count -= 1
+            total_bytes -= size
+        self._entries = count
+
+    def clear(self):
+        """Remove every cached result."""
+        for name in os.listdir(self.directory):
+            if self._is_entry(name):
+                self._remove(os.path.join(self.directory, name))
+        with self._lock:
+            self._entries = 0
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
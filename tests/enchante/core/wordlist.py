@@ -0,0 +1,309 @@
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from itertools import compress
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .cache import get_cache_dir, write_bytes_atomic
+
+INDEX_MAGIC = b"ENCWL001"
+INDEX_HEADER = struct.Struct("<8sQ")
+
+# Entries sorted in memory at once while de-duplicating; larger lists are
+# sorted in runs of this size on disk and merged
+RUN_SIZE = 1 << 20
+
+# Loaded indexes, shared by every Wordlist in the process
+_indexes: Dict[str, "WordlistIndex"] = {}
+_indexes_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def entry_hash(entry: bytes) -> int:
+    """Return the 64-bit hash used to de-duplicate wordlist entries."""
+    return int.from_bytes(hashlib.blake2b(entry, digest_size=8).digest(), "little")
+
+
+def _contains(sorted_hashes, value: int) -> bool:
+    i = bisect_left(sorted_hashes, value)
+    return i < len(sorted_hashes) and sorted_hashes[i] == value
+
+
+def _sorted_run(hashes, start: int, end: int) -> Tuple[array, array]:
+    """Return the hashes in ``start:end`` sorted, and their positions."""
+    chunk = hashes[start:end]
+    # The sort is stable, so equal hashes stay in position order
+    order = sorted(range(len(chunk)), key=chunk.__getitem__)
+    return array("Q", map(chunk.__getitem__, order)), array(
+        "Q", map(start.__add__, order)
+    )
+
+
+def _read_run(files: Tuple[IO[bytes], IO[bytes]]) -> Iterator[Tuple[int, int]]:
+    """Yield the ``(hash, position)`` pairs of a run spilled to disk."""
+    for f in files:
+        f.seek(0)
+    while True:
+        values, positions = array("Q"), array("Q")
+        values.frombytes(files[0].read(8 * 65536))
+        positions.frombytes(files[1].read(8 * 65536))
+        if not values:
+            return
+        yield from zip(values, positions)
+
+
+def _dedupe(hashes, run_size: Optional[int] = None) -> Tuple[bytearray, array]:
+    """Find the first occurrence of every hash with a bounded external sort.
+
+    Hashes are sorted ``run_size`` at a time; when there is more than one
+    run, the runs are spilled to temporary files and merged. Return a mask
+    of the positions to keep and the unique hashes in sorted order.
+    """
+    run_size = run_size or RUN_SIZE
+    keep = bytearray(len(hashes))
+    sorted_hashes = array("Q")
+    spilled: List[Tuple[IO[bytes], IO[bytes]]] = []
+    try:
+        if len(hashes) <= run_size:
+            pairs = zip(*_sorted_run(hashes, 0, len(hashes)))
+        else:
+            for start in range(0, len(hashes), run_size):
+                files = (tempfile.TemporaryFile(), tempfile.TemporaryFile())
+                spilled.append(files)
+                for f, values in zip(
+                    files, _sorted_run(hashes, start, start + run_size)
+                ):
+                    values.tofile(f)
+            pairs = heapq.merge(*(_read_run(files) for files in spilled))
+
+        previous = None
+        for value, position in pairs:
+            # Pairs of one hash arrive in position order: keep the first
+            if value != previous:
+                keep[position] = 1
+                sorted_hashes.append(value)
+                previous = value
+    finally:
+        for files in spilled:
+            for f in files:
+                f.close()
+    return keep, sorted_hashes
+
+
+class WordlistIndex:
+    """Offsets, lengths and hashes of the unique entries of one wordlist.
+
+    Blank lines and ``#`` comments are left out, and duplicate entries
+    are kept only at their first occurrence. The index is stored as flat
+    arrays (16 bytes per entry plus 8 for the sorted hashes) and read
+    back through mmap, so loading it costs neither time nor memory.
+    """
+
+    def __init__(self, path: str, offsets, lengths, hashes, sorted_hashes):
+        self.path = path
+        self.offsets = offsets
+        self.lengths = lengths
+        self.hashes = hashes
+        self.sorted_hashes = sorted_hashes
+        self._data: Optional[mmap.mmap] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, value: int) -> bool:
+        return _contains(self.sorted_hashes, value)
+
+    @classmethod
+    def build(cls, path: str) -> "WordlistIndex":
+        """Read a wordlist once and index its unique entries.
+
+        Duplicates are found by sorting the hashes rather than keeping a
+        set of them, so memory stays at the flat arrays even for lists
+        of hundreds of millions of lines.
+        """
+        offsets, lengths, hashes = array("Q"), array("I"), array("Q")
+        position = 0
+        with open(path, "rb") as f:
+            for line in f:
+                start = position
+                position += len(line)
+                entry = line.strip()
+                if not entry or entry.startswith(b"#"):
+                    continue
+                # Skip leading whitespace so the entry can be sliced directly
+                offsets.append(start + len(line) - len(line.lstrip()))
+                lengths.append(len(entry))
+                hashes.append(entry_hash(entry))
+
+        keep, sorted_hashes = _dedupe(hashes)
+        if len(sorted_hashes) < len(hashes):
+            offsets = array("Q", compress(offsets, keep))
+            lengths = array("I", compress(lengths, keep))
+            hashes = array("Q", compress(hashes, keep))
+        return cls(path, offsets, lengths, hashes, sorted_hashes)
+
+    def to_bytes(self) -> bytes:
+        count = len(self.offsets)
+        lengths = self.lengths.tobytes()
+        padding = b"\0" * (-len(lengths) % 8)
+        return b"".join(
+            [
+                INDEX_HEADER.pack(INDEX_MAGIC, count),
+                self.offsets.tobytes(),
+                lengths + padding,
+                self.hashes.tobytes(),
+                self.sorted_hashes.tobytes(),
+            ]
+        )
+
+    @classmethod
+    def from_file(cls, path: str, index_path: str) -> Optional["WordlistIndex"]:
+        """Map a stored index, or return None if it is missing or invalid."""
+        try:
+            with open(index_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < INDEX_HEADER.size:
+                    return None
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        magic, count = INDEX_HEADER.unpack_from(data)
+        lengths_size = count * 4 + (-count * 4 % 8)
+        if magic != INDEX_MAGIC or len(data) != (
+            INDEX_HEADER.size + count * 24 + lengths_size
+        ):
+            data.close()
+            return None
+
+        view = memoryview(data)
+        position = INDEX_HEADER.size
+        offsets = view[position : position + count * 8].cast("Q")
+        position += count * 8
+        lengths = view[position : position + count * 4].cast("I")
+        position += lengths_size
+        hashes = view[position : position + count * 8].cast("Q")
+        position += count * 8
+        sorted_hashes = view[position : position + count * 8].cast("Q")
+        return cls(path, offsets, lengths, hashes, sorted_hashes)
+
+    def entries(self) -> Iterator[bytes]:
+        """Yield the unique entries, read lazily from the mapped wordlist."""
+        if self._data is None:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self._data
+        for offset, length in zip(self.offsets, self.lengths):
+            yield data[offset : offset + length]
+
+
+def _index_path(path: str) -> str:
+    st = os.stat(path)
+    key = (
+        f"{os.path.realpath(path)}:{st.st_size}:{st.st_mtime_ns}:{sys.byteorder}"
+    ).encode()
+    name = hashlib.sha1(key).hexdigest()
+    return os.path.join(get_cache_dir("wordlists"), f"{name}.idx")
+
+
+def load_index(path: str, use_cache: bool = True) -> WordlistIndex:
+    """Return the index of a wordlist, building and caching it if needed.
+
+    The on-disk cache is keyed by the file's path, size and mtime, so an
+    index is reused across targets and runs until the list changes.
+    """
+    if not use_cache:
+        return WordlistIndex.build(path)
+
+    try:
+        index_path = _index_path(path)
+    except OSError:
+        return WordlistIndex.build(path)
+
+    with _indexes_lock:
+        index = _indexes.get(index_path)
+        if index is not None:
+            return index
+
+        index = WordlistIndex.from_file(path, index_path)
+        if index is None:
+            logger.debug(f"Indexing wordlist {path}")
+            index = WordlistIndex.build(path)
+            try:
+                write_bytes_atomic(index_path, index.to_bytes())
+            except OSError as e:
+                logger.debug(f"Could not write wordlist index: {str(e)}")
+        _indexes[index_path] = index
+        return index
+
+
+class Wordlist:
+    """One or more wordlists streamed as a single de-duplicated list.
+
+    Entries are read through mmap as they are consumed. An entry already
+    seen in an earlier list is skipped, and every entry is followed by
+    its variants with each of ``extensions`` appended, unless a variant
+    is itself an entry of one of the lists.
+    """
+
+    def __init__(
+        self,
+        paths: Union[str, Iterable[str]],
+        extensions: Union[str, Iterable[str], None] = None,
+        use_cache: bool = True,
+    ):
+        if isinstance(paths, str):
+            paths = paths.split(",")
+        if isinstance(extensions, str):
+            extensions = extensions.split(",")
+        self.paths = [p.strip() for p in paths if p.strip()]
+        self.extensions = [
+            e.strip().lstrip(".").encode() for e in extensions or () if e.strip()
+        ]
+        self.use_cache = use_cache
+        self._loaded: Optional[List[WordlistIndex]] = None
+
+    def indexes(self) -> List[WordlistIndex]:
+        if self._loaded is None:
+            self._loaded = [load_index(path, self.use_cache) for path in self.paths]
+        return self._loaded
+
+    def words(self) -> Iterator[bytes]:
+        """Yield the unique entries of all lists, without extensions."""
+        indexes = self.indexes()
+        for i, index in enumerate(indexes):
+            earlier = indexes[:i]
+            for value, entry in zip(index.hashes, index.entries()):
+                if any(value in other for other in earlier):
+                    continue
+                yield entry
+
+    def __iter__(self) -> Iterator[str]:
+        indexes = self.indexes()
+        for word in self.words():
+            yield word.decode("utf-8", "replace")
+            for ext in self.extensions:
+                candidate = word + b"." + ext
+                value = entry_hash(candidate)
+                if any(value in index for index in indexes):
+                    continue
+                yield candidate.decode("utf-8", "replace")
+
+    def export(self, path: str) -> int:
+        """Write the combined unique entries to ``path``; return their count."""
+        count = 0
+        with open(path, "wb") as f:
+            for word in self.words():
+                f.write(word + b"\n")
+                count += 1
+        return count
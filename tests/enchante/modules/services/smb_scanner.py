@@ -1,43 +1,96 @@
-from ...core.scanner import Scanner
+import re
 
+from ...core.nmap import NmapScanner
 
-class SmbScanner(Scanner):
+# enum4linux: "//10.0.0.1/IPC$   Mapping: OK   Listing: N/A"
+ENUM4LINUX_SHARE = re.compile(
+    r"^//[^/]+/(?P<share>\S+)\s+Mapping:\s*(?P<mapping>\S+)"
+    r"(?:\s+Listing:\s*(?P<listing>\S+))?"
+)
+
+
+class SmbScanner(NmapScanner):
     """Scan SMB services for shares and vulnerabilities."""
 
+    tools = ("nmap", "enum4linux")
+    requires = ("tcp/445", "tcp/139", "service:microsoft-ds", "service:netbios-ssn")
+    # enum4linux runs against each target after nmap, so a shared nmap run
+    # would queue every target's enum4linux run behind one job slot
+    batchable = False
+    mergeable = False
+
     def __init__(self, target, options=None):
         super().__init__(target, options)
         self.port = self.options.get("port", 445)
+        self.shares = []
 
-    def scan(self):
-        """Scan SMB service."""
-        self.logger.info(f"Scanning SMB service on {self.target}:{self.port}")
+    def nmap_ports(self):
+        return str(self.port)
 
-        # Use nmap scripts for SMB scanning
-        nmap_command = f"nmap -p{self.port} --script smb-enum-shares,smb-enum-users,smb-os-discovery {self.target}"
+    def nmap_scripts(self):
+        scripts = ["smb-enum-shares", "smb-enum-users", "smb-os-discovery"]
 
         if self.verbosity >= 2:
-            nmap_command += ",smb-brute,smb-enum-domains,smb-protocols,smb-security-mode,smb-server-stats"
+            scripts += [
+                "smb-brute",
+                "smb-enum-domains",
+                "smb-protocols",
+                "smb-security-mode",
+                "smb-server-stats",
+            ]
 
         if self.verbosity >= 3:
-            nmap_command += ",smb-vuln-*"
+            scripts.append("smb-vuln-*")
 
-        result = self.run_tool("nmap", nmap_command)
+        return scripts
+
+    def parse_output_line(self, tool_name, line):
+        """Parse nmap output and record shares reported by enum4linux."""
+        if tool_name != "enum4linux":
+            super().parse_output_line(tool_name, line)
+            return
+        match = ENUM4LINUX_SHARE.match(line.strip())
+        if match:
+            self.shares.append(
+                {
+                    "share": match.group("share"),
+                    "mapping": match.group("mapping"),
+                    "listing": match.group("listing"),
+                }
+            )
+
+    def scan(self):
+        """Scan SMB service."""
+        self.logger.info(f"Scanning SMB service on {self.target}:{self.port}")
+
+        # Use nmap scripts for SMB scanning
+        return self.nmap_completed(self.run_nmap())
 
-        if not result["success"]:
-            self.logger.error(f"SMB scan failed: {result['stderr']}")
-            self.results = {"status": "failed", "error": result["stderr"]}
+    def nmap_completed(self, result):
+        """Report the nmap findings and enumerate further with enum4linux."""
+        if self.tool_failed(result):
+            error = result.get("error") or result["stderr"]
+            self.logger.error(f"SMB scan failed: {error}")
+            self.results = {"status": "failed", "error": error}
             return self.results
 
         # Use enum4linux for additional enumeration
         enum4linux_command = f"enum4linux -a {self.target}"
+        self.shares = []
         enum4linux_result = self.run_tool("enum4linux", enum4linux_command)
+        if not enum4linux_result.get("parsed"):
+            self.feed_output("enum4linux", enum4linux_result["stdout"])
 
         self.results = {
             "status": "completed",
-            "nmap_scan": result["stdout"],
+            "nmap_scan": self.host_for(),
+            "raw_output": self.tool_output(result) if self.verbosity >= 2 else None,
             "enum4linux_scan": (
-                enum4linux_result["stdout"] if enum4linux_result["success"] else None
+                None
+                if self.tool_failed(enum4linux_result)
+                else self.tool_output(enum4linux_result)
             ),
+            "shares": self.shares,
         }
 
         return self.results
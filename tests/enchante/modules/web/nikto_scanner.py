@@ -1,9 +1,23 @@
+import logging
+
 from ...core.scanner import Scanner
 
+# Nikto "+ " lines that describe the run rather than a finding
+NIKTO_INFO_PREFIXES = (
+    "+ Target ",
+    "+ Start Time:",
+    "+ End Time:",
+    "+ SSL Info:",
+    "+ Platform:",
+)
+
 
 class NiktoScanner(Scanner):
     """Scan web server for vulnerabilities using Nikto."""
 
+    tools = ("nikto",)
+    requires = ("service:http", "service:https", "tcp/80", "tcp/443")
+
     def __init__(self, target, options=None):
         super().__init__(target, options)
         self.port = self.options.get("port", 80)
@@ -18,6 +32,19 @@ class NiktoScanner(Scanner):
             if parsed.scheme == "https":
                 self.port = 443
 
+        self.findings = []
+
+    def parse_output_line(self, tool_name, line):
+        """Collect Nikto findings as they are reported."""
+        if not line.startswith("+ ") or line.startswith(NIKTO_INFO_PREFIXES):
+            return
+        if "host(s) tested" in line:
+            return
+        finding = line[2:].strip()
+        self.findings.append(finding)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"Nikto finding: {finding}")
+
     def scan(self):
         """Scan web server using Nikto."""
         self.logger.info(f"Scanning web server {self.target}:{self.port} with Nikto")
@@ -32,16 +59,24 @@ class NiktoScanner(Scanner):
         if self.verbosity >= 3:
             nikto_command += " -Debug"  # Debug level
 
+        if self.tool_rate:
+            nikto_command += f" -Pause {1 / self.tool_rate:.3g}"
+
+        self.findings = []
         result = self.run_tool("nikto", nikto_command)
 
-        if not result["success"]:
+        if self.tool_failed(result):
             self.logger.error(f"Nikto scan failed: {result['stderr']}")
             self.results = {"status": "failed", "error": result["stderr"]}
             return self.results
 
+        if not result.get("parsed"):
+            self.feed_output("nikto", result["stdout"])
+
         self.results = {
             "status": "completed",
-            "raw_output": result["stdout"],
+            "findings": self.findings,
+            "raw_output": self.tool_output(result),
             "command": result["command"],
         }
 
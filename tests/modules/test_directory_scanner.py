@@ -0,0 +1,130 @@
+import pytest
+
+from enchante.modules.web.directory_scanner import DirectoryScanner
+from enchante.modules.web.nikto_scanner import NiktoScanner
+
+GOBUSTER_OUTPUT = """===============================================================
+/admin                (Status: 301) [Size: 312] [--> http://example.com/admin/]
+/index.php            (Status: 200) [Size: 1024]
+===============================================================
+"""
+
+
+@pytest.fixture
+def mock_directory_scanner(monkeypatch):
+    def mock_run_tool(self, tool_name, command):
+        return {
+            "success": True,
+            "stdout": GOBUSTER_OUTPUT,
+            "stderr": "",
+            "command": command,
+        }
+
+    monkeypatch.setattr(DirectoryScanner, "run_tool", mock_run_tool)
+    scanner = DirectoryScanner("example.com")
+    monkeypatch.setattr(scanner.tool_manager, "is_tool_installed", lambda name: True)
+    return scanner
+
+
+def test_directory_scanner_parses_gobuster_output(mock_directory_scanner):
+    """Test that gobuster hits are returned as structured findings"""
+    result = mock_directory_scanner.scan()
+    assert result["status"] == "completed"
+    assert result["findings"] == [
+        {
+            "path": "/admin",
+            "status": 301,
+            "size": 312,
+            "redirect": "http://example.com/admin/",
+        },
+        {"path": "/index.php", "status": 200, "size": 1024},
+    ]
+
+
+def test_nikto_scanner_collects_findings():
+    """Test that Nikto findings are picked out of its output"""
+    scanner = NiktoScanner("example.com")
+    scanner.feed_output(
+        "nikto",
+        "+ Target IP:          10.0.0.1\n"
+        "+ Server: Apache/2.4.41\n"
+        "+ /admin/: Admin login page found.\n"
+        "+ 1 host(s) tested\n",
+    )
+    assert scanner.findings == [
+        "Server: Apache/2.4.41",
+        "/admin/: Admin login page found.",
+    ]
+
+
+@pytest.fixture
+def local_site():
+    """Serve a few pages over HTTP/1.1 keep-alive on the loopback interface."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    pages = {"/admin": (301, b""), "/index.php": (200, b"hello"), "/secret": (403, b"")}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            status, body = pages.get(self.path, (404, b"missing"))
+            self.send_response(status)
+            if status == 301:
+                self.send_header("Location", f"{self.path}/")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_directory_scanner_native_engine(local_site, tmp_path, monkeypatch):
+    """Test the built-in engine against a local server"""
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("# comment\nadmin\nindex\nsecret\nnothing\n")
+    scanner = DirectoryScanner(
+        local_site,
+        {"tool": "native", "wordlist": str(wordlist), "extensions": "php"},
+    )
+    result = scanner.scan()
+
+    assert result["status"] == "completed"
+    assert result["requests"] == 9  # calibration + 4 words with and without .php
+    assert sorted(result["findings"], key=lambda f: f["path"]) == [
+        {"path": "/admin", "status": 301, "size": 0, "redirect": "/admin/"},
+        {"path": "/index.php", "status": 200, "size": 5},
+        {"path": "/secret", "status": 403, "size": 0},
+    ]
+
+
+def test_rate_is_translated_into_tool_flags(monkeypatch):
+    """Test that a rate share becomes gobuster, nmap and hydra flags"""
+    from enchante.modules.network.port_scanner import PortScanner
+    from enchante.modules.services.ssh_scanner import SSHScanner
+
+    commands = []
+
+    def mock_run_tool(self, tool_name, command):
+        commands.append(command)
+        return {"success": True, "stdout": "", "stderr": "", "command": command}
+
+    monkeypatch.setattr(DirectoryScanner, "run_tool", mock_run_tool)
+    scanner = DirectoryScanner("example.com", {"_tool_rate": 5})
+    monkeypatch.setattr(scanner.tool_manager, "is_tool_installed", lambda name: True)
+    scanner.scan()
+
+    assert " -t 5 --delay 1000ms" in commands[0]
+    assert "--max-rate 50" in PortScanner("a", {"_tool_rate": 50}).nmap_command()
+    assert SSHScanner("a", {"rate": 0.5}).hydra_flags() == "-t 1 -c 2"
@@ -1,3 +1,10 @@
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
 from typer.testing import CliRunner
 
 from enchante.cli import app
@@ -9,3 +16,79 @@ def test_list_modules_command():
     """Test that the list-modules command executes without errors"""
     result = runner.invoke(app, ["list-modules"])
     assert result.exit_code == 0
+
+
+def test_cli_import_is_lightweight():
+    """Test that loading the CLI does not import rich or the scanner core"""
+    code = (
+        "import sys, enchante.cli; "
+        "print(sorted(m for m in ('rich.console', 'enchante.core.scanner') "
+        "if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def _stub_tools():
+    path = Path(__file__).resolve().parents[1] / "benchmarks" / "stub_tools.py"
+    spec = importlib.util.spec_from_file_location("stub_tools", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_scan_with_stub_tools(tmp_path, monkeypatch):
+    """Test a full scan of every module against the benchmark's stub tools"""
+    from enchante.core.tools import ToolManager
+
+    stubs = _stub_tools().install(str(tmp_path / "bin"))
+    monkeypatch.setenv("PATH", f"{stubs}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("ENCHANTE_STUB_RECORDS", "3")
+    ToolManager.clear_cache()
+
+    output = tmp_path / "results.jsonl"
+    result = runner.invoke(
+        app, ["scan", "10.0.0.1", "10.0.0.2", "--jobs", "4", "-o", str(output)]
+    )
+    ToolManager.clear_cache()
+    assert result.exit_code == 0, result.output
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(records) == 10
+    by_module = {(r["target"], r["module"].split(".")[0]): r["result"] for r in records}
+    assert all(r["status"] == "completed" for r in by_module.values())
+    assert len(by_module["10.0.0.1", "port_scanner"]["open_ports"]) == 3
+    assert len(by_module["10.0.0.2", "nikto_scanner"]["findings"]) == 3
+    assert [s["share"] for s in by_module["10.0.0.1", "smb_scanner"]["shares"]] == [
+        "share0",
+        "share1",
+        "share2",
+    ]
+
+
+def test_batched_scan_with_stub_tools(tmp_path, monkeypatch):
+    """Test that a batched nmap run through a host list reports every target"""
+    from enchante.core.tools import ToolManager
+
+    stubs = _stub_tools().install(str(tmp_path / "bin"))
+    monkeypatch.setenv("PATH", f"{stubs}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("ENCHANTE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("ENCHANTE_STUB_RECORDS", "3")
+    ToolManager.clear_cache()
+
+    output = tmp_path / "results.jsonl"
+    args = ["scan", "10.0.0.1", "10.0.0.2", "-m", "port_scanner.PortScanner"]
+    result = runner.invoke(app, args + ["--batch-size", "2", "-o", str(output)])
+    ToolManager.clear_cache()
+    assert result.exit_code == 0, result.output
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["target"] for r in records) == ["10.0.0.1", "10.0.0.2"]
+    for record in records:
+        # Ports of other hosts than the job's target would carry a "host" key
+        ports = record["result"]["open_ports"]
+        assert len(ports) == 3
+        assert not any("host" in port for port in ports)